@@ -0,0 +1,52 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Measures process startup costs: importing lib.chamber, and the first unit access that loads pint.
+# Run from the repository root with `python -m benchmarks.startup`.
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet runs in a fresh interpreter and prints the seconds spent in the measured step
+SNIPPETS = {
+    'import lib.chamber': "import time; t = time.time(); import lib.chamber; print(time.time() - t)",
+    'first unit access': "import lib.chamber, time; from lib.pint_ext import PintExtUnitRegistry; "
+                         "units = PintExtUnitRegistry(); t = time.time(); (1.0 * units.psi).to(units.pascal); "
+                         "print(time.time() - t)",
+}
+
+
+def measure(snippet, repeats=7):
+    """Runs a snippet in fresh interpreters and returns the best and median of its reported times, in seconds"""
+
+    times = []
+    for _ in range(repeats):
+        output = subprocess.check_output([sys.executable, '-c', snippet], cwd=ROOT)
+        times.append(float(output.decode('utf-8').strip().splitlines()[-1]))
+    times.sort()
+    return times[0], times[len(times) // 2]
+
+
+def run(repeats=7):
+    """Measures every startup step, returning a dict of step name to (best, median) seconds"""
+
+    return dict((name, measure(snippet, repeats)) for name, snippet in SNIPPETS.items())
+
+
+if __name__ == '__main__':
+    for name, (best, median) in sorted(run().items()):
+        print("{0:<20} best {1:8.1f} ms   median {2:8.1f} ms".format(name, best * 1e3, median * 1e3))
@@ -0,0 +1,385 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Times the hot paths of the solver, geometry and unit handling, saves the results as JSON and compares them against
+# a stored baseline. Run from the repository root with `python -m benchmarks.suite --help` for the options.
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from lib.chamber import PressureVessel, PressureVesselBatch, StressField, chamber_profile, lame, minimize_wall_mass
+from lib.chamber.reliability import LogNormal, Normal, estimate_reliability
+from lib.geometry import RevolvedSurface, interpolate_bspline
+from lib.nozzle import AreaMachTable, aerospike_contour, mach_from_area_ratio
+from lib.pint_ext import PintExtUnitRegistry
+from tests.chamber import PressureVesselTestCaseDataset
+
+from . import startup
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Benchmarks register themselves here, in the order they run
+BENCHMARKS = []
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark's setup when it cannot run in this environment"""
+
+
+def benchmark(func):
+    """
+    Registers a benchmark. The decorated function does any setup and returns the callable to time, or raises
+    SkipBenchmark.
+    """
+
+    BENCHMARKS.append(func)
+    return func
+
+
+def _dataset_vessels():
+    """Fresh, unsolved PressureVessels for the nine dataset cases"""
+
+    # Fetching a dataset item solves it, so fetch each once and rebuild plain vessels from its inputs
+    cases = list(PressureVesselTestCaseDataset())
+    return lambda: [PressureVessel(tc.ri, tc.t_guess, tc.p_c, tc.p_amb, tc.material_strength, tc.fs, tc.step_size)
+                    for tc in cases]
+
+
+def _corpus(n, seed=2015):
+    """A generated corpus of n design points in inches and psi, the same every run"""
+
+    random = np.random.RandomState(seed)
+    return (random.uniform(1.0, 10.0, n), random.uniform(500.0, 5000.0, n), np.full(n, 0.001),
+            random.choice([156e3, 42e3, 56.6e3, 46.4e3, 17.4e3], n), random.choice([1.25, 1.5, 2.0], n))
+
+
+def _solve_all(vessels, method):
+    def run():
+        for pv in vessels():
+            pv.calculate_wall_thickness(method=method)
+    return run
+
+
+@benchmark
+def pv_step_dataset():
+    """PressureVessel.calculate_wall_thickness over the nine dataset cases, reference step solver"""
+
+    return _solve_all(_dataset_vessels(), 'step')
+
+
+@benchmark
+def pv_bracket_dataset():
+    """PressureVessel.calculate_wall_thickness over the nine dataset cases, bracket solver"""
+
+    return _solve_all(_dataset_vessels(), 'bracket')
+
+
+@benchmark
+def pv_closed_form_dataset():
+    """PressureVessel.calculate_wall_thickness over the nine dataset cases, closed form solver"""
+
+    return _solve_all(_dataset_vessels(), 'closed_form')
+
+
+@benchmark
+def pv_max_stress():
+    """A single PressureVessel.max_stress call on Quantities"""
+
+    pv = _dataset_vessels()()[2]
+    return pv.max_stress
+
+
+@benchmark
+def raw_max_stress():
+    """The same stress evaluation as pv_max_stress on plain floats, the floor for unit overhead"""
+
+    pv = _dataset_vessels()()[2]
+    args = [q.to_base_units().magnitude for q in (pv.ri, pv.ro, pv.r, pv.p_c, pv.p_amb)]
+
+    def run():
+        max(lame.sigma_tan(*args), lame.sigma_rad(*args)) * pv.fs
+    return run
+
+
+@benchmark
+def pint_max_stress():
+    """The same stress evaluation as pv_max_stress with pint arithmetic throughout, as before unit kernels"""
+
+    pv = _dataset_vessels()()[2]
+    args = (pv.ri, pv.ro, pv.r, pv.p_c, pv.p_amb)
+
+    def run():
+        max(lame.sigma_tan(*args), lame.sigma_rad(*args)) * pv.fs
+    return run
+
+
+@benchmark
+def batch_closed_form_100k():
+    """PressureVesselBatch over a generated corpus of 100,000 design points solved in closed form"""
+
+    units = PintExtUnitRegistry()
+    ri, p_c, p_amb, strength, fs = _corpus(100000)
+    ri, p_c, p_amb, strength = ri * units.inch, p_c * units.psi, p_amb * units.psi, strength * units.psi
+    return lambda: PressureVesselBatch(ri, p_c, p_amb, strength, fs).calculate_wall_thickness()
+
+
+@benchmark
+def batch_bisection_10k():
+    """PressureVesselBatch over a generated corpus of 10,000 design points that need the bisection fallback"""
+
+    ri, p_c, p_amb, strength, fs = _corpus(10000)
+    return lambda: PressureVesselBatch(ri, p_c, p_amb, strength, fs, r=ri * 1.001).calculate_wall_thickness()
+
+
+@benchmark
+def stress_field_100k():
+    """StressField through the walls of 100,000 vessels at 21 radii each, with von Mises and Tresca stresses"""
+
+    random = np.random.RandomState(2015)
+    ri = random.uniform(0.5, 5.0, 100000)
+    ro = ri * random.uniform(1.01, 1.5, 100000)
+    p_c = random.uniform(1e6, 2e7, 100000)
+    return lambda: StressField(ri, ro, p_c, 101325.0, n_radii=21)
+
+
+@benchmark
+def minimize_wall_mass_10k():
+    """Minimum mass walls of fixed volume for 10,000 candidates, each bisected to the optimum radius"""
+
+    random = np.random.RandomState(2015)
+    p_c = random.uniform(1e6, 2e7, 10000)
+    material_strength = random.uniform(1e8, 1e9, 10000)
+    density = random.uniform(2700.0, 9000.0, 10000)
+    return lambda: minimize_wall_mass(p_c, material_strength, density, 2.0, (0.01, 0.05), volume=1e-4,
+                                      t_bounds=(0.001, 0.01))
+
+
+@benchmark
+def reliability_1m():
+    """Monte Carlo probability of failure of a chamber wall from 1,000,000 samples of four random variables"""
+
+    return lambda: estimate_reliability(LogNormal(250e6, 0.1), Normal(20e6, 1e6), Normal(0.025, 2.5e-4),
+                                        Normal(0.0025, 1.25e-4), 101325.0, n_samples=10 ** 6, seed=2015)
+
+
+@benchmark
+def chamber_profile_100k():
+    """chamber_profile outlines for 100,000 wall thicknesses and taper angles, without the CAD kernel"""
+
+    units = PintExtUnitRegistry()
+    random = np.random.RandomState(2015)
+    t = random.uniform(0.01, 0.5, 100000) * units.inch
+    theta = random.uniform(30.0, 60.0, 100000) * units.degree
+    return lambda: chamber_profile(t, theta, 7.0 * units.inch, 0.35)
+
+
+@benchmark
+def revolved_stl_chamber():
+    """Binary STL of a revolved chamber profile at 0.1 degree angular resolution, streamed to memory"""
+
+    units = PintExtUnitRegistry()
+    points = chamber_profile(0.1 * units.inch, 45 * units.degree, 7.0 * units.inch)
+    surface = RevolvedSurface(points, segments=3600, axis_y=5.2399 * units.inch)
+    return lambda: surface.write_stl(io.BytesIO())
+
+
+@benchmark
+def bspline_evaluate_1m():
+    """Interpolating B-spline through an aerospike contour evaluated at 1,000,000 parameter values"""
+
+    spline = interpolate_bspline(aerospike_contour(3.0, 1.2, 7.3861, n_points=43))
+    u = np.random.RandomState(2015).uniform(0.0, 1.0, 1000000)
+    return lambda: spline(u)
+
+
+@benchmark
+def area_mach_newton_1m():
+    """Supersonic Mach numbers from 1,000,000 area ratios by Newton's method"""
+
+    ratio = np.random.RandomState(2015).uniform(1.0, 200.0, 1000000)
+    return lambda: mach_from_area_ratio(ratio, 1.2)
+
+
+@benchmark
+def area_mach_table_1m():
+    """Supersonic Mach numbers from 1,000,000 area ratios by a precomputed AreaMachTable"""
+
+    table = AreaMachTable(1.2, max_area_ratio=200.0)
+    ratio = np.random.RandomState(2015).uniform(1.0, 200.0, 1000000)
+    return lambda: table(ratio)
+
+
+@benchmark
+def chamber_build():
+    """HelloWorldChamber.build for the first dataset case, including the CAD kernel"""
+
+    try:
+        from lib.chamber.hello_world_chamber import HelloWorldChamber
+    except ImportError as e:
+        raise SkipBenchmark("CadQuery is not available ({0})".format(e))
+
+    tc = _dataset_vessels()()[0]
+    return lambda: HelloWorldChamber().build(tc.ri, tc.t_guess, tc.p_c, tc.p_amb, tc.material_strength, tc.fs,
+                                             tc.step_size)
+
+
+@benchmark
+def import_lib_chamber():
+    """Importing lib.chamber in a fresh interpreter"""
+
+    return lambda: startup.measure(startup.SNIPPETS['import lib.chamber'], repeats=1)[0]
+
+
+def time_benchmark(func, repeat=5, min_time=0.2):
+    """
+    Times a benchmark's callable, running it enough times per repeat to take at least min_time seconds
+    :return: Dict with the best seconds per call, and the number of calls per repeat and repeats used
+    """
+
+    target = func()
+
+    if func is import_lib_chamber:
+        # Reports its own time, measured inside the child interpreter
+        times = [target() for _ in range(repeat)]
+        return {'seconds': min(times), 'number': 1, 'repeat': repeat}
+
+    timer = timeit.Timer(target)
+    number = 1
+    while timer.timeit(number) < min_time and number < 10 ** 7:
+        number *= 10
+    times = timer.repeat(repeat, number)
+
+    return {'seconds': min(times) / number, 'number': number, 'repeat': repeat}
+
+
+def run(names=None, repeat=5, min_time=0.2, log=None):
+    """
+    Runs the benchmarks, or only those whose names contain one of the given strings
+    :return: A results dict ready to be saved as JSON
+    """
+
+    results = {}
+    for func in BENCHMARKS:
+        if names and not any(name in func.__name__ for name in names):
+            continue
+
+        try:
+            result = time_benchmark(func, repeat, min_time)
+        except SkipBenchmark as e:
+            result = {'skipped': str(e)}
+        result['description'] = func.__doc__.strip()
+        results[func.__name__] = result
+
+        if log is not None:
+            log(func.__name__, result)
+
+    import pint
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pint': pint.__version__,
+            'platform': platform.platform(),
+        },
+        'benchmarks': results,
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compares results against a baseline
+    :param tolerance: Fraction a benchmark may slow down by before it counts as a regression
+    :return: Dict of benchmark name to (baseline seconds, current seconds, ratio, regressed) for the benchmarks that
+             ran in both
+    """
+
+    comparison = {}
+    for name, result in results['benchmarks'].items():
+        reference = baseline['benchmarks'].get(name)
+        if reference is None or 'seconds' not in result or 'seconds' not in reference:
+            continue
+        ratio = result['seconds'] / reference['seconds']
+        comparison[name] = (reference['seconds'], result['seconds'], ratio, ratio > 1.0 + tolerance)
+    return comparison
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _format_seconds(seconds):
+    for scale, unit in ((1.0, 's'), (1e-3, 'ms'), (1e-6, 'us')):
+        if seconds >= scale:
+            return '{0:8.2f} {1}'.format(seconds / scale, unit)
+    return '{0:8.2f} ns'.format(seconds / 1e-9)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the solver, geometry and unit handling hot paths.')
+    parser.add_argument('names', nargs='*', help='only run benchmarks whose names contain one of these')
+    parser.add_argument('--output', default='bench_output.json', help='where to save the results as JSON')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='fraction a benchmark may slow down by before it fails the comparison')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per repeat')
+    args = parser.parse_args(argv)
+
+    def log(name, result):
+        if 'skipped' in result:
+            print('{0:<26} skipped: {1}'.format(name, result['skipped']))
+        else:
+            print('{0:<26} {1} per call'.format(name, _format_seconds(result['seconds'])))
+
+    results = run(args.names, args.repeat, args.min_time, log)
+    save(results, args.output)
+
+    if args.save_baseline:
+        save(results, args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline at {0}, run with --save-baseline to store one'.format(args.baseline))
+        return 0
+
+    regressions = 0
+    print('')
+    for name, (before, after, ratio, regressed) in sorted(compare(results, load(args.baseline),
+                                                                  args.tolerance).items()):
+        regressions += regressed
+        print('{0:<26} {1} -> {2}  x{3:.2f}{4}'.format(name, _format_seconds(before), _format_seconds(after), ratio,
+                                                     '  REGRESSION' if regressed else ''))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
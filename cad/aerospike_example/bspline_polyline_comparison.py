@@ -1,7 +1,9 @@
+import numpy as np
 import cadquery as cq
 from Helpers import show
 import Part
 from FreeCAD import Vector as v
+from lib.geometry import simplify_polyline, fit_bspline
 
 # The points for the CQ polyline
 spike_points = (
@@ -105,3 +107,21 @@ curve.interpolate(spline_points)
 
 Part.show(curve.toShape())
 show(spike_line)
+
+# The same contour reduced to a tolerance instead: a polyline through fewer of the points, and a least-squares
+# B-spline with the fewest poles that stays within the tolerance of every point
+tolerance = 0.005
+simplified_points = simplify_polyline(np.array(spike_points), tolerance)
+fit = fit_bspline(np.array(spike_points), tolerance)
+print("Polyline segments:\t" + str(len(spike_points) - 1) + " -> " + str(len(simplified_points) - 1))
+print("B-spline poles:\t\t" + str(len(spline_points)) + " -> " + str(len(fit.control_points)))
+
+simplified_line = cq.Workplane('XY').polyline([tuple(point) for point in simplified_points.tolist()])
+
+knots, multiplicities = np.unique(fit.knots, return_counts=True)
+fitted_curve = Part.BSplineCurve()
+fitted_curve.buildFromPolesMultsKnots([v(x, y, 0) for x, y in fit.control_points.tolist()],
+                                      multiplicities.tolist(), knots.tolist(), False, fit.degree)
+
+Part.show(fitted_curve.toShape())
+show(simplified_line)
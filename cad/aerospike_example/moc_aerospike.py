@@ -0,0 +1,39 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Aerospike designed by the method of characteristics rather than from a fixed list of points. Change the gas, exit
+# Mach number or lip radius and the spike is regenerated. Run it with the CadQuery module for FreeCAD, with the root
+# of this repository on the Python path.
+import cadquery as cq
+from Helpers import show
+from lib.nozzle import aerospike_contour
+
+gamma = 1.2            # Ratio of specific heats of the exhaust
+exit_mach = 3.0        # Design exit Mach number
+lip_radius = 7.3861    # Radius of the cowl lip, which sets the exit area
+length_fraction = 0.4  # Keep this fraction of the full spike length
+rgba = (204, 204, 204, 0.0)
+
+# The contour is (axial, radius) from the lip plane, these examples draw (radius, axial) in the XZ plane with the
+# flow running towards -Z, so the spike starts at the lip plane and hangs below it
+contour = aerospike_contour(exit_mach, gamma, lip_radius, n_points=60, length_fraction=length_fraction)
+spike_points = [(r, -x) for x, r in contour.tolist()]
+
+spike = cq.Workplane('XZ').moveTo(0.0, spike_points[0][1])\
+                          .lineTo(*spike_points[0])\
+                          .spline(spike_points[1:])\
+                          .lineTo(0.0, spike_points[-1][1])\
+                          .close()
+
+show(spike.revolve(), rgba)
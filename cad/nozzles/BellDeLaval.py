@@ -15,45 +15,37 @@
 
 # Bell DeLaval nozzle by Mach 30
 # Based on the OpenSCAD design by @buback here - https://github.com/Buback/ParametricDeLavalModel/blob/master/BellDeLavalNozzle.scad
-import math
-import FreeCAD
+#
+# The contour comes from lib.nozzle.bell_contour (Rao's parabolic approximation), this script only turns it into a
+# solid. Run it with the CadQuery module for FreeCAD, with the root of this repository on the Python path.
+import numpy as np
+import cadquery as cq
+from Helpers import show
+from lib.nozzle import bell_contour, bell_length, mach_from_area_ratio, pressure_ratio
 
 # Radii
 throat_radius = 1.5   # Wierd shapes can happen at low expansion ratios
-chamber_radius = 5.0  # Combution chamber radius
+wall_thickness = 0.5  # Nozzle wall thickness, measured normal to the contour
 
 expan_ratio = 30.0    # Expansion ratio
+fract_length = 0.8    # Fractional length of bell compared to a 15 degree conic nozzle
+gamma = 1.2           # Ratio of specific heats of the exhaust, only used for the printed exit conditions
 
-# Define exit radius by expansion ratio
-exit_radius = throat_radius * math.sqrt(expan_ratio)
-print("Radius of Exit:\t\t" + str(exit_radius))
-
-# The areas to back out the expansion ratio
-area_of_exit = math.pi * math.pow(exit_radius, 2)
-area_of_throat = math.pi * math.pow(throat_radius, 2)
-
-# Expansion ratio is Area of Exit/Area of Throat
-expan_ratio = area_of_exit / area_of_throat
-
-# Do a sanity check of the expansion ratio
-print("Area of Exit:\t\t" + str(area_of_exit))
-print("Area of Throat:\t\t" + str(area_of_throat))
-print("Expansion Ratio:\t\t" + str(expan_ratio))
-
-# Angles
-diver_angle = 35  # Divergent section angle
-conver_angle = 35  # Convergent section angle typ 20-45 deg Not as critical
+# Inner wall from the start of the entrance arc to the exit, and the outer wall offset along the contour normals
+inner = bell_contour(throat_radius, expan_ratio, fract_length, n_points=200)
+tangents = np.gradient(inner, axis=0)
+normals = np.stack([-tangents[:, 1], tangents[:, 0]], axis=1) / np.hypot(tangents[:, 0], tangents[:, 1])[:, None]
+outer = inner + wall_thickness * normals
 
-# Other dimensions
-conic_approx = 15  # Conic approximation nozzle at 15 deg typ 12-18 deg
-diver_length = (exit_radius - throat_radius) * \
-               (math.sin(math.radians(90)) /
-                math.sin(math.radians(conic_approx)))  # Conic nozzle divergent sect length
+print("Radius of Exit:\t\t" + str(inner[-1, 1]))
+print("Length of Bell:\t\t" + str(bell_length(throat_radius, expan_ratio, fract_length)))
+exit_mach = mach_from_area_ratio(expan_ratio, gamma)
+print("Exit Mach Number:\t" + str(exit_mach))
+print("Exit Pressure Ratio:\t" + str(pressure_ratio(exit_mach, gamma)))
 
-conver_length = (chamber_radius - throat_radius) * \
-                (math.sin(math.radians(90)) /
-                 math.sin(math.radians(conver_angle)))  # Conic nozzle convergent sect length
+nozzle_points = [tuple(point) for point in np.concatenate([inner, outer[::-1]]).tolist()]
 
-fract_length = 80 / 100  # Fractional length of bell compared to conic nozzle
+# Revolve the wall section around the nozzle axis, which is x
+nozzle = cq.Workplane("XY").polyline(nozzle_points).close().revolve(360.0, (0, 0, 0), (1, 0, 0))
 
-#chamber_length = math.exp( (.029 * ln(math.pow(throat_radius * 2, 2))) + (.47*ln(Rt*2)) + 1.94 )
+show(nozzle)
@@ -1,3 +1,33 @@
+import importlib
+import sys
+
 from .pressure_vessel_calcs import PressureVessel
 
-__all__ = ["PressureVessel"]
+# Everything beyond PressureVessel needs NumPy or is rarely used, so it is only imported when first used to keep
+# `import lib.chamber` fast for short lived processes
+_LAZY_EXPORTS = {
+    "PressureVesselBatch": "pressure_vessel_batch",
+    "SolutionCache": "solution_cache",
+    "DesignSweep": "sweep",
+    "GeometryCache": "geometry_cache",
+    "chamber_profile": "profiles",
+    "PartCatalog": "catalog",
+    "thruster_pipeline": "sizing",
+    "StressField": "stress_field",
+    "minimize_wall_mass": "optimize",
+    "estimate_reliability": "reliability",
+}
+
+__all__ = ["PressureVessel"] + sorted(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module("." + _LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+if sys.version_info < (3, 7):
+    # Module level __getattr__ is not supported, import everything up front
+    for _name in _LAZY_EXPORTS:
+        globals()[_name] = __getattr__(_name)
@@ -0,0 +1,198 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+from lib.pint_ext import pack, unpack, warm_up
+
+MANIFEST = 'manifest.json'
+
+# File extension for each export type
+EXTENSIONS = {'STEP': '.step', 'STL': '.stl'}
+
+# Builder instances of this worker process, created once per builder and reused for every part
+_builders = {}
+
+
+def export_shape(shape, path, export_type, tolerance=0.1):
+    """
+    Exports a CadQuery shape or Workplane to a file
+    :param export_type: 'STEP' or 'STL'
+    :param tolerance: Linear deflection of STL meshes, in model units
+    """
+
+    import cadquery as cq
+
+    with open(path, 'w') as f:
+        cq.exporters.exportShape(shape, export_type, f, tolerance)
+
+
+def _builder_path(builder):
+    """The 'module:name' path of a builder class, which is how parts refer to builders across processes"""
+
+    if isinstance(builder, str):
+        return builder
+    return '{0}:{1}'.format(builder.__module__, builder.__name__)
+
+
+def _builder(path):
+    """The builder instance for a 'module:name' path, created on first use in this process"""
+
+    builder = _builders.get(path)
+    if builder is None:
+        module, name = path.split(':')
+        builder = _builders[path] = getattr(importlib.import_module(module), name)()
+    return builder
+
+
+def _start_worker(builder_paths):
+    """
+    Process pool initializer, which loads the unit registry and every builder (and so the CAD kernel) before the
+    first part arrives so that no part pays for the warm up
+    """
+
+    warm_up()
+    for path in builder_paths:
+        try:
+            _builder(path)
+        except Exception:
+            # Reported against each part that needs this builder instead
+            pass
+
+
+def _build_part(task):
+    """Builds and exports one part, catching any failure so that it is reported rather than ending the batch"""
+
+    index, name, path, inputs, directory, export_types, tolerance, export, cache_directory = task
+    result = {'name': name, 'builder': path, 'status': 'failed', 'outputs': {}, 'seconds': {}, 'worker': os.getpid()}
+
+    try:
+        inputs = dict((key, unpack(value)) for key, value in inputs.items())
+        if cache_directory is not None:
+            from .geometry_cache import GeometryCache
+            inputs['cache'] = GeometryCache(cache_directory)
+
+        start = time.time()
+        shape = _builder(path).build(**inputs)
+        result['seconds']['build'] = time.time() - start
+
+        for export_type in export_types:
+            filename = name + EXTENSIONS[export_type]
+            start = time.time()
+            export(shape, os.path.join(directory, filename), export_type, tolerance)
+            result['seconds'][export_type] = time.time() - start
+            result['outputs'][export_type] = filename
+
+        result['status'] = 'ok'
+    except Exception as e:
+        result['error'] = '{0}: {1}'.format(type(e).__name__, e)
+        result['traceback'] = traceback.format_exc()
+
+    return index, result
+
+
+class PartCatalog(object):
+    """
+    A list of parts to build, each a builder class (such as HelloWorldChamber) with the inputs for its build method.
+    The catalog is built across a process pool, exporting each part as it completes and keeping a manifest of the
+    outputs, timings and any failures. A part that fails is recorded in the manifest and the rest carry on.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def __len__(self):
+        return len(self.parts)
+
+    def add(self, name, builder, **inputs):
+        """
+        Adds a part
+        :param name: Unique name of the part, used for its output files
+        :param builder: A builder class with a build method, defined at module level so that workers can import it,
+                        or its 'module:name' path
+        :param inputs: Keyword arguments for the builder's build method
+        :return: The catalog
+        """
+
+        if not name or os.path.basename(name) != name or name.startswith('.'):
+            raise ValueError("'{0}' cannot be used as a part name".format(name))
+        if any(part[0] == name for part in self.parts):
+            raise ValueError("there is already a part named '{0}'".format(name))
+
+        self.parts.append((name, _builder_path(builder), dict((key, pack(value)) for key, value in inputs.items())))
+        return self
+
+    def build(self, directory, export_types=('STEP', 'STL'), processes=None, tolerance=0.1, export=export_shape,
+              cache_directory=None, progress=None):
+        """
+        Builds and exports every part
+        :param directory: Where the exported files and manifest are written, created if it does not exist
+        :param export_types: File types to export each part to, from EXTENSIONS
+        :param processes: Number of worker processes, None for one per CPU, 0 or 1 to build in this process
+        :param tolerance: Linear deflection of STL meshes, in model units
+        :param export: Module level function called as export(shape, path, export_type, tolerance)
+        :param cache_directory: Optional GeometryCache directory shared by the workers, for builders that take a cache
+        :param progress: Optional callable, called as progress(parts_done, parts_total, result) as each part completes
+        :return: The manifest, also written to manifest.json in the directory
+        """
+
+        for export_type in export_types:
+            if export_type not in EXTENSIONS:
+                raise ValueError("unknown export type '{0}', expected one of {1}".format(export_type,
+                                                                                         sorted(EXTENSIONS)))
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        tasks = [(i, name, path, inputs, directory, tuple(export_types), tolerance, export, cache_directory)
+                 for i, (name, path, inputs) in enumerate(self.parts)]
+        builder_paths = sorted(set(path for name, path, inputs in self.parts))
+
+        start = time.time()
+        results = [None] * len(tasks)
+        manifest = {'directory': os.path.abspath(directory), 'export_types': list(export_types), 'parts': results}
+
+        pool = None
+        if processes is None or processes > 1:
+            pool = multiprocessing.Pool(processes, initializer=_start_worker, initargs=(builder_paths,))
+            completed = pool.imap_unordered(_build_part, tasks)
+        else:
+            completed = (_build_part(task) for task in tasks)
+
+        try:
+            for done, (index, result) in enumerate(completed, 1):
+                results[index] = result
+                if progress is not None:
+                    progress(done, len(tasks), result)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        manifest['seconds'] = time.time() - start
+        manifest['built'] = sum(1 for result in results if result is not None and result['status'] == 'ok')
+        manifest['failed'] = sum(1 for result in results if result is not None and result['status'] != 'ok')
+
+        # Write then rename so a reader never sees a half written manifest
+        temp_path = os.path.join(directory, MANIFEST + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        getattr(os, 'replace', os.rename)(temp_path, os.path.join(directory, MANIFEST))
+
+        return manifest
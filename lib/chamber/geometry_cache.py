@@ -0,0 +1,198 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+MANIFEST = 'manifest.json'
+
+
+def _normalized(value):
+    """A JSON friendly form of a build input, with Quantities converted to base SI units"""
+
+    if hasattr(value, 'units'):
+        value = value.to_base_units()
+        return [float(value.magnitude), str(value.units)]
+    if isinstance(value, (list, tuple)):
+        return [_normalized(item) for item in value]
+    if isinstance(value, float):
+        return float(value)
+    return value
+
+
+class GeometryCache(object):
+    """
+    A content addressed store of built geometry on disk. Each entry is a directory named by a digest of everything
+    that went into the build, holding the exported solid and meshes plus a manifest, so a repeat build with the same
+    inputs can load the files instead of running the CAD kernel. Entries are evicted least recently used first once
+    the store is over its size limit, and when they have not been used for longer than the age limit.
+    """
+
+    hits = 0      # lookups that found a complete entry
+    misses = 0    # lookups that did not
+
+    def __init__(self, directory, max_bytes=None, max_age=None):
+        """
+        :param directory: Where entries are stored, created if it does not exist
+        :param max_bytes: Total size the entries may take up, None for no limit
+        :param max_age: Seconds since an entry was last used after which it is evicted, None for no limit
+        """
+
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        if max_age is not None and max_age <= 0:
+            raise ValueError("max_age must be positive")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, builder, version, **inputs):
+        """
+        The digest identifying a build
+        :param builder: Name of what builds the geometry, such as the class name
+        :param version: Digest of the builder's code, so that editing the builder invalidates its entries
+        :param inputs: Every input to the build, Quantities are compared in base SI units
+        """
+
+        description = json.dumps([builder, version, sorted((name, _normalized(value))
+                                                          for name, value in inputs.items())], sort_keys=True)
+        return hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        """
+        Finds a complete entry and marks it as used
+        :return: Dict of file name to path for the entry's files, or None if the build is not cached
+        """
+
+        entry = os.path.join(self.directory, key)
+        manifest = os.path.join(entry, MANIFEST)
+
+        try:
+            with open(manifest) as f:
+                files = json.load(f)['files']
+        except (IOError, OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        os.utime(manifest, None)
+        self.hits += 1
+        return dict((name, os.path.join(entry, name)) for name in files)
+
+    def store(self, key, writers, inputs=None):
+        """
+        Writes a new entry. The files are written to a scratch directory that is renamed into place once complete,
+        so readers never see a partial entry, and when another process stores the same key first its entry is kept.
+        :param writers: Dict of file name to a callable that writes the file, called with the path to write to
+        :param inputs: Optional description of the build inputs to keep in the manifest for reference
+        :return: Dict of file name to path, as from lookup
+        """
+
+        entry = os.path.join(self.directory, key)
+        scratch = os.path.join(self.directory, '.{0}.{1}.tmp'.format(key, os.getpid()))
+
+        if os.path.isdir(scratch):
+            shutil.rmtree(scratch)
+        os.makedirs(scratch)
+
+        try:
+            sizes = {}
+            for name, write in writers.items():
+                if name == MANIFEST or os.path.basename(name) != name:
+                    raise ValueError("'{0}' cannot be used as a cache file name".format(name))
+                path = os.path.join(scratch, name)
+                write(path)
+                sizes[name] = os.path.getsize(path)
+
+            with open(os.path.join(scratch, MANIFEST), 'w') as f:
+                json.dump({'key': key, 'created': time.time(), 'files': sizes,
+                           'inputs': None if inputs is None else dict((name, _normalized(value))
+                                                                      for name, value in inputs.items())},
+                          f, indent=2, sort_keys=True)
+
+            try:
+                os.rename(scratch, entry)
+            except OSError:
+                if not os.path.exists(os.path.join(entry, MANIFEST)):
+                    raise
+                # Someone else stored the same build, theirs is just as good
+        finally:
+            if os.path.isdir(scratch):
+                shutil.rmtree(scratch)
+
+        self.evict(keep=key)
+        return dict((name, os.path.join(entry, name)) for name in writers)
+
+    def entries(self):
+        """
+        Lists the complete entries
+        :return: List of (key, bytes, last used time) tuples, least recently used first
+        """
+
+        entries = []
+        for key in os.listdir(self.directory):
+            entry = os.path.join(self.directory, key)
+            manifest = os.path.join(entry, MANIFEST)
+            if key.startswith('.') or not os.path.isfile(manifest):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            entries.append((key, size, os.path.getmtime(manifest)))
+
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def size(self):
+        """The total bytes taken up by the entries"""
+
+        return sum(size for key, size, last_used in self.entries())
+
+    def evict(self, keep=None):
+        """
+        Removes entries past the age limit, then the least recently used until the store fits its size limit
+        :param keep: A key that is never evicted, such as the entry that was just stored
+        :return: The keys that were removed
+        """
+
+        entries = self.entries()
+        total = sum(size for key, size, last_used in entries)
+        now = time.time()
+
+        removed = []
+        for key, size, last_used in entries:
+            expired = self.max_age is not None and now - last_used > self.max_age
+            oversized = self.max_bytes is not None and total > self.max_bytes
+            if key == keep or not (expired or oversized):
+                continue
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            total -= size
+            removed.append(key)
+
+        return removed
+
+    def clear(self):
+        """Removes every entry and resets the counters"""
+
+        for key, size, last_used in self.entries():
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+        self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / float(total) if total else 0.0}
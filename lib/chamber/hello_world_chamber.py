@@ -16,9 +16,16 @@
 # IMPORTANT: You must install FreeCAD and the CadQuery module for FreeCAD to
 # run this script. https://github.com/jmwright/cadquery-freecad-module
 
-import math
+import hashlib
+import inspect
+import sys
 from lib.pint_ext import PintExtUnitRegistry
 from lib.chamber import PressureVessel
+from lib.chamber import profiles
+from lib.chamber.catalog import export_shape
+from lib.chamber.profiles import chamber_profile
+from lib.chamber.solution_cache import solver_version
+from lib.util.instrumentation import phase
 import cadquery as cq
 
 # Pint units used
@@ -39,45 +46,72 @@ def mm(value):
         raise ValueError('Must be a length unit type to convert to mm.')
 
 
+def builder_version():
+    """A digest of this builder and the solver and profile it uses, so that editing any of them invalidates cached
+    geometry"""
+
+    digest = hashlib.sha1(solver_version().encode('utf-8'))
+    for module in (profiles, sys.modules[__name__]):
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    return digest.hexdigest()
+
+
 class HelloWorldChamber(object):
-    def build(self, ri, t_guess, p_c, p_amb, material_strength, fs, step_size):
-        pv = PressureVessel(ri, t_guess, p_c, p_amb, material_strength, fs, step_size)
-        t = pv.calculate_wall_thickness()
+    instrumentation = None  # optional Instrumentation, times the solve, outline and CAD phases of each build
+    mesh_tolerance = 0.004  # linear deflection of the cached STL mesh, in inches as the solid is built in (~0.1 mm)
 
-        theta = 45 * units.degree  # The chamber taper angle in degrees
-        total_length = 7.0 * units.inch  # The full length of the chamber exterior
-        converg_sect_length = total_length * 0.35  # Converging section length
+    def build(self, ri, t_guess, p_c, p_amb, material_strength, fs, step_size, cache=None):
+        """
+        Builds the chamber solid
+        :param cache: Optional GeometryCache, repeat builds with the same inputs load the cached STEP file instead of
+                      running the solver and CAD kernel, and new builds are stored with an STL mesh alongside
+        :return: The chamber as a CadQuery Workplane
+        """
+
+        if cache is None:
+            return self._build(ri, t_guess, p_c, p_amb, material_strength, fs, step_size)
+
+        inputs = dict(ri=ri, t_guess=t_guess, p_c=p_c, p_amb=p_amb, material_strength=material_strength, fs=fs,
+                      step_size=step_size, mesh_tolerance=self.mesh_tolerance)
+        key = cache.key(type(self).__name__, builder_version(), **inputs)
 
-        # Where our taper starts at the business end of the chamber
-        theta_start = total_length - converg_sect_length
+        files = cache.lookup(key)
+        if files is not None:
+            with phase(self.instrumentation, 'cache_load'):
+                return cq.importers.importStep(files['chamber.step'])
 
-        theta_end_point = converg_sect_length * math.tan(theta.to(units.radian))
+        chamber = self._build(ri, t_guess, p_c, p_amb, material_strength, fs, step_size)
 
-        # Set up some of our re-usable dimensions
-        dtheta = theta_start + converg_sect_length
+        def export(export_type):
+            return lambda path: export_shape(chamber, path, export_type, self.mesh_tolerance)
 
-        # Temp math to get our chamber outline points
-        pointX = dtheta - math.cos(theta.to(units.radian)) * \
-            math.tan(theta.to(units.radian)) * t
-        pointY = theta_end_point - math.sin(theta.to(units.radian)) * \
-            math.tan(theta.to(units.radian)) * t
-        pointY2 = (theta_end_point - t / math.cos(theta.to(units.radian)))
-        diffX = pointX - theta_start
-        diffY = pointY - 0
+        with phase(self.instrumentation, 'cache_store'):
+            cache.store(key, {'chamber.step': export('STEP'), 'chamber.stl': export('STL')}, inputs)
+
+        return chamber
+
+    def _build(self, ri, t_guess, p_c, p_amb, material_strength, fs, step_size):
+        pv = PressureVessel(ri, t_guess, p_c, p_amb, material_strength, fs, step_size)
+        if self.instrumentation is not None:
+            pv.instrument(self.instrumentation, 'HelloWorldChamber')
+
+        with phase(self.instrumentation, 'solve'):
+            t = pv.calculate_wall_thickness()
+
+        theta = 45 * units.degree  # The chamber taper angle in degrees
+        total_length = 7.0 * units.inch  # The full length of the chamber exterior
 
-        chamber_points = [(theta_start.magnitude, 0),
-                          (dtheta.magnitude, theta_end_point.magnitude),
-                          (dtheta.magnitude, pointY2.magnitude),
-                          (dtheta.magnitude - diffX.magnitude, pointY2.magnitude - diffY.magnitude),
-                          (theta_start.magnitude, -t.magnitude),
-                          (0, -t.magnitude)]
+        with phase(self.instrumentation, 'outline'):
+            chamber_points = [tuple(point) for point in
+                              chamber_profile(t, theta, total_length, 0.35).magnitude.tolist()]
 
-        outline = cq.Workplane('XY').polyline(chamber_points).close()
+        with phase(self.instrumentation, 'cad'):
+            outline = cq.Workplane('XY').polyline(chamber_points).close()
 
-        chamber = outline.revolve(360.0, (0, ri.magnitude, 0),
-                                  (1, ri.magnitude, 0))
+            chamber = outline.revolve(360.0, (0, ri.magnitude, 0),
+                                      (1, ri.magnitude, 0))
 
-        # Rotate the chamber so that it's properly aligned for 3D printing
-        chamber = chamber.rotate((0, 0, 0), (0, 1, 0), -90)
+            # Rotate the chamber so that it's properly aligned for 3D printing
+            chamber = chamber.rotate((0, 0, 0), (0, 1, 0), -90)
 
         return chamber
@@ -0,0 +1,103 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lame's thick walled cylinder equations on plain floats or NumPy arrays in consistent units. These are the kernels
+# behind PressureVessel and PressureVesselBatch.
+
+
+def sigma_tan(ri, ro, r, p_c, p_amb):
+    """Calculate the tangential stress in thick walled cylinder"""
+
+    return (p_c * ri**2 - p_amb * ro**2 - ri**2 * ro**2 * (p_amb - p_c) / r**2) / (ro**2 - ri**2)
+
+
+def sigma_rad(ri, ro, r, p_c, p_amb):
+    """Calculate the radial stress in thick walled cylinder"""
+
+    return (p_c * ri**2 - p_amb * ro**2 + ri**2 * ro**2 * (p_amb - p_c) / r**2) / (ro**2 - ri**2)
+
+
+def sigma_axial(ri, ro, p_c, p_amb):
+    """Calculate the axial stress in thick walled cylinder with closed ends, which is the same through the wall"""
+
+    return (p_c * ri**2 - p_amb * ro**2) / (ro**2 - ri**2)
+
+
+def _gradient(ri, ro, r, p_c, p_amb, sigma, sign):
+    """
+    Partial derivatives of the stress sigma = (p_c ri^2 - p_amb ro^2 + sign ri^2 ro^2 (p_c - p_amb) / r^2) /
+    (ro^2 - ri^2), which is sigma_tan for sign = 1 and sigma_rad for sign = -1
+    """
+
+    denominator = ro**2 - ri**2
+    d_ri = (2 * ri * p_c + sign * 2 * ri * ro**2 * (p_c - p_amb) / r**2 + 2 * ri * sigma) / denominator
+    d_ro = (-2 * ro * p_amb + sign * 2 * ro * ri**2 * (p_c - p_amb) / r**2 - 2 * ro * sigma) / denominator
+    d_r = -sign * 2 * ri**2 * ro**2 * (p_c - p_amb) / (r**3 * denominator)
+    d_p_c = (ri**2 + sign * ri**2 * ro**2 / r**2) / denominator
+    d_p_amb = -(ro**2 + sign * ri**2 * ro**2 / r**2) / denominator
+
+    return d_ri, d_ro, d_r, d_p_c, d_p_amb
+
+
+def sigma_tan_gradient(ri, ro, r, p_c, p_amb):
+    """
+    Partial derivatives of sigma_tan with respect to each of its arguments
+    :return: (d/d ri, d/d ro, d/d r, d/d p_c, d/d p_amb)
+    """
+
+    return _gradient(ri, ro, r, p_c, p_amb, sigma_tan(ri, ro, r, p_c, p_amb), 1)
+
+
+def sigma_rad_gradient(ri, ro, r, p_c, p_amb):
+    """
+    Partial derivatives of sigma_rad with respect to each of its arguments
+    :return: (d/d ri, d/d ro, d/d r, d/d p_c, d/d p_amb)
+    """
+
+    return _gradient(ri, ro, r, p_c, p_amb, sigma_rad(ri, ro, r, p_c, p_amb), -1)
+
+
+def wall_thickness_sensitivities(ri, ro, r, p_c, p_amb, fs, r_follows_ri=True):
+    """
+    Partial derivatives of the wall thickness that brings the max stress, including the factor of safety, to the
+    material strength, by the implicit function theorem at a solved outer radius. Since fs max(sigma_tan, sigma_rad)
+    - S = 0 holds along the solution, dt/dx = -(d/dx of the left hand side) / (its derivative with respect to t).
+    :param ro: The solved outer radius, ri plus the wall thickness
+    :param r_follows_ri: True when the radius of interest is the inner radius and moves with it
+    :return: Dict of the derivatives of the thickness with respect to 'ri', 'p_c', 'p_amb', 'material_strength' and
+             'fs', each holding the others fixed
+    """
+
+    tangential = sigma_tan(ri, ro, r, p_c, p_amb)
+    radial = sigma_rad(ri, ro, r, p_c, p_amb)
+
+    # Blend by the governing stress rather than branch on it, so this works element-wise on arrays as well as floats
+    governing = 1.0 * (tangential >= radial)
+    gradient = [governing * d_tan + (1.0 - governing) * d_rad for d_tan, d_rad in
+                zip(_gradient(ri, ro, r, p_c, p_amb, tangential, 1), _gradient(ri, ro, r, p_c, p_amb, radial, -1))]
+    d_ri, d_ro, d_r, d_p_c, d_p_amb = gradient
+    sigma = governing * tangential + (1.0 - governing) * radial
+
+    # The thickness is held fixed, so moving the inner radius moves the outer radius with it
+    if r_follows_ri:
+        d_ri = d_ri + d_r
+    d_t = fs * d_ro
+
+    return {
+        'ri': -fs * (d_ri + d_ro) / d_t,
+        'p_c': -fs * d_p_c / d_t,
+        'p_amb': -fs * d_p_amb / d_t,
+        'material_strength': 1.0 / d_t,
+        'fs': -sigma / d_t,
+    }
@@ -0,0 +1,229 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Minimum mass chamber walls. For a given inner radius the thinnest wall is the one the stress limit or the minimum
+# thickness allows, so the optimization reduces to one dimension in the inner radius. The derivative of the wall mass
+# along that curve comes from the analytic derivatives of Lame's equations, and every candidate material is searched
+# at once, each search step being one batched evaluation over all of them.
+
+import numpy as np
+
+from lib.pint_ext import magnitude, units_of, with_units
+from .lame import sigma_tan_gradient
+from .pressure_vessel_batch import PressureVesselBatch
+
+# Names of the constraints that can be active at an optimum
+CONSTRAINTS = ('stress', 'min_thickness', 'max_thickness', 'min_radius', 'max_radius')
+
+
+def _stack(values):
+    """A list of scalars or Quantities as one array, in the units of the first Quantity"""
+
+    units = units_of(*values)
+    return with_units(np.array([magnitude(value, units) for value in values]), units)
+
+
+class MassOptimum(object):
+    """The minimum mass walls found by minimize_wall_mass, one per candidate"""
+
+    materials = None    # material names of the candidates, when material_strength was given as a dict
+    ri = None           # inner radii
+    t = None            # wall thicknesses
+    length = None       # chamber lengths
+    mass = None         # wall masses, in kilograms when the inputs are Quantities
+    feasible = None     # False where no wall within the bounds meets the stress limit, with nan results
+    converged = None    # False where the search ran out of iterations before reaching the tolerance
+    active = None       # dict of constraint name, see CONSTRAINTS, to a boolean array of where it is active
+    evaluations = 0     # number of batched evaluations of wall thickness, mass and gradient
+
+    def __init__(self, materials, ri, t, length, mass, feasible, converged, active, evaluations):
+        self.materials = materials
+        self.ri = ri
+        self.t = t
+        self.length = length
+        self.mass = mass
+        self.feasible = feasible
+        self.converged = converged
+        self.active = active
+        self.evaluations = evaluations
+
+    def active_constraints(self, index=()):
+        """Names of the constraints active at one candidate, by its index or material name"""
+
+        if self.materials is not None and not isinstance(index, (int, tuple)):
+            index = self.materials.index(index)
+        return [name for name in CONSTRAINTS if self.active[name][index]]
+
+    @property
+    def best(self):
+        """Index of the lightest feasible candidate, or its material name when they are named, None if none are
+        feasible"""
+
+        mass = np.where(self.feasible, getattr(self.mass, 'magnitude', self.mass), np.inf)
+        if not np.any(np.isfinite(mass)):
+            return None
+        index = np.unravel_index(np.argmin(mass), mass.shape)
+        if self.materials is not None:
+            return self.materials[index[0]]
+        return index
+
+
+def minimize_wall_mass(p_c, material_strength, density, fs, ri_bounds, length=None, volume=None, t_bounds=(0.0, None),
+                       p_amb=0.0, tolerance=1e-9, max_iterations=100):
+    """
+    Finds the inner radius and wall thickness of the lightest cylindrical chamber wall for each candidate, with the
+    stress at the inner wall, including the factor of safety, at most the material strength as PressureVessel
+    requires. Every input broadcasts, so whole sets of materials, pressures and bounds are optimized together.
+
+    Along the thinnest allowed wall the mass is minimized in the inner radius by bisecting on the sign of its
+    derivative, which assumes a single minimum between the radius bounds. Candidates whose optimum is on a radius
+    bound are done after one or two evaluations. Where the mass does not change with the radius, as with a fixed
+    volume and the stress limit active, the smallest optimal radius is returned.
+    :param p_c: Chamber pressures
+    :param material_strength: Material strengths, or a dict of material name to strength that is optimized along a
+                              leading axis in name order
+    :param density: Material densities, or a dict of material name to density when material_strength is a dict
+    :param fs: Factors of safety
+    :param ri_bounds: (smallest, largest) inner radius
+    :param length: Length of the cylinder, fixed whatever the radius
+    :param volume: Internal volume of the cylinder instead, so the length is volume / (pi ri^2)
+    :param t_bounds: (smallest, largest) wall thickness, None for no largest
+    :param p_amb: Ambient pressures
+    :param tolerance: Tolerance on the inner radius, relative to the largest radius
+    :param max_iterations: Cap on the bisection steps
+    :return: A MassOptimum
+    """
+
+    if (length is None) == (volume is None):
+        raise ValueError("give either the length of the chamber or its volume")
+
+    materials = None
+    if isinstance(material_strength, dict):
+        materials = sorted(material_strength)
+        material_strength = _stack([material_strength[name] for name in materials])
+        if isinstance(density, dict):
+            density = _stack([density[name] for name in materials])
+    elif isinstance(density, dict):
+        raise ValueError("densities can only be given by material name along with the strengths")
+
+    ri_min, ri_max = ri_bounds
+    t_min, t_max = t_bounds
+    length_units = units_of(ri_min, ri_max, t_min, t_max, length)
+    stress_units = units_of(material_strength, p_c, p_amb)
+    density_units = getattr(density, 'units', None)
+    if length_units is None and hasattr(volume, 'units'):
+        raise ValueError("give the radius bounds in units to go with the volume")
+
+    p_c, p_amb = magnitude(p_c, stress_units), magnitude(p_amb, stress_units)
+    fs = np.asarray(getattr(fs, 'magnitude', fs), dtype=float)
+    ri_min, ri_max, t_min = [magnitude(value, length_units) for value in (ri_min, ri_max, t_min)]
+    t_max = np.inf if t_max is None else magnitude(t_max, length_units)
+    if volume is not None:
+        volume = magnitude(volume, None if length_units is None else length_units ** 3)
+    else:
+        length = magnitude(length, length_units)
+
+    s = magnitude(material_strength, stress_units)
+    rho = np.asarray(getattr(density, 'magnitude', density), dtype=float)
+    if materials is not None:
+        # The materials run along a leading axis, ahead of the axes of the other inputs
+        trailing = (1,) * len(np.broadcast(p_c, p_amb, fs, ri_min, ri_max, t_min, t_max,
+                                           volume if length is None else length).shape)
+        s = s.reshape(s.shape + trailing)
+        rho = rho.reshape(rho.shape + trailing)
+
+    s, rho, p_c, p_amb, fs, ri_min, ri_max, t_min, t_max = np.broadcast_arrays(
+        s, rho, p_c, p_amb, fs, ri_min, ri_max, t_min, t_max, volume if length is None else length)[:-1]
+    if np.any(ri_min <= 0) or np.any(ri_max < ri_min) or np.any(t_min < 0) or np.any(t_max < t_min):
+        raise ValueError("the bounds must be positive and in (smallest, largest) order")
+
+    def chamber_length(ri):
+        if volume is not None:
+            return volume / (np.pi * ri ** 2), -2.0 * volume / (np.pi * ri ** 3)
+        return length + 0.0 * ri, 0.0 * ri
+
+    def evaluate(ri):
+        """Thinnest allowed wall at each radius and the derivative of its mass with respect to the radius"""
+
+        batch = PressureVesselBatch(ri, p_c, p_amb, s, fs)
+        with np.errstate(invalid='ignore'):
+            batch.calculate_wall_thickness()
+            t_stress = batch.ro - ri
+            stress = t_stress >= t_min
+            t = np.where(stress, t_stress, t_min)
+            feasible = np.isfinite(t_stress) & (t <= t_max)
+            ro = ri + t
+
+            # m = rho pi (ro^2 - ri^2) L(ri), and on the stress limit fs sigma_tan(ri, ro, ri) = S fixes d ro / d ri
+            chamber, d_chamber = chamber_length(ri)
+            d_ri, d_ro, d_r = sigma_tan_gradient(ri, ro, ri, p_c, p_amb)[:3]
+            d_outer = np.where(stress, -(d_ri + d_r) / d_ro, 1.0)
+            dm_dri = rho * np.pi * (-2.0 * ri * chamber + (ro ** 2 - ri ** 2) * d_chamber)
+            dm_dro = 2.0 * rho * np.pi * ro * chamber
+            gradient = dm_dri + dm_dro * d_outer
+
+            # Changes in the mass below round off count as none
+            flat = np.abs(gradient) <= 1e-9 * (np.abs(dm_dri) + np.abs(dm_dro * d_outer))
+        return t, t_stress, feasible, np.where(flat, 0.0, gradient)
+
+    # The thinnest wall grows with the radius, so a candidate that is infeasible at its smallest radius is infeasible
+    # at all of them, and the feasible radii run up from it
+    t, _, feasible, gradient = evaluate(ri_min)
+    evaluations = 1
+    low, high = ri_min.copy(), ri_max.copy()
+    searching = feasible & (gradient < 0) & (ri_max > ri_min)
+
+    if np.any(searching):
+        _, _, feasible_high, gradient_high = evaluate(ri_max)
+        evaluations += 1
+        at_max = searching & feasible_high & (gradient_high < 0)
+        low[at_max] = ri_max[at_max]
+        searching &= ~at_max
+
+    # Bisect on the sign of the derivative, treating infeasible radii as too large, so low stays feasible and
+    # downhill of the optimum and high stays beyond it
+    xtol = tolerance * ri_max
+    iterations = 0
+    while iterations < max_iterations and np.any(searching & (high - low > xtol)):
+        middle = np.where(searching, 0.5 * (low + high), low)
+        _, _, feasible_middle, gradient_middle = evaluate(middle)
+        evaluations += 1
+        iterations += 1
+        uphill = ~feasible_middle | (gradient_middle >= 0)
+        low = np.where(searching & ~uphill, middle, low)
+        high = np.where(searching & uphill, middle, high)
+
+    converged = ~searching | (high - low <= xtol)
+    t, t_stress, _, _ = evaluate(low)
+    evaluations += 1
+
+    ri = np.where(feasible, low, np.nan)
+    t = np.where(feasible, t, np.nan)
+    chamber = np.where(feasible, chamber_length(low)[0], np.nan)
+    mass = rho * np.pi * ((ri + t) ** 2 - ri ** 2) * chamber
+
+    margin = 10.0 * xtol
+    with np.errstate(invalid='ignore'):
+        active = {
+            'stress': feasible & (t_stress >= t_min - margin),
+            'min_thickness': feasible & (t_stress <= t_min + margin),
+            'max_thickness': feasible & (t >= t_max - margin),
+            'min_radius': feasible & (ri <= ri_min),
+            'max_radius': feasible & (ri >= ri_max),
+        }
+
+    if density_units is not None and length_units is not None:
+        mass = (mass * density_units * length_units ** 3).to('kilogram')
+    return MassOptimum(materials, with_units(ri, length_units), with_units(t, length_units),
+                       with_units(chamber, length_units), mass, feasible, converged, active, evaluations)
@@ -0,0 +1,212 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from lib.pint_ext import magnitude, units_of, with_units
+from . import lame
+from .lame import sigma_tan, sigma_rad
+
+
+def _per(numerator, denominator):
+    """Units of a ratio of quantities in the given units, where None stands for plain numbers"""
+
+    if denominator is None:
+        return numerator
+    return 1.0 / denominator if numerator is None else numerator / denominator
+
+
+def max_stress(ri, ro, r, p_c, p_amb, fs):
+    """Calculates the max stress including the factor of safety, element-wise over plain float arrays"""
+
+    return np.maximum(sigma_tan(ri, ro, r, p_c, p_amb), sigma_rad(ri, ro, r, p_c, p_amb)) * fs
+
+
+class PressureVesselBatch(object):
+    """
+    Evaluates many thick walled pressure vessels at once. Every input may be a scalar, an array or an array-valued
+    pint Quantity, and they are broadcast against each other the same way NumPy arrays are.
+    """
+
+    # Broadcast inputs as float arrays, lengths in length_units and pressures in stress_units
+    ri = None                 # inner radii
+    ro = None                 # outer radii, calculated by calculate_wall_thickness
+    r = None                  # radii of interest in the stress calculations, defaults to ri
+    p_c = None                # chamber pressures
+    p_amb = None              # ambient pressures
+    material_strength = None  # target maximum allowable strengths
+    fs = None                 # factors of safety
+    t_calc = None             # calculated wall thicknesses
+    length_units = None       # units of the length inputs and outputs, None for plain numbers
+    stress_units = None       # units of the pressure inputs and outputs, None for plain numbers
+    iterations = None         # bisection passes used for the design points the closed form could not solve
+    converged = None          # per design point, whether a thickness meeting the stress limit was found
+
+    def __init__(self, ri, p_c, p_amb, material_strength, fs, r=None):
+        self.length_units = units_of(ri, r)
+        self.stress_units = units_of(material_strength, p_c, p_amb)
+
+        # Without a radius of interest the stresses are taken at the inner wall, which moves with ri
+        self._r_follows_ri = r is None
+        ri = magnitude(ri, self.length_units)
+        r = ri if r is None else magnitude(r, self.length_units)
+        p_c = magnitude(p_c, self.stress_units)
+        p_amb = magnitude(p_amb, self.stress_units)
+        material_strength = magnitude(material_strength, self.stress_units)
+        fs = np.asarray(getattr(fs, 'magnitude', fs), dtype=float)
+
+        self.ri, self.r, self.p_c, self.p_amb, self.material_strength, self.fs = \
+            np.broadcast_arrays(ri, r, p_c, p_amb, material_strength, fs)
+        self.ro = None
+
+    def __len__(self):
+        return self.ri.size
+
+    def calculate_wall_thickness(self, tolerance=None, max_iterations=100):
+        """
+        Solves for the wall thickness of every design point. Points evaluated at the inner wall with p_c > p_amb use
+        the closed form Lame inversion, and the rest are bracketed and bisected together. Points where no thickness
+        meets the stress limit come back as nan with converged set to False.
+        :param tolerance: Length tolerance on the bisected thicknesses, defaults to 1e-9 of the inner radius. A plain
+                          number is taken to be in the units of ri, a Quantity needs ri to be one too.
+        :param max_iterations: Cap on the bisection passes
+        :return: The calculated wall thicknesses, also stored in t_calc
+        """
+
+        if hasattr(tolerance, 'units') and self.length_units is None:
+            raise ValueError("give the radii in units to go with the tolerance, or the tolerance as a plain number")
+
+        ri, r, p_c, p_amb, s, fs = self.ri, self.r, self.p_c, self.p_amb, self.material_strength, self.fs
+
+        ro = np.full(ri.shape, np.nan)
+        converged = np.zeros(ri.shape, dtype=bool)
+        self.iterations = 0
+
+        # fs * sigma_tan(ri) = S solved for ro, see PressureVessel._closed_form_wall_thickness
+        denominator = s - fs * p_c + 2.0 * fs * p_amb
+        closed_form = (r == ri) & (p_c > p_amb) & (fs > 0) & (s > 0) & (denominator > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ro[closed_form] = ri[closed_form] * np.sqrt((s[closed_form] + fs[closed_form] * p_c[closed_form]) /
+                                                        denominator[closed_form])
+        converged[closed_form] = True
+
+        # Points outside the inversion fall back to a vectorized bracket and bisection
+        rest = ~closed_form & (p_c > p_amb)
+        if np.any(rest):
+            if tolerance is None:
+                xtol = 1e-9 * ri[rest]
+            else:
+                xtol = magnitude(tolerance, self.length_units) * np.ones(ri[rest].shape)
+            ro[rest], converged[rest] = self._bisect_outer_radius(ri[rest], r[rest], p_c[rest], p_amb[rest], s[rest],
+                                                                  fs[rest], xtol, max_iterations)
+
+        self.ro = ro
+        self.t_calc = with_units(ro - ri, self.length_units)
+        self.converged = converged
+
+        return self.t_calc
+
+    def _bisect_outer_radius(self, ri, r, p_c, p_amb, s, fs, xtol, max_iterations):
+        """
+        Brackets and bisects the outer radius of each point
+        :return: The outer radii, nan where the limit is never reached, and whether each met the tolerance
+        """
+
+        def excess_stress(t):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return max_stress(ri, ri + t, r, p_c, p_amb, fs) - s
+
+        # Grow the thick side of the bracket until every point is below the stress limit
+        t_hi = ri.copy()
+        f_hi = excess_stress(t_hi)
+        for _ in range(64):
+            growing = f_hi > 0
+            if not np.any(growing):
+                break
+            t_hi[growing] *= 2.0
+            f_hi[growing] = excess_stress(t_hi)[growing]
+
+        # Shrink the thin side until every point is above it, giving up once the wall is thinner than the tolerance
+        t_lo = t_hi / 2.0
+        f_lo = excess_stress(t_lo)
+        while True:
+            shrinking = (f_lo <= 0) & (t_lo > xtol)
+            if not np.any(shrinking):
+                break
+            t_hi[shrinking] = t_lo[shrinking]
+            f_hi[shrinking] = f_lo[shrinking]
+            t_lo[shrinking] /= 2.0
+            f_lo[shrinking] = excess_stress(t_lo)[shrinking]
+
+        bracketed = (f_lo > 0) & (f_hi <= 0)
+
+        while self.iterations < max_iterations and np.any(bracketed & (t_hi - t_lo > xtol)):
+            t_mid = 0.5 * (t_lo + t_hi)
+            too_thin = excess_stress(t_mid) > 0
+            t_lo = np.where(too_thin, t_mid, t_lo)
+            t_hi = np.where(too_thin, t_hi, t_mid)
+            self.iterations += 1
+
+        # Report the thick side of each bracket so the walls are never under-sized
+        return np.where(bracketed, ri + t_hi, np.nan), bracketed & (t_hi - t_lo <= xtol)
+
+    def wall_thickness_sensitivities(self, tolerance=None, max_iterations=100):
+        """
+        Solves for the wall thickness of every design point along with its partial derivatives with respect to the
+        inputs, see lame.wall_thickness_sensitivities. The derivatives are nan where no thickness was found. When the
+        batch was made without r the stresses are at the inner wall and the radius of interest moves with ri, and when
+        r was given it stays fixed as ri changes, even where it equals ri.
+        :return: (thicknesses, dict of the derivatives of the thicknesses with respect to each of 'ri', 'p_c', 'p_amb',
+                 'material_strength' and 'fs', shaped as the thicknesses)
+        """
+
+        t = self.calculate_wall_thickness(tolerance, max_iterations)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            derivatives = lame.wall_thickness_sensitivities(self.ri, self.ro, self.r, self.p_c, self.p_amb, self.fs,
+                                                            self._r_follows_ri)
+        per_stress = _per(self.length_units, self.stress_units)
+        derivative_units = {'ri': None, 'p_c': per_stress, 'p_amb': per_stress, 'material_strength': per_stress,
+                            'fs': self.length_units}
+
+        return t, dict((name, with_units(value, derivative_units[name])) for name, value in derivatives.items())
+
+    def sigma_tan(self):
+        """Calculate the tangential stress in each thick walled cylinder"""
+
+        return with_units(sigma_tan(self.ri, self.ro, self.r, self.p_c, self.p_amb), self.stress_units)
+
+    def sigma_rad(self):
+        """Calculate the radial stress in each thick walled cylinder"""
+
+        return with_units(sigma_rad(self.ri, self.ro, self.r, self.p_c, self.p_amb), self.stress_units)
+
+    def max_stress(self):
+        """Calculates the max stress including the factor of safety in each thick walled cylinder"""
+
+        return with_units(max_stress(self.ri, self.ro, self.r, self.p_c, self.p_amb, self.fs), self.stress_units)
+
+    def stress_field(self, n_radii=11, radii=None, closed_ends=True):
+        """
+        The stress distribution through each wall, see StressField
+        :raises: ValueError before the wall thicknesses have been calculated
+        """
+
+        from .stress_field import StressField
+
+        if self.ro is None:
+            raise ValueError("calculate the wall thicknesses before the stress field")
+        return StressField(with_units(self.ri, self.length_units), with_units(self.ro, self.length_units),
+                           with_units(self.p_c, self.stress_units), with_units(self.p_amb, self.stress_units),
+                           n_radii, radii, closed_ends)
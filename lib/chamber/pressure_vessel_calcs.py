@@ -14,6 +14,30 @@
 
 import math
 
+from lib.pint_ext import PintExtUnitRegistry, pack, unpack
+from lib.util import brentq
+from lib.util.instrumentation import phase
+from . import lame
+
+units = PintExtUnitRegistry()
+
+# Lame's equations checked for dimensions once, then evaluated on base SI floats with units re-attached
+_sigma_tan = units.kernel('=p_c', 'meter', 'meter', 'meter', 'pascal', 'pascal')(lame.sigma_tan)
+_sigma_rad = units.kernel('=p_c', 'meter', 'meter', 'meter', 'pascal', 'pascal')(lame.sigma_rad)
+
+
+@units.kernel('=p_c', 'meter', 'meter', 'meter', 'pascal', 'pascal', None)
+def _max_stress(ri, ro, r, p_c, p_amb, fs):
+    return max(lame.sigma_tan(ri, ro, r, p_c, p_amb), lame.sigma_rad(ri, ro, r, p_c, p_amb)) * fs
+
+
+# Methods replaced on the instance by PressureVessel.instrument, with the stress evaluations each call makes
+_INSTRUMENTED = {'max_stress': ('max_stress', 'sigma_tan', 'sigma_rad'), 'sigma_tan': ('sigma_tan',),
+                 'sigma_rad': ('sigma_rad',)}
+
+# Instance attributes set by PressureVessel.instrument, which stay in the process that set them
+_INSTRUMENT_ATTRIBUTES = set(_INSTRUMENTED) | set(['calculate_wall_thickness', 'instrumentation'])
+
 
 class PressureVessel(object):
     # Variables used to calculate wall thickness
@@ -26,6 +50,11 @@ class PressureVessel(object):
     material_strength = None  # target maximum allowable strength (for example yield or ultimate), needs value assigned
     fs = None                 # factor of safety
     step_size = None
+    method = None             # solver that produced t_calc in the last solve
+    iterations = None         # thickness steps (step) or max_stress() evaluations (bracket) used by the last solve
+    residual = None           # max_stress() minus the stress limit at the solved thickness
+    converged = None          # whether the last solve met its tolerance
+    instrumentation = None    # Instrumentation collecting counts and timings, see instrument()
 
     def __init__(self, ri, t_guess, p_c, p_amb, material_strength, fs, step_size):
         self.ri = ri
@@ -43,15 +72,168 @@ class PressureVessel(object):
         if self.step_size is None or self.step_size == 0:
             raise ValueError("step size must be non-zero")
 
-    def calculate_wall_thickness(self):
-        """Solves for the desired wall thickness based on the inputs given"""
+    def __getstate__(self):
+        # Quantities travel as (magnitude, unit string) so that vessels pickle cheaply for process pools and land in
+        # the receiving process's unit registry
+        return dict((name, pack(value)) for name, value in self.__dict__.items() if name not in _INSTRUMENT_ATTRIBUTES)
+
+    def __setstate__(self, state):
+        self.__dict__.update((name, unpack(value)) for name, value in state.items())
+
+    def instrument(self, instrumentation, label=None):
+        """
+        Turns instrumentation on for this vessel, so that stress evaluations are counted, each solve is timed and
+        recorded, and solver phases are timed. The class methods are wrapped on this instance only, so vessels that
+        are not instrumented run exactly the same code as before.
+        :param instrumentation: An Instrumentation to collect into, or None to turn instrumentation off again
+        :param label: Optional label for this vessel's solves in the report
+        :return: The vessel
+        """
+
+        for name in _INSTRUMENT_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+
+        if instrumentation is None:
+            return self
+
+        self.instrumentation = instrumentation
+        for name, evaluations in _INSTRUMENTED.items():
+            setattr(self, name, self._counted(getattr(type(self), name), evaluations, name == 'max_stress'))
+
+        solve = type(self).calculate_wall_thickness
+
+        def calculate_wall_thickness(*args, **kwargs):
+            if instrumentation._solve is not None:
+                # Already inside a recorded solve, as when a SolutionCache calls back to solve a miss
+                return solve(self, *args, **kwargs)
+
+            with instrumentation.solve(label) as record:
+                t = solve(self, *args, **kwargs)
+                record.update(method=self.method, iterations=self.iterations, converged=self.converged,
+                              t=t.to_base_units().magnitude)
+            return t
+
+        self.calculate_wall_thickness = calculate_wall_thickness
+        return self
+
+    def _counted(self, method, evaluations, traced):
+        instrumentation = self.instrumentation
+
+        def counted():
+            for name in evaluations:
+                instrumentation.count(name)
+            stress = method(self)
+            if traced:
+                instrumentation.evaluation(self.t_calc.to_base_units().magnitude, stress.to_base_units().magnitude)
+            return stress
+        return counted
+
+    def calculate_wall_thickness(self, method='step', tolerance=None, max_iterations=100, cache=None):
+        """
+        Solves for the desired wall thickness based on the inputs given
+        :param method: 'step' walks the thickness one step_size at a time from t_guess (the reference solver),
+                       'bracket' brackets the thickness where max_stress() equals the stress limit and refines it
+                       with Brent's method, 'closed_form' inverts the Lame equations directly and falls back to
+                       'bracket' for configurations the inversion does not cover
+        :param tolerance: Length tolerance on the thickness for the 'bracket' method, defaults to step_size / 1000
+        :param max_iterations: Cap on the max_stress() evaluations spent by the 'bracket' method
+        :param cache: Optional SolutionCache to reuse earlier solutions with the same inputs and settings
+        :return: The calculated wall thickness, also stored in t_calc along with method, iterations, residual and
+                 converged
+        """
+
+        if cache is not None:
+            return cache.solve(self, method, tolerance, max_iterations)
 
         stress_limit = self.material_strength  # TODO: Are these terms really interchangeable like this?
 
+        if method == 'closed_form':
+            with phase(self.instrumentation, 'closed_form'):
+                t = self._closed_form_wall_thickness(stress_limit)
+            if t is not None:
+                return t
+            method = 'bracket'
+
+        if method == 'step':
+            with phase(self.instrumentation, 'step'):
+                t = self._step_wall_thickness(stress_limit)
+        elif method == 'bracket':
+            t = self._bracket_wall_thickness(stress_limit, tolerance, max_iterations)
+        else:
+            raise ValueError("unknown wall thickness solver method '{0}'".format(method))
+
+        self.method = method
+        return t
+
+    def wall_thickness_sensitivities(self, method='closed_form', tolerance=None, max_iterations=100):
+        """
+        Solves for the wall thickness along with its partial derivatives with respect to the inputs, which are exact
+        derivatives of the exact solution taken from the Lame equations at the solved thickness, see
+        lame.wall_thickness_sensitivities. The 'step' method leaves the thickness up to step_size away from the
+        exact solution, and the derivatives are taken there. While r equals ri the stresses are taken at the inner
+        wall, which moves with ri; any other r is held fixed as ri changes.
+        :param method: Solver method, as for calculate_wall_thickness
+        :return: (thickness, dict of the derivative of the thickness with respect to each of 'ri', 'p_c', 'p_amb',
+                 'material_strength' and 'fs' as Quantities)
+        """
+
+        t = self.calculate_wall_thickness(method, tolerance, max_iterations)
+
+        t_units = t.units
+        stress_units = self.material_strength.units
+        ri, ro, r = [value.to(t_units).magnitude for value in (self.ri, self.ro, self.r)]
+        p_c, p_amb = [value.to(stress_units).magnitude for value in (self.p_c, self.p_amb)]
+        fs = getattr(self.fs, 'magnitude', self.fs)
+
+        derivatives = lame.wall_thickness_sensitivities(ri, ro, r, p_c, p_amb, fs, self.r == self.ri)
+        derivative_units = {'ri': t_units / t_units, 'p_c': t_units / stress_units,
+                            'p_amb': t_units / stress_units, 'material_strength': t_units / stress_units,
+                            'fs': t_units}
+
+        return t, dict((name, value * derivative_units[name]) for name, value in derivatives.items())
+
+    def _closed_form_wall_thickness(self, stress_limit):
+        """
+        Inverts the Lame equations for the outer radius when the stress is evaluated at the inner wall
+        :return: The wall thickness, or None if the inversion does not apply and an iterative solver is needed
+        """
+
+        # At r = ri the radial stress is -p_c, and the tangential stress dominates whenever p_c > p_amb, so
+        # fs * sigma_tan = S can be solved directly: ro^2 = ri^2 (S + fs p_c) / (S - fs p_c + 2 fs p_amb)
+        if self.r is not self.ri and self.r != self.ri:
+            return None
+
+        stress_units = stress_limit.units
+        s = stress_limit.magnitude
+        p_c = self.p_c.to(stress_units).magnitude
+        p_amb = self.p_amb.to(stress_units).magnitude
+        fs = self.fs
+
+        if p_c <= p_amb or fs <= 0 or s <= 0:
+            return None
+
+        denominator = s - fs * p_c + 2.0 * fs * p_amb
+        if denominator <= 0:
+            # No finite wall meets the limit, leave it to the iterative solver to report
+            return None
+
+        self.ro = self.ri * math.sqrt((s + fs * p_c) / denominator)
+        self.t_calc = (self.ro - self.ri).to(self.t_guess.units)
+        self.method = 'closed_form'
+        self.iterations = 0
+        self.residual = self.max_stress() - stress_limit
+        self.converged = True
+
+        return self.t_calc
+
+    def _step_wall_thickness(self, stress_limit):
+        """Walks the wall thickness one step_size at a time until the stress limit is crossed"""
+
         # TODO: Do we want to modify copies of ro and t to keep the originals for reference?
         # TODO: The advantange of modifying the class variables is that you end up with a PressureVessel object with
         # TODO: optimized ro and t values that you can access directly, such as pv.ro and pv.t
-        # TODO: Replace this solver process with something like a binary search
+        self.iterations = 0
+
         if self.max_stress() < stress_limit:
             #  Our vessel can handle more stress, so gradually decrease the thickness
             while self.max_stress() < stress_limit:
@@ -59,8 +241,10 @@ class PressureVessel(object):
 
                 # The new thickness changes our outside radius
                 self.ro = self.ri + self.t_calc
+                self.iterations += 1
 
             self.t_calc += self.step_size  # the while look exits after one too many steps, add one back
+            self.ro = self.ri + self.t_calc
 
         else:
             # Our vessel can't handle the stress, gradually increase the thickness
@@ -69,22 +253,112 @@ class PressureVessel(object):
 
                 # The new thickness changes our outside radius
                 self.ro = self.ri + self.t_calc
+                self.iterations += 1
+
+        self.residual = self.max_stress() - stress_limit
+        self.converged = True
+
+        return self.t_calc
+
+    def _bracket_wall_thickness(self, stress_limit, tolerance, max_iterations):
+        """Brackets the wall thickness where max_stress() equals the stress limit and refines it with Brent's method"""
+
+        t_units = self.t_guess.units
+        stress_units = stress_limit.units
+
+        if tolerance is None:
+            tolerance = self.step_size / 1000.0
+        xtol = tolerance.to(t_units).magnitude
+
+        if xtol <= 0:
+            raise ValueError("tolerance must be positive")
+
+        self.iterations = 0
+
+        def excess_stress(t):
+            """The stress above the limit at thickness t, negative when the wall is thick enough"""
+            self.iterations += 1
+            self.t_calc = t * t_units
+            self.ro = self.ri + self.t_calc
+            return (self.max_stress() - stress_limit).to(stress_units).magnitude
+
+        t_lo = t_hi = self.t_guess.magnitude
+        if t_lo <= 0:
+            raise ValueError("t_guess must be positive to bracket the wall thickness")
+
+        # Stress falls as the wall thickens, so grow or shrink geometrically from the guess until the limit is straddled
+        with phase(self.instrumentation, 'bracket'):
+            f_lo = f_hi = excess_stress(t_lo)
+            if f_lo > 0:
+                while f_hi > 0:
+                    if self.iterations >= max_iterations:
+                        raise ValueError("could not bracket the wall thickness within {0} iterations".format(
+                            max_iterations))
+                    t_lo, f_lo = t_hi, f_hi
+                    t_hi *= 2.0
+                    f_hi = excess_stress(t_hi)
+            else:
+                while f_lo <= 0:
+                    if self.iterations >= max_iterations:
+                        raise ValueError("could not bracket the wall thickness within {0} iterations".format(
+                            max_iterations))
+                    if t_lo <= xtol:
+                        raise ValueError("the stress limit is not reached at any wall thickness")
+                    t_hi, f_hi = t_lo, f_lo
+                    t_lo /= 2.0
+                    f_lo = excess_stress(t_lo)
+
+        with phase(self.instrumentation, 'refine'):
+            result = brentq(excess_stress, t_lo, t_hi, xtol, max_iterations - self.iterations, fa=f_lo, fb=f_hi)
+
+        # Report the side of the final bracket that satisfies the stress limit so the wall is never under-sized
+        t, f = result.bracket[1] if result.f_root > 0 else result.bracket[0]
+
+        self.t_calc = t * t_units
+        self.ro = self.ri + self.t_calc
+        self.residual = f * stress_units
+        self.converged = result.converged
 
         return self.t_calc
 
     def sigma_tan(self):
         """Calculate the tangential stress in thick walled cylinder"""
 
-        return (self.p_c * self.ri**2 - self.p_amb * self.ro**2 - self.ri**2 * self.ro**2 *
-               (self.p_amb - self.p_c) / self.r**2) / (self.ro**2 - self.ri**2)
+        return _sigma_tan(self.ri, self.ro, self.r, self.p_c, self.p_amb)
 
     def sigma_rad(self):
         """Calculate the radial stress in thick walled cylinder"""
 
-        return (self.p_c * self.ri**2 - self.p_amb * self.ro**2 + self.ri**2 * self.ro**2 *
-               (self.p_amb - self.p_c) / self.r**2) / (self.ro**2 - self.ri**2)
+        return _sigma_rad(self.ri, self.ro, self.r, self.p_c, self.p_amb)
 
     def max_stress(self):
         """Calculates the max stress including the factor of safety """
 
-        return max(self.sigma_tan(), self.sigma_rad()) * self.fs
+        return _max_stress(self.ri, self.ro, self.r, self.p_c, self.p_amb, self.fs)
+
+    def stress_field(self, n_radii=11, radii=None, closed_ends=True):
+        """
+        The stress distribution through the wall at the current thickness, without the factor of safety, see
+        StressField
+        """
+
+        # Imported here as it needs NumPy, which importing lib.chamber avoids
+        from .stress_field import StressField
+
+        return StressField(self.ri, self.ro, self.p_c, self.p_amb, n_radii, radii, closed_ends)
+
+    def reliability(self, material_strength=None, p_c=None, ri=None, t=None, **options):
+        """
+        Estimates the probability that the wall fails by Monte Carlo sampling, see estimate_reliability. Each of the
+        variables may be given as a distribution from lib.chamber.reliability, and the rest take the vessel's values,
+        with the current thickness t_calc as the manufactured thickness. No factor of safety is applied.
+        :param options: Keyword arguments passed on to estimate_reliability, such as n_samples and seed
+        :return: A ReliabilityResult
+        """
+
+        # Imported here as it needs NumPy, which importing lib.chamber avoids
+        from .reliability import estimate_reliability
+
+        return estimate_reliability(self.material_strength if material_strength is None else material_strength,
+                                    self.p_c if p_c is None else p_c, self.ri if ri is None else ri,
+                                    self.t_calc if t is None else t, self.p_amb, **options)
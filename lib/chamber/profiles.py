@@ -0,0 +1,80 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from lib.pint_ext import magnitude, units_of, with_units
+
+# Number of points in a chamber outline
+N_POINTS = 6
+
+
+def outline_points(t, theta, total_length, converg_fraction):
+    """
+    Calculates the chamber outline, element-wise over plain floats or arrays
+    :param t: Wall thickness
+    :param theta: Taper angle of the converging section in radians
+    :param total_length: Full length of the chamber exterior, in the same units as t
+    :param converg_fraction: Fraction of the length taken up by the converging section
+    :return: Array of shape broadcast(inputs) + (6, 2) holding the (x, y) outline points in order: the start of the
+             taper on the axis, the outer and inner ends of the chamber, the inner corner of the taper, and the start
+             and end of the inside wall
+    """
+
+    t, theta, total_length, converg_fraction = np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in
+                                                                    (t, theta, total_length, converg_fraction)])
+
+    converg_sect_length = total_length * converg_fraction  # Converging section length
+
+    # Where our taper starts at the business end of the chamber
+    theta_start = total_length - converg_sect_length
+
+    tan_theta = np.tan(theta)
+    theta_end_point = converg_sect_length * tan_theta
+
+    # Set up some of our re-usable dimensions
+    dtheta = theta_start + converg_sect_length
+
+    pointX = dtheta - np.cos(theta) * tan_theta * t
+    pointY = theta_end_point - np.sin(theta) * tan_theta * t
+    pointY2 = theta_end_point - t / np.cos(theta)
+    diffX = pointX - theta_start
+    diffY = pointY
+
+    zero = np.zeros_like(t)
+    x = np.stack([theta_start, dtheta, dtheta, dtheta - diffX, theta_start, zero], axis=-1)
+    y = np.stack([zero, theta_end_point, pointY2, pointY2 - diffY, -t, -t], axis=-1)
+
+    return np.stack([x, y], axis=-1)
+
+
+def chamber_profile(t, theta, total_length, converg_fraction=0.35):
+    """
+    Calculates chamber outlines for one or many designs at once, without needing a CAD kernel. Every input may be a
+    scalar, an array or an array-valued Quantity, and they are broadcast against each other.
+    :param t: Wall thickness, such as PressureVessel.t_calc or PressureVesselBatch.t_calc
+    :param theta: Taper angle, a Quantity in any angle units or plain radians
+    :param total_length: Full length of the chamber exterior, plain numbers are taken to be in the units of t
+    :param converg_fraction: Fraction of the length taken up by the converging section
+    :return: The (x, y) outline points as from outline_points, in the length units of the inputs
+    """
+
+    length_units = units_of(total_length, t)
+    if hasattr(theta, 'units'):
+        theta = theta.to('radian').magnitude
+
+    points = outline_points(magnitude(t, length_units), theta, magnitude(total_length, length_units),
+                            getattr(converg_fraction, 'magnitude', converg_fraction))
+
+    return with_units(points, length_units)
@@ -0,0 +1,324 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Monte Carlo reliability of chamber walls. The material strength, chamber pressure, inner radius and manufactured
+# wall thickness are sampled from distributions, and a wall fails where the larger of the tangential and radial
+# stresses at the inner wall exceeds the sampled strength. Samples are drawn and evaluated a fixed-size chunk at a
+# time, so memory does not grow with the sample count, and chunks can be spread over a process pool. Every variable
+# is sampled as a transform of a standard normal, which lets importance sampling shift the sampling towards the most
+# probable failure point.
+
+import math
+import multiprocessing
+
+import numpy as np
+
+from lib.pint_ext import magnitude, units_of, with_units
+from lib.util.pool import ordered_results
+from .lame import sigma_tan, sigma_tan_gradient
+
+# Order of the sampled variables
+VARIABLES = ('material_strength', 'p_c', 'ri', 't')
+
+# Bins of the margin histogram that the percentiles are read from
+_BINS = 8192
+
+
+class Normal(object):
+    """A normally distributed variable"""
+
+    def __init__(self, mean, std):
+        """
+        :param mean: The mean, a plain number or a Quantity
+        :param std: The standard deviation, in the same units as the mean
+        """
+
+        if std < 0 * std:
+            raise ValueError("the standard deviation must not be negative")
+        self.mean = mean
+        self.std = std
+
+    @property
+    def units(self):
+        return units_of(self.mean, self.std)
+
+    def in_units(self, units):
+        """The distribution with its parameters as plain numbers in the given units"""
+
+        return Normal(float(magnitude(self.mean, units)), float(magnitude(self.std, units)))
+
+    def transform(self, u):
+        """Values of the variable from standard normal samples, and their derivative with respect to u"""
+
+        return self.mean + self.std * u, self.std + 0.0 * u
+
+
+class LogNormal(object):
+    """A variable whose logarithm is normally distributed, which keeps it positive"""
+
+    def __init__(self, median, sigma):
+        """
+        :param median: The median, a plain number or a Quantity
+        :param sigma: The standard deviation of the natural logarithm of the variable, about its coefficient of
+                      variation when that is small
+        """
+
+        if sigma < 0:
+            raise ValueError("sigma must not be negative")
+        if median <= 0 * median:
+            raise ValueError("the median must be positive")
+        self.median = median
+        self.sigma = sigma
+
+    @property
+    def units(self):
+        return units_of(self.median)
+
+    def in_units(self, units):
+        return LogNormal(float(magnitude(self.median, units)), float(self.sigma))
+
+    def transform(self, u):
+        value = self.median * np.exp(self.sigma * u)
+        return value, self.sigma * value
+
+
+class _Fixed(object):
+    """A variable that is not sampled"""
+
+    def __init__(self, value):
+        self.value = value
+
+    @property
+    def units(self):
+        return units_of(self.value)
+
+    def in_units(self, units):
+        return _Fixed(float(magnitude(self.value, units)))
+
+    def transform(self, u):
+        return self.value + 0.0 * u, 0.0 * u
+
+
+def _first_units(*units):
+    """The first of the units that is not None"""
+
+    for value in units:
+        if value is not None:
+            return value
+    return None
+
+
+def _variable(value):
+    return value if hasattr(value, 'transform') else _Fixed(value)
+
+
+class ReliabilityResult(object):
+    """The outcome of estimate_reliability"""
+
+    n_samples = 0          # number of samples evaluated
+    failures = 0           # number of samples that failed
+    probability = None     # estimated probability of failure
+    standard_error = None  # standard error of the estimate
+    percentiles = None     # dict of percentile to the margin, strength minus stress, at it
+    design_point = None    # dict of variable name to its value at the most probable failure point, when found
+    beta = None            # distance to the design point in standard normal space, the reliability index
+    entropy = None         # seed of the random streams, which repeats the run when passed as the seed
+
+    def __init__(self, n_samples, failures, probability, standard_error, percentiles, design_point, beta, entropy):
+        self.n_samples = n_samples
+        self.failures = failures
+        self.probability = probability
+        self.standard_error = standard_error
+        self.percentiles = percentiles
+        self.design_point = design_point
+        self.beta = beta
+        self.entropy = entropy
+
+    @property
+    def coefficient_of_variation(self):
+        """Standard error relative to the probability of failure, inf when no failures were seen"""
+
+        return self.standard_error / self.probability if self.probability > 0 else float('inf')
+
+
+def _stress(ri, t, p_c, p_amb):
+    """Larger of the tangential and radial stresses at the inner wall, where the radial stress is -p_c"""
+
+    return np.maximum(sigma_tan(ri, ri + t, ri, p_c, p_amb), -p_c)
+
+
+def _sample(index, size, entropy, variables, shift, p_amb):
+    """
+    Draws and evaluates one chunk of samples, from its own random stream so that the results do not depend on which
+    process evaluates it or in what order
+    :return: The margins, strength minus stress, and the importance sampling weights
+    """
+
+    random = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+    u = random.standard_normal((len(variables), size))
+    weight = np.ones(size)
+    if shift is not None:
+        # The sampling density is the standard normal moved to the shift, so each sample is weighted by the ratio of
+        # the two densities, exp(-shift . u + |shift|^2 / 2)
+        u += shift[:, np.newaxis]
+        weight = np.exp(0.5 * np.dot(shift, shift) - np.dot(shift, u))
+
+    strength, p_c, ri, t = [variable.transform(row)[0] for variable, row in zip(variables, u)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        margin = strength - _stress(ri, t, p_c, p_amb)
+
+    # A sampled wall with no thickness, or no inside, has failed whatever the stress
+    margin[~((ri > 0) & (t > 0)) | np.isnan(margin)] = -np.inf
+    return margin, weight
+
+
+def _summarize(margin, weight, edges):
+    """Sums a chunk's results: sample count, failures, weighted failures and their squares, and the histogram"""
+
+    failed = margin < 0
+    weighted = weight * failed
+    histogram = np.histogram(np.clip(margin, edges[0], edges[-1]), edges, weights=weight)[0]
+    return np.concatenate([[len(margin), np.count_nonzero(failed), np.sum(weighted), np.dot(weighted, weighted),
+                            np.sum(weight)], histogram])
+
+
+def _evaluate_chunk(task):
+    """Process pool entry point, kept at module level so that it can be pickled"""
+
+    index, size, entropy, variables, shift, p_amb, edges = task
+    return _summarize(*(_sample(index, size, entropy, variables, shift, p_amb) + (edges,)))
+
+
+def _design_point(variables, p_amb, max_iterations=100, tolerance=1e-8):
+    """
+    The most probable failure point in standard normal space, by the Hasofer-Lind-Rackwitz-Fiessler iteration on the
+    margin using the analytic derivatives of the Lame stress
+    :return: The point, or None if the iteration does not settle
+    """
+
+    u = np.zeros(len(variables))
+    for _ in range(max_iterations):
+        (strength, d_strength), (p_c, d_p_c), (ri, d_ri), (t, d_t) = [variable.transform(value) for variable, value in
+                                                                     zip(variables, u)]
+        d_sigma_ri, d_sigma_ro, d_sigma_r, d_sigma_p_c, _ = sigma_tan_gradient(ri, ri + t, ri, p_c, p_amb)
+        margin = strength - sigma_tan(ri, ri + t, ri, p_c, p_amb)
+        gradient = np.array([d_strength, -d_sigma_p_c * d_p_c, -(d_sigma_ri + d_sigma_ro + d_sigma_r) * d_ri,
+                             -d_sigma_ro * d_t])
+
+        length2 = np.dot(gradient, gradient)
+        if not np.isfinite(margin) or not length2 > 0:
+            return None
+        step = (np.dot(gradient, u) - margin) / length2 * gradient
+        if np.sqrt(np.dot(step - u, step - u)) <= tolerance * max(1.0, np.sqrt(np.dot(step, step))):
+            return step
+        u = step
+    return None
+
+
+def estimate_reliability(material_strength, p_c, ri, t, p_amb=0.0, n_samples=10 ** 6, chunk_size=1 << 18,
+                         processes=0, seed=None, importance_sampling=False, percentiles=(0.1, 1, 5, 50, 95, 99, 99.9)):
+    """
+    Estimates the probability that a chamber wall fails, and percentiles of its margin, by Monte Carlo sampling.
+    Each variable may be a Normal or LogNormal distribution, or a plain number or Quantity that is not sampled. No
+    factor of safety is applied, the samples are the actual strengths and loads.
+    :param material_strength: Material strength
+    :param p_c: Chamber pressure
+    :param ri: Inner radius
+    :param t: Manufactured wall thickness
+    :param p_amb: Ambient pressure, not sampled
+    :param n_samples: Number of samples
+    :param chunk_size: Samples drawn and evaluated at a time, which bounds the memory used
+    :param processes: Number of worker processes, None for one per CPU, 0 or 1 to run in this process
+    :param seed: Seed for the random streams. Runs with the same seed and chunk_size give the same results whatever
+                 the number of processes, and None seeds from the operating system.
+    :param importance_sampling: True to sample around the most probable failure point, found from the derivatives of
+                                the stress, and weight the samples back to the true distributions. This estimates very
+                                small probabilities of failure with far fewer samples, but the percentiles far from
+                                the failure region become much less accurate.
+    :param percentiles: Percentiles of the margin to estimate, read from a histogram so to within a small fraction of
+                        its spread
+    :return: A ReliabilityResult, with margins in the units of the strength
+    """
+
+    if n_samples < 1:
+        raise ValueError("at least one sample is needed")
+    if chunk_size < 1:
+        raise ValueError("chunk size must be at least 1")
+
+    variables = [_variable(value) for value in (material_strength, p_c, ri, t)]
+    stress_units = _first_units(variables[0].units, variables[1].units, getattr(p_amb, 'units', None))
+    length_units = _first_units(variables[2].units, variables[3].units)
+    variables = [variable.in_units(units) for variable, units in
+                 zip(variables, (stress_units, stress_units, length_units, length_units))]
+    p_amb = float(magnitude(p_amb, stress_units))
+
+    shift = design_point = beta = None
+    u_star = _design_point(variables, p_amb)
+    if u_star is not None:
+        beta = float(np.sqrt(np.dot(u_star, u_star)))
+        design_point = dict((name, with_units(float(variable.transform(value)[0]), units)) for name, variable, value,
+                            units in zip(VARIABLES, variables, u_star,
+                                         (stress_units, stress_units, length_units, length_units)))
+    if importance_sampling:
+        if u_star is None:
+            raise ValueError("no failure point was found to sample around")
+        shift = u_star
+
+    entropy = np.random.SeedSequence(seed).entropy
+    n_chunks = (n_samples + chunk_size - 1) // chunk_size
+    sizes = [min(chunk_size, n_samples - index * chunk_size) for index in range(n_chunks)]
+
+    # The first chunk sets the range of the margin histogram, wide enough that the rest are very unlikely to fall
+    # outside it
+    margin, weight = _sample(0, sizes[0], entropy, variables, shift, p_amb)
+    finite = margin[np.isfinite(margin)]
+    low, high = (finite.min(), finite.max()) if len(finite) else (-1.0, 1.0)
+    span = max(high - low, 1e-12 * max(abs(low), abs(high), 1.0))
+    edges = np.linspace(low - span, high + span, _BINS + 1)
+    totals = _summarize(margin, weight, edges)
+    del margin, weight
+
+    tasks = ((index, sizes[index], entropy, variables, shift, p_amb, edges) for index in range(1, n_chunks))
+    pool = None
+    if processes is None or processes > 1:
+        processes = processes or multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(processes)
+        results = ordered_results(pool, _evaluate_chunk, tasks, 2 * processes)
+    else:
+        results = (_evaluate_chunk(task) for task in tasks)
+
+    try:
+        for summary in results:
+            totals += summary
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    count, failures, weighted, weighted2, weight_sum = totals[:5]
+    histogram = totals[5:]
+    probability = weighted / count
+    variance = max(weighted2 / count - probability ** 2, 0.0) / count
+
+    # Percentiles by linear interpolation in the cumulative weighted histogram, whose end bins also hold the samples
+    # beyond the range, so percentiles that land there are not known
+    cumulative = np.concatenate([[0.0], np.cumsum(histogram)]) / weight_sum
+    margins = {}
+    for q in percentiles:
+        value = np.interp(q / 100.0, cumulative, edges)
+        outside = value <= edges[1] or value >= edges[-2]
+        margins[q] = with_units(float('nan') if outside else float(value), stress_units)
+
+    return ReliabilityResult(int(count), int(failures), float(probability), math.sqrt(variance), margins,
+                             design_point, beta, entropy)
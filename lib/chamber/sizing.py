@@ -0,0 +1,170 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Thruster sizing as a Pipeline: chamber pressure and thrust give the throat, the throat and expansion ratio give the
+# nozzle contour, and the chamber pressure, material and factor of safety give the wall thickness, outline, mass and
+# CAD geometry. Changing a parameter only reruns the stages that depend on it.
+
+import numpy as np
+
+from lib.nozzle import bell_contour, mach_from_area_ratio, pressure_ratio
+from lib.pint_ext import PintExtUnitRegistry
+from lib.util import Pipeline
+from .pressure_vessel_calcs import PressureVessel
+from .profiles import chamber_profile
+
+units = PintExtUnitRegistry()
+
+# Parameters with defaults, matching HelloWorldChamber where it hard codes them. thrust, p_c, p_amb,
+# expansion_ratio, ri, material_strength, fs and density have to be given.
+DEFAULTS = {
+    'gamma': 1.2,                        # ratio of specific heats of the exhaust
+    'fractional_length': 0.8,            # bell length as a fraction of a 15 degree cone
+    't_guess': 0.1 * units.inch,
+    'step_size': 0.001 * units.inch,
+    'taper_angle': 45 * units.degree,
+    'total_length': 7.0 * units.inch,
+    'converg_fraction': 0.35,
+    'geometry_cache': None,              # optional GeometryCache for the CAD stage
+}
+
+
+def thrust_coefficient(expansion_ratio, gamma, exit_pressure_ratio, ambient_pressure_ratio):
+    """
+    The ideal thrust coefficient of a nozzle, thrust / (p_c A_t)
+    :param exit_pressure_ratio: Exit over chamber pressure
+    :param ambient_pressure_ratio: Ambient over chamber pressure
+    """
+
+    momentum = np.sqrt(2.0 * gamma ** 2 / (gamma - 1.0) * (2.0 / (gamma + 1.0)) ** ((gamma + 1.0) / (gamma - 1.0)) *
+                       (1.0 - exit_pressure_ratio ** ((gamma - 1.0) / gamma)))
+    return momentum + (exit_pressure_ratio - ambient_pressure_ratio) * expansion_ratio
+
+
+def _section_area(x0, y0, x1, y1, x):
+    """
+    Area of the cross section at x of the solid swept by a closed polygon, given by its edges from (x0, y0) to
+    (x1, y1) with y measured from the axis, where x is not the x of a vertex
+    """
+
+    crossing = (np.minimum(x0, x1) < x) & (x < np.maximum(x0, x1))
+    y = np.sort(y0[crossing] + (x - x0[crossing]) * (y1 - y0)[crossing] / (x1 - x0)[crossing])
+
+    # Each stretch of y inside the polygon sweeps a ring, or a disc where it spans the axis
+    low, high = y[0::2], y[1::2]
+    inner = np.where(low * high < 0, 0.0, np.minimum(abs(low), abs(high)))
+    outer = np.maximum(abs(low), abs(high))
+
+    area, reached = 0.0, 0.0
+    for ring in np.argsort(inner):
+        if outer[ring] > reached:
+            area += outer[ring] ** 2 - max(inner[ring], reached) ** 2
+            reached = outer[ring]
+    return np.pi * area
+
+
+def _revolved_volume(points, axis):
+    """
+    Volume of the solid swept by a closed polygon of (x, y) points revolving about the line y = axis. Parts of the
+    polygon on either side of the axis sweep through the same space, so each cross section is the union of the rings
+    its parts sweep. Between the x of the vertices, of the edges crossing the axis and of the edges crossing each other
+    or each other's mirror images, the area of the cross sections is quadratic in x and two point Gauss-Legendre
+    quadrature is exact.
+    """
+
+    x0, y0 = points[:, 0], points[:, 1] - axis
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+
+    sloped = x0 != x1
+    slope = (y1 - y0)[sloped] / (x1 - x0)[sloped]
+    intercept = y0[sloped] - slope * x0[sloped]
+    flat = slope == 0
+    breaks = [x0, -intercept[~flat] / slope[~flat]]
+    pairs = np.triu_indices(len(slope), 1)
+    for mirror in (1.0, -1.0):
+        crossing = slope[pairs[0]] != mirror * slope[pairs[1]]
+        i, j = pairs[0][crossing], pairs[1][crossing]
+        breaks.append((mirror * intercept[j] - intercept[i]) / (slope[i] - mirror * slope[j]))
+    breaks = np.concatenate(breaks)
+    breaks = np.unique(breaks[(breaks >= x0.min()) & (breaks <= x0.max())])
+
+    middle, half = 0.5 * (breaks[1:] + breaks[:-1]), 0.5 * (breaks[1:] - breaks[:-1])
+    nodes = np.concatenate([middle - half / np.sqrt(3.0), middle + half / np.sqrt(3.0)])
+    return np.sum(np.concatenate([half, half]) * [_section_area(x0, y0, x1, y1, x) for x in nodes])
+
+
+def _exit_mach(expansion_ratio, gamma):
+    return float(mach_from_area_ratio(expansion_ratio, gamma))
+
+
+def _thrust_coefficient(expansion_ratio, gamma, exit_mach, p_c, p_amb):
+    return float(thrust_coefficient(expansion_ratio, gamma, pressure_ratio(exit_mach, gamma),
+                                    (p_amb / p_c).to('dimensionless').magnitude))
+
+
+def _throat_area(thrust, thrust_coefficient, p_c):
+    return (thrust / (thrust_coefficient * p_c)).to(units.inch ** 2)
+
+
+def _throat_radius(throat_area):
+    return (throat_area / np.pi) ** 0.5
+
+
+def _nozzle_contour(throat_radius, expansion_ratio, fractional_length):
+    return bell_contour(throat_radius, expansion_ratio, fractional_length)
+
+
+def _wall_thickness(ri, t_guess, p_c, p_amb, material_strength, fs, step_size):
+    return PressureVessel(ri, t_guess, p_c, p_amb, material_strength, fs, step_size).calculate_wall_thickness()
+
+
+def _chamber_outline(wall_thickness, taper_angle, total_length, converg_fraction):
+    return chamber_profile(wall_thickness, taper_angle, total_length, converg_fraction)
+
+
+def _chamber_mass(chamber_outline, ri, density):
+    # The outline is revolved about the line y = ri, as HelloWorldChamber does
+    length_units = chamber_outline.units
+    volume = _revolved_volume(chamber_outline.magnitude, ri.to(length_units).magnitude) * length_units ** 3
+    return (volume * density).to(units.kilogram)
+
+
+def _chamber_geometry(ri, t_guess, p_c, p_amb, material_strength, fs, step_size, geometry_cache):
+    # Imported here so that everything up to the CAD stage works without CadQuery
+    from .hello_world_chamber import HelloWorldChamber
+
+    return HelloWorldChamber().build(ri, t_guess, p_c, p_amb, material_strength, fs, step_size, cache=geometry_cache)
+
+
+def thruster_pipeline(**parameters):
+    """
+    Makes a thruster sizing pipeline with the stages exit_mach, thrust_coefficient, throat_area, throat_radius,
+    nozzle_contour, wall_thickness, chamber_outline, chamber_mass and chamber_geometry. Only chamber_geometry needs
+    CadQuery, and it only runs when asked for.
+    :param parameters: Values for the parameters, overriding DEFAULTS
+    :return: The Pipeline, change parameters with its set method and get results with pipeline['name']
+    """
+
+    values = dict(DEFAULTS)
+    values.update(parameters)
+    pipeline = Pipeline(**values)
+
+    for name, function in (('exit_mach', _exit_mach), ('thrust_coefficient', _thrust_coefficient),
+                           ('throat_area', _throat_area), ('throat_radius', _throat_radius),
+                           ('nozzle_contour', _nozzle_contour), ('wall_thickness', _wall_thickness),
+                           ('chamber_outline', _chamber_outline), ('chamber_mass', _chamber_mass),
+                           ('chamber_geometry', _chamber_geometry)):
+        pipeline.add_stage(name, function)
+
+    return pipeline
@@ -0,0 +1,206 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import hashlib
+import inspect
+import json
+import sqlite3
+import time
+
+from lib.pint_ext import kernel
+from lib.util import root_finding
+from . import lame, pressure_vessel_calcs
+
+# The modules whose source determines a solution, any edit to them invalidates cached entries
+_SOLVER_MODULES = (pressure_vessel_calcs, lame, kernel, root_finding)
+
+_solver_version = None
+
+
+def solver_version():
+    """A digest of the solver source code, used to invalidate cached solutions when the solver changes"""
+
+    global _solver_version
+
+    if _solver_version is None:
+        digest = hashlib.sha1()
+        for module in _SOLVER_MODULES:
+            digest.update(inspect.getsource(module).encode('utf-8'))
+        _solver_version = digest.hexdigest()
+
+    return _solver_version
+
+
+def _si(quantity, units):
+    return float(quantity.to(units).magnitude) if hasattr(quantity, 'units') else float(quantity)
+
+
+class SolutionCache(object):
+    """
+    Memoizes PressureVessel wall thickness solutions, keyed on the inputs normalized to base SI units plus the solver
+    settings. Solutions live in an in-process LRU tier, backed by an optional SQLite file that persists across runs.
+    Pass the cache to PressureVessel.calculate_wall_thickness to use it.
+    """
+
+    hits = 0         # solves answered from memory
+    disk_hits = 0    # solves answered from the SQLite file
+    misses = 0       # solves that had to run the solver
+
+    def __init__(self, max_entries=4096, path=None, max_disk_bytes=256 * 1024 ** 2, version=None):
+        """
+        :param max_entries: Number of solutions kept in memory
+        :param path: Optional SQLite file for the persistent tier
+        :param max_disk_bytes: Size the SQLite file is kept to, the least recently used solutions are evicted past this
+        :param version: Key for the solver code, defaults to a digest of the solver source
+        """
+
+        if max_entries < 1:
+            raise ValueError("the cache must hold at least one entry")
+
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.version = version or solver_version()
+        self._memory = collections.OrderedDict()
+        self._db = None
+        self._last_used = 0.0
+
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30)
+            # Pages freed by evictions are handed back to the file system, this only takes effect on a new file
+            self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS solutions "
+                             "(key TEXT PRIMARY KEY, version TEXT, value TEXT, last_used REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+
+            # Solutions from other solver versions can never be hit again
+            self._db.execute("DELETE FROM solutions WHERE version != ?", (self.version,))
+            self._db.commit()
+
+    def key(self, pv, method, tolerance, max_iterations):
+        """The cache key for solving this vessel with these solver settings"""
+
+        stress_units = 'pascal'
+        return repr((_si(pv.ri, 'meter'), _si(pv.r, 'meter'), _si(pv.t_guess, 'meter'), _si(pv.step_size, 'meter'),
+                     _si(pv.p_c, stress_units), _si(pv.p_amb, stress_units),
+                     _si(pv.material_strength, stress_units), _si(pv.fs, 'dimensionless'),
+                     method, None if tolerance is None else _si(tolerance, 'meter'), max_iterations))
+
+    def solve(self, pv, method='step', tolerance=None, max_iterations=100):
+        """
+        Solves for the wall thickness of pv, leaving it in the same state as PressureVessel.calculate_wall_thickness
+        would, but reusing an earlier solution with the same inputs when there is one
+        :return: The calculated wall thickness
+        """
+
+        key = self.key(pv, method, tolerance, max_iterations)
+
+        solution = self._memory.pop(key, None)
+        if solution is not None:
+            self.hits += 1
+        else:
+            solution = self._load(key)
+            if solution is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                pv.calculate_wall_thickness(method, tolerance, max_iterations)
+                solution = {'t': _si(pv.t_calc, 'meter'), 'residual': _si(pv.residual, 'pascal'),
+                            'method': pv.method, 'iterations': pv.iterations, 'converged': bool(pv.converged)}
+                self._store(key, solution)
+
+        self._memory[key] = solution
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+        return self._restore(pv, solution)
+
+    def stats(self):
+        """Hit and miss counters, with the fraction of solves that did not need the solver"""
+
+        total = self.hits + self.disk_hits + self.misses
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / float(total) if total else 0.0}
+
+    def clear(self):
+        """Drops every cached solution, in memory and on disk, and resets the counters"""
+
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM solutions")
+            self._db.commit()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _restore(self, pv, solution):
+        """Puts a cached solution back onto the vessel in its own units"""
+
+        units = pv.t_guess._REGISTRY
+        pv.t_calc = units.Quantity(solution['t'], 'meter').to(pv.t_guess.units)
+        pv.ro = pv.ri + pv.t_calc
+        pv.residual = units.Quantity(solution['residual'], 'pascal').to(pv.material_strength.units)
+        pv.method = solution['method']
+        pv.iterations = solution['iterations']
+        pv.converged = solution['converged']
+
+        return pv.t_calc
+
+    def _now(self):
+        """A timestamp for LRU ordering that never repeats within this process, even on a coarse clock"""
+
+        self._last_used = max(time.time(), self._last_used + 1e-6)
+        return self._last_used
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+
+        row = self._db.execute("SELECT value FROM solutions WHERE key = ? AND version = ?",
+                               (key, self.version)).fetchone()
+        if row is None:
+            return None
+
+        self._db.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (self._now(), key))
+        self._db.commit()
+        return json.loads(row[0])
+
+    def _store(self, key, solution):
+        if self._db is None:
+            return
+
+        self._db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                         (key, self.version, json.dumps(solution), self._now()))
+
+        # Evict the least recently used solutions once the file is over its limit, enough of them to bring it a
+        # tenth under, going by the average size of a solution
+        size = self._disk_size()
+        if size > self.max_disk_bytes:
+            count = self._db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+            evict = count - int(count * 0.9 * self.max_disk_bytes / size)
+            self._db.execute("DELETE FROM solutions WHERE key IN "
+                             "(SELECT key FROM solutions ORDER BY last_used LIMIT ?)", (max(evict, 1),))
+            self._db.commit()
+            self._db.execute("PRAGMA incremental_vacuum").fetchall()
+        self._db.commit()
+
+    def _disk_size(self):
+        """Bytes of the SQLite file in use, not counting free pages"""
+
+        pages, free, page_size = [self._db.execute("PRAGMA " + name).fetchone()[0]
+                                  for name in ('page_count', 'freelist_count', 'page_size')]
+        return (pages - free) * page_size
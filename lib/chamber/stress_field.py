@@ -0,0 +1,165 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from lib.pint_ext import magnitude, units_of, with_units
+
+# Rows of StressField.stresses
+COMPONENTS = ('sigma_tan', 'sigma_rad', 'sigma_axial', 'von_mises', 'tresca')
+
+# Equivalent stresses that can be compared against a material strength
+CRITERIA = ('max_principal', 'von_mises', 'tresca')
+
+
+def von_mises(sigma_1, sigma_2, sigma_3):
+    """The von Mises equivalent of three principal stresses, element-wise"""
+
+    return np.sqrt(0.5 * ((sigma_1 - sigma_2) ** 2 + (sigma_2 - sigma_3) ** 2 + (sigma_3 - sigma_1) ** 2))
+
+
+def tresca(sigma_1, sigma_2, sigma_3):
+    """The Tresca equivalent of three principal stresses, the largest difference between any two, element-wise"""
+
+    return np.maximum(np.maximum(sigma_1, sigma_2), sigma_3) - np.minimum(np.minimum(sigma_1, sigma_2), sigma_3)
+
+
+class StressField(object):
+    """
+    The stress distribution through the walls of many thick walled cylinders at once. The tangential, radial and
+    axial stresses are principal stresses, so they are combined directly into the von Mises and Tresca equivalent
+    stresses. Everything is held in one float array, stresses, with a row per entry of COMPONENTS, each of shape
+    broadcast(vessel inputs) + (number of radii,).
+    """
+
+    r = None             # radii the stresses are evaluated at, in length_units
+    stresses = None      # (len(COMPONENTS),) + r.shape array of stresses, in stress_units
+    length_units = None  # units of the radii, None for plain numbers
+    stress_units = None  # units of the stresses, None for plain numbers
+
+    def __init__(self, ri, ro, p_c, p_amb, n_radii=11, radii=None, closed_ends=True):
+        """
+        :param ri: Inner radii, a scalar, array or array-valued Quantity
+        :param ro: Outer radii, broadcasting with ri
+        :param p_c: Chamber pressures, broadcasting with ri
+        :param p_amb: Ambient pressures, broadcasting with ri
+        :param n_radii: Number of radii evenly spaced through each wall from ri to ro
+        :param radii: Radii to evaluate at instead, an array whose last axis runs through the wall and whose other
+                      axes broadcast with the vessel inputs
+        :param closed_ends: True for the axial stress of a cylinder with closed ends, False for open ends
+        """
+
+        self.length_units = units_of(ri, ro, radii)
+        self.stress_units = units_of(p_c, p_amb)
+
+        ri, ro, p_c, p_amb = [value[..., np.newaxis] for value in np.broadcast_arrays(
+            magnitude(ri, self.length_units), magnitude(ro, self.length_units),
+            magnitude(p_c, self.stress_units), magnitude(p_amb, self.stress_units))]
+
+        if radii is None:
+            if n_radii < 1:
+                raise ValueError("at least one radius is needed")
+            fractions = np.linspace(0.0, 1.0, n_radii) if n_radii > 1 else np.zeros(1)
+            r = ri + (ro - ri) * fractions
+        else:
+            r = magnitude(radii, self.length_units)
+            r = np.broadcast_to(r, np.broadcast(ri, r).shape)
+        self.r = r
+
+        # Lame's equations as sigma_tan = a + q and sigma_rad = a - q with q = b / r^2, where a is the closed end axial
+        # stress, see lame.py
+        ri2, ro2 = ri ** 2, ro ** 2
+        a = (p_c * ri2 - p_amb * ro2) / (ro2 - ri2)
+        q = np.square(r)
+        np.divide(ri2 * ro2 * (p_c - p_amb) / (ro2 - ri2), q, out=q)
+
+        self.stresses = np.empty((len(COMPONENTS),) + r.shape)
+        sigma_tan, sigma_rad, sigma_axial, equivalent_von_mises, equivalent_tresca = self.stresses
+        np.add(a, q, out=sigma_tan)
+        np.subtract(a, q, out=sigma_rad)
+        sigma_axial[...] = a if closed_ends else 0.0
+
+        # The principal stresses differ by 2 q, d + q and d - q with d = a - sigma_axial, which reduces the von Mises
+        # and Tresca stresses to sqrt(3 q^2 + d^2) and |q| + max(|q|, |d|), far cheaper over large fields than the
+        # general von_mises and tresca
+        d2 = np.zeros_like(a) if closed_ends else a ** 2
+        np.square(q, out=equivalent_von_mises)
+        equivalent_von_mises *= 3.0
+        equivalent_von_mises += d2
+        np.sqrt(equivalent_von_mises, out=equivalent_von_mises)
+        np.abs(q, out=q)
+        np.maximum(q, np.sqrt(d2), out=equivalent_tresca)
+        equivalent_tresca += q
+
+    @property
+    def shape(self):
+        """Shape of each component, broadcast(vessel inputs) + (number of radii,)"""
+
+        return self.r.shape
+
+    def component(self, name):
+        """
+        One stress component or equivalent stress over every vessel and radius
+        :param name: One of COMPONENTS, or 'max_principal' for the largest of the three principal stresses
+        :return: Array of shape self.shape, in stress_units
+        """
+
+        return with_units(self._values(name), self.stress_units)
+
+    def _values(self, name):
+        if name == 'max_principal':
+            return np.max(self.stresses[:3], axis=0)
+        if name not in COMPONENTS:
+            raise ValueError("unknown stress component '{0}'".format(name))
+        return self.stresses[COMPONENTS.index(name)]
+
+    def sigma_tan(self):
+        return self.component('sigma_tan')
+
+    def sigma_rad(self):
+        return self.component('sigma_rad')
+
+    def sigma_axial(self):
+        return self.component('sigma_axial')
+
+    def von_mises(self):
+        return self.component('von_mises')
+
+    def tresca(self):
+        return self.component('tresca')
+
+    def peak(self, criterion='von_mises'):
+        """
+        The largest equivalent stress through each wall and where it occurs
+        :param criterion: One of CRITERIA
+        :return: (stresses, radii), each of the vessel inputs' broadcast shape
+        """
+
+        if criterion not in CRITERIA:
+            raise ValueError("unknown failure criterion '{0}'".format(criterion))
+        equivalent = self._values(criterion)
+        index = np.argmax(equivalent, axis=-1)[..., np.newaxis]
+        return (with_units(np.take_along_axis(equivalent, index, -1)[..., 0], self.stress_units),
+                with_units(np.take_along_axis(self.r, index, -1)[..., 0], self.length_units))
+
+    def safety_factor(self, material_strength, criterion='von_mises'):
+        """
+        The factor of safety each wall has against a material strength under a failure criterion
+        :param material_strength: Strengths, broadcasting with the vessel inputs
+        :param criterion: One of CRITERIA
+        :return: Float array of the vessel inputs' broadcast shape
+        """
+
+        stress, _ = self.peak(criterion)
+        return magnitude(material_strength, self.stress_units) / magnitude(stress, self.stress_units)
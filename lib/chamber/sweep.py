@@ -0,0 +1,357 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from lib.util.instrumentation import phase
+from lib.util.pool import ordered_results
+from .pressure_vessel_batch import PressureVesselBatch
+
+# Design point inputs, stored as plain floats in base SI units (meters and pascals)
+INPUT_COLUMNS = ('ri', 'p_c', 'p_amb', 'material_strength', 'fs')
+_INPUT_UNITS = {'ri': 'meter', 'p_c': 'pascal', 'p_amb': 'pascal', 'material_strength': 'pascal', 'fs': 'dimensionless'}
+
+
+def _si_magnitudes(value, units):
+    """Converts a scalar, sequence or Quantity to a flat float array in the given base SI units"""
+
+    if hasattr(value, 'units'):
+        value = value.to(units).magnitude
+    elif isinstance(value, (list, tuple)) and value and hasattr(value[0], 'units'):
+        value = [item.to(units).magnitude for item in value]
+    return np.atleast_1d(np.asarray(value, dtype=float)).ravel()
+
+
+def solve_pressure_vessels(columns):
+    """
+    Solves the wall thickness of a chunk of design points. This is the default sweep evaluator, and custom
+    evaluators must follow the same contract: take a dict of input columns and return a dict of result columns.
+    :param columns: Dict of float arrays in base SI units, keyed by the names in INPUT_COLUMNS
+    :return: Dict with the wall thickness 't', the max stress including the factor of safety 'max_stress', and
+             'converged'
+    """
+
+    batch = PressureVesselBatch(*[columns[name] for name in INPUT_COLUMNS])
+    t = batch.calculate_wall_thickness()
+
+    return {'t': t, 'max_stress': batch.max_stress(), 'converged': batch.converged}
+
+
+def _evaluate_chunk(task):
+    """Process pool entry point, kept at module level so that it can be pickled"""
+
+    index, columns, evaluate = task
+    start = time.time()
+    outputs = evaluate(columns)
+    return index, outputs, time.time() - start
+
+
+class DesignSweep(object):
+    """
+    A set of PressureVessel design points, either a full grid or a list of samples, that is evaluated in chunks across
+    a process pool with the results streamed to disk in design point order.
+    """
+
+    def __init__(self, axes, materials=None, grid=True):
+        """
+        Use DesignSweep.grid or DesignSweep.samples rather than calling this directly.
+        :param axes: Dict of float arrays in base SI units keyed by the names in INPUT_COLUMNS
+        :param materials: Material names, one per material_strength value, or None
+        :param grid: True to sweep the cartesian product of the axes, False to pair them up element by element
+        """
+
+        self.axes = axes
+        self.materials = materials
+        self.is_grid = grid
+
+        if grid:
+            self.shape = tuple(len(axes[name]) for name in INPUT_COLUMNS)
+            self.size = int(np.prod(self.shape))
+        else:
+            lengths = set(len(axes[name]) for name in INPUT_COLUMNS) - set([1])
+            if len(lengths) > 1:
+                raise ValueError("sample columns must all have the same length")
+            self.shape = None
+            self.size = lengths.pop() if lengths else 1
+
+    @classmethod
+    def grid(cls, ri, p_c, material_strength, fs, p_amb=0.0):
+        """
+        Sweeps every combination of the given values. Each argument may be a scalar, a sequence or an array-valued
+        Quantity, and material_strength may also be a dict of material name to strength.
+        """
+
+        materials = None
+        if isinstance(material_strength, dict):
+            materials = sorted(material_strength)
+            material_strength = [material_strength[name] for name in materials]
+
+        values = dict(ri=ri, p_c=p_c, p_amb=p_amb, material_strength=material_strength, fs=fs)
+        axes = dict((name, _si_magnitudes(values[name], _INPUT_UNITS[name])) for name in INPUT_COLUMNS)
+
+        return cls(axes, materials, grid=True)
+
+    @classmethod
+    def samples(cls, ri, p_c, material_strength, fs, p_amb=0.0, material=None):
+        """
+        Sweeps a list of design points given as equal length columns. Scalars are shared by every point.
+        :param material: Optional material name for each point, or one name for all of them
+        """
+
+        values = dict(ri=ri, p_c=p_c, p_amb=p_amb, material_strength=material_strength, fs=fs)
+        axes = dict((name, _si_magnitudes(values[name], _INPUT_UNITS[name])) for name in INPUT_COLUMNS)
+
+        return cls(axes, None if material is None else np.atleast_1d(np.asarray(material, dtype=str)), grid=False)
+
+    def __len__(self):
+        return self.size
+
+    def chunk(self, start, stop):
+        """
+        Gets the inputs of design points start to stop in sweep order
+        :return: Dict of float arrays in base SI units, plus a 'material' array of names when materials are known
+        """
+
+        stop = min(stop, self.size)
+        index = np.arange(start, stop)
+
+        if self.is_grid:
+            positions = np.unravel_index(index, self.shape)
+            columns = dict((name, self.axes[name][position]) for name, position in zip(INPUT_COLUMNS, positions))
+            if self.materials is not None:
+                columns['material'] = np.asarray(self.materials, dtype=str)[
+                    positions[INPUT_COLUMNS.index('material_strength')]]
+        else:
+            columns = dict((name, np.broadcast_to(self.axes[name], (self.size,))[start:stop]) for name in INPUT_COLUMNS)
+            if self.materials is not None:
+                columns['material'] = np.broadcast_to(self.materials, (self.size,))[start:stop]
+
+        columns['index'] = index
+        return columns
+
+    def fingerprint(self, chunk_size):
+        """A digest of the design points and chunking, used to check that a checkpoint belongs to this sweep"""
+
+        digest = hashlib.sha1()
+        digest.update(repr((self.is_grid, self.size, chunk_size)).encode('utf-8'))
+        for name in INPUT_COLUMNS:
+            digest.update(np.ascontiguousarray(self.axes[name]).tobytes())
+        if self.materials is not None:
+            digest.update('\0'.join(self.materials).encode('utf-8'))
+        return digest.hexdigest()
+
+    def run(self, path, chunk_size=10000, processes=None, evaluate=solve_pressure_vessels, progress=None,
+            resume=True, output_format=None, instrumentation=None):
+        """
+        Evaluates the sweep and streams the results to path as each chunk completes. Chunks are written in sweep
+        order whatever order the workers finish them in, and a checkpoint next to the output records the chunks
+        that are safely on disk so that an interrupted sweep picks up where it left off.
+        :param path: Output file, '.csv' for CSV or '.parquet' for a directory of Parquet part files (needs pyarrow)
+        :param chunk_size: Number of design points handed to a worker at a time
+        :param processes: Number of worker processes, None for one per CPU, 0 or 1 to run in this process
+        :param evaluate: Module level function mapping a chunk of input columns to result columns
+        :param progress: Optional callable, called as progress(points_done, points_total) after every chunk
+        :param resume: False to ignore any existing checkpoint and start over
+        :param output_format: 'csv' or 'parquet', inferred from the path when None
+        :param instrumentation: Optional Instrumentation, which gets a record per chunk with the time its worker spent
+                                evaluating it, and 'evaluate' and 'write' phase totals
+        :return: The number of design points evaluated by this call
+        """
+
+        if chunk_size < 1:
+            raise ValueError("chunk size must be at least 1")
+
+        if output_format is None:
+            output_format = 'parquet' if path.endswith('.parquet') else 'csv'
+        sink = {'csv': _CsvSink, 'parquet': _ParquetSink}[output_format](path)
+
+        checkpoint = _Checkpoint(path + '.checkpoint', self.fingerprint(chunk_size))
+        if resume:
+            checkpoint.load()
+            if not sink.holds(checkpoint.position):
+                # The results the checkpoint counts on were moved or deleted, so the sweep starts over
+                checkpoint.reset()
+        else:
+            checkpoint.reset()
+
+        n_chunks = (self.size + chunk_size - 1) // chunk_size
+        first_chunk = checkpoint.chunks_done
+        sink.open(checkpoint.position)
+
+        tasks = ((i, self.chunk(i * chunk_size, (i + 1) * chunk_size), evaluate) for i in range(first_chunk, n_chunks))
+
+        pool = None
+        if processes is None or processes > 1:
+            processes = processes or multiprocessing.cpu_count()
+            pool = multiprocessing.Pool(processes)
+            results = ordered_results(pool, _evaluate_chunk, tasks, 2 * processes)
+        else:
+            results = (_evaluate_chunk(task) for task in tasks)
+
+        evaluated = 0
+        try:
+            for index, outputs, seconds in results:
+                inputs = self.chunk(index * chunk_size, (index + 1) * chunk_size)
+                with phase(instrumentation, 'write'):
+                    checkpoint.save(index + 1, sink.write(index, inputs, outputs))
+
+                if instrumentation is not None:
+                    instrumentation.add_time('evaluate', seconds)
+                    details = {}
+                    if 'converged' in outputs:
+                        details['converged_points'] = int(np.count_nonzero(outputs['converged']))
+                    instrumentation.record('chunk {0}'.format(index), seconds, len(inputs['index']), **details)
+
+                evaluated += len(inputs['index'])
+                if progress is not None:
+                    progress(min((index + 1) * chunk_size, self.size), self.size)
+        finally:
+            sink.close()
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        return evaluated
+
+
+class _Checkpoint(object):
+    """Records how many chunks of a sweep are on disk and where the output ends, so that a sweep can be resumed"""
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.chunks_done = 0
+        self.position = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self.reset()
+
+        with open(self.path) as f:
+            state = json.load(f)
+
+        if state.get('fingerprint') != self.fingerprint:
+            raise ValueError("checkpoint {0} belongs to a different sweep, run with resume=False to start "
+                             "over".format(self.path))
+
+        self.chunks_done = state['chunks_done']
+        self.position = state['position']
+
+    def reset(self):
+        self.chunks_done = 0
+        self.position = None
+
+    def save(self, chunks_done, position):
+        self.chunks_done = chunks_done
+        self.position = position
+
+        # Write then rename so an interruption never leaves a half written checkpoint
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'chunks_done': chunks_done, 'position': position}, f)
+        getattr(os, 'replace', os.rename)(temp_path, self.path)
+
+
+def _result_rows(inputs, outputs):
+    """The column names and row-major values for a chunk of inputs and results"""
+
+    input_names = ['index'] + (['material'] if 'material' in inputs else []) + list(INPUT_COLUMNS)
+    output_names = sorted(outputs)
+
+    columns = [inputs[name] for name in input_names] + [outputs[name] for name in output_names]
+    return input_names + output_names, columns
+
+
+class _CsvSink(object):
+    """Appends chunks to a CSV file, truncating anything written after the last checkpoint when resuming"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.writer = None
+
+    def holds(self, position):
+        """Whether the file still has everything up to a checkpointed position"""
+
+        return position is None or (os.path.isfile(self.path) and os.path.getsize(self.path) >= position)
+
+    def open(self, position):
+        if position is None:
+            self.file = open(self.path, 'w')
+        else:
+            self.file = open(self.path, 'r+')
+            self.file.seek(position)
+            self.file.truncate()
+        self.writer = csv.writer(self.file, lineterminator='\n')
+
+    def write(self, index, inputs, outputs):
+        names, columns = _result_rows(inputs, outputs)
+        if self.file.tell() == 0:
+            self.writer.writerow(names)
+        self.writer.writerows(zip(*[np.asarray(column).tolist() for column in columns]))
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class _ParquetSink(object):
+    """Writes each chunk to its own Parquet part file inside a directory, named so they sort in sweep order"""
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow is required to write sweep results to Parquet")
+
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.path = path
+
+    def holds(self, position):
+        """Whether the directory still has the part files of every checkpointed chunk"""
+
+        return all(os.path.isfile(os.path.join(self.path, 'part-{0:06d}.parquet'.format(index)))
+                   for index in range(position or 0))
+
+    def open(self, position):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        # Drop part files from chunks that were written after the last checkpoint
+        chunks_done = position or 0
+        for name in os.listdir(self.path):
+            if name.startswith('part-') and int(name[5:-8]) >= chunks_done:
+                os.remove(os.path.join(self.path, name))
+
+    def write(self, index, inputs, outputs):
+        names, columns = _result_rows(inputs, outputs)
+        table = self.pyarrow.Table.from_arrays([self.pyarrow.array(np.asarray(column)) for column in columns], names)
+        self.parquet.write_table(table, os.path.join(self.path, 'part-{0:06d}.parquet'.format(index)))
+        return index + 1
+
+    def close(self):
+        pass
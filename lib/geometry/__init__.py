@@ -0,0 +1,6 @@
+from .stl import RevolvedSurface, write_revolved_stl, read_stl
+from .bspline import BSpline, basis_functions, interpolate_bspline
+from .fitting import simplify_polyline, fit_bspline
+
+__all__ = ["RevolvedSurface", "write_revolved_stl", "read_stl", "BSpline", "basis_functions", "interpolate_bspline",
+           "simplify_polyline", "fit_bspline"]
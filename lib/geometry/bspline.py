@@ -0,0 +1,286 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Clamped B-spline curves in NumPy, in the same form CAD kernels take them: a degree, a knot vector and control points.
+# Evaluation is vectorized over parameter values, so contours can be interpolated and resampled without FreeCAD.
+
+import numpy as np
+
+# Parameter values evaluated at a time, which bounds the working memory of evaluating millions of them
+_CHUNK = 1 << 16
+
+# Gauss-Legendre rule used to integrate the speed of the curve for its arc length, and the number of pieces each knot
+# span is cut into for it
+_GAUSS_NODES, _GAUSS_WEIGHTS = np.polynomial.legendre.leggauss(8)
+_ARC_LENGTH_PIECES = 4
+
+
+def _safe_ratio(numerator, denominator):
+    """numerator / denominator, taken as 0 where the denominator is 0 as the B-spline recurrences require"""
+
+    return numerator / np.where(denominator == 0, 1.0, denominator) * (denominator != 0)
+
+
+def basis_functions(knots, degree, u, derivative=0):
+    """
+    Evaluates every B-spline basis function at every parameter value by the Cox-de Boor recurrence
+    :param knots: Non-decreasing knot vector
+    :param degree: Degree of the basis
+    :param u: Parameter values within the knot range, any shape
+    :param derivative: 0 for the basis functions themselves, 1 for their first derivatives
+    :return: Array of shape u.shape + (len(knots) - degree - 1,)
+    """
+
+    knots = np.asarray(knots, dtype=float)
+    u = np.asarray(u, dtype=float)[..., np.newaxis]
+
+    # Degree 0 functions are the indicators of the knot spans. The last non-empty span is closed on the right so the
+    # curve reaches its end point.
+    left, right = knots[:-1], knots[1:]
+    basis = ((left <= u) & (u < right)).astype(float)
+    last = np.nonzero(left < right)[0][-1]
+    basis[..., last] = np.where(u[..., 0] == right[last], 1.0, basis[..., last])
+
+    for p in range(1, degree + 1):
+        if p == degree and derivative:
+            # N'_{i,p} = p N_{i,p-1} / (t_{i+p} - t_i) - p N_{i+1,p-1} / (t_{i+p+1} - t_{i+1})
+            return p * (_safe_ratio(basis[..., :-1], knots[p:-1] - knots[:-p - 1]) -
+                        _safe_ratio(basis[..., 1:], knots[p + 1:] - knots[1:-p]))
+
+        basis = _safe_ratio((u - knots[:-p - 1]) * basis[..., :-1], knots[p:-1] - knots[:-p - 1]) + \
+            _safe_ratio((knots[p + 1:] - u) * basis[..., 1:], knots[p + 1:] - knots[1:-p])
+
+    if derivative:
+        return np.zeros_like(basis)
+    return basis
+
+
+def clamped_knots(interior, degree, start=0.0, end=1.0):
+    """A knot vector with degree + 1 copies of each end knot, so the curve starts and ends on its end control points"""
+
+    return np.concatenate([np.full(degree + 1, start), np.asarray(interior, dtype=float), np.full(degree + 1, end)])
+
+
+def chord_length_parameters(points, exponent=1.0):
+    """
+    Parameters from 0 to 1 for a sequence of points, spaced by the distance between successive points
+    :param exponent: Power the distances are raised to, 1 for chord length or 0.5 for centripetal parameters, which
+                     follow sharp turns more closely
+    """
+
+    steps = np.sqrt(np.sum(np.diff(points, axis=0) ** 2, axis=1)) ** exponent
+    distance = np.concatenate([[0.0], np.cumsum(steps)])
+    if distance[-1] == 0:
+        raise ValueError("a contour's points must not all coincide")
+    return distance / distance[-1]
+
+
+class BSpline(object):
+    """A B-spline curve in any number of dimensions"""
+
+    def __init__(self, control_points, knots, degree=3):
+        """
+        :param control_points: (n, dimensions) array of control points, plain numbers or a Quantity
+        :param knots: Non-decreasing knot vector of n + degree + 1 values
+        :param degree: Degree of the curve
+        """
+
+        self.units = getattr(control_points, 'units', None)
+        if self.units is not None:
+            control_points = control_points.magnitude
+
+        self.control_points = np.asarray(control_points, dtype=float)
+        self.knots = np.asarray(knots, dtype=float)
+        self.degree = int(degree)
+
+        if self.control_points.ndim != 2:
+            raise ValueError("control points must be an (n, dimensions) array")
+        if self.degree < 0:
+            raise ValueError("the degree must not be negative")
+        if len(self.knots) != len(self.control_points) + self.degree + 1:
+            raise ValueError("{0} control points of degree {1} need {2} knots, not {3}".format(
+                len(self.control_points), self.degree, len(self.control_points) + self.degree + 1, len(self.knots)))
+        if np.any(np.diff(self.knots) < 0):
+            raise ValueError("knots must not decrease")
+
+        self._derivatives = {0: self}
+        self._arc_length_table = None
+
+    @property
+    def domain(self):
+        """The (first, last) parameter values of the curve"""
+
+        return self.knots[self.degree], self.knots[-self.degree - 1]
+
+    def _with_units(self, values):
+        return values if self.units is None else values * self.units
+
+    def _evaluate(self, u):
+        """Points on the curve as plain numbers, by de Boor's algorithm run for every parameter value at once"""
+
+        u = np.asarray(u, dtype=float)
+        shape = u.shape
+        u = u.ravel()
+        p, knots = self.degree, self.knots
+        points = np.empty((len(u), self.control_points.shape[1]))
+
+        for first in range(0, len(u), _CHUNK):
+            v = u[first:first + _CHUNK]
+
+            # The knot span holding each parameter, kept to the spans of the domain so the ends are reached
+            span = np.clip(np.searchsorted(knots, v, side='right') - 1, p, len(self.control_points) - 1)[:, np.newaxis]
+
+            # The p + 1 control points that act on each span, blended down one level per pass
+            d = self.control_points[span + np.arange(-p, 1)]
+            for r in range(1, p + 1):
+                j = np.arange(r, p + 1)
+                left = knots[span + j - p]
+                alpha = (v[:, np.newaxis] - left) / (knots[span + j + 1 - r] - left)
+                d[:, r:] = (1.0 - alpha)[..., np.newaxis] * d[:, r - 1:-1] + alpha[..., np.newaxis] * d[:, r:]
+            points[first:first + _CHUNK] = d[:, p]
+
+        return points.reshape(shape + (points.shape[1],))
+
+    def __call__(self, u):
+        """
+        Evaluates the curve
+        :param u: Parameter values within the domain, any shape
+        :return: Points of shape u.shape + (dimensions,)
+        """
+
+        return self._with_units(self._evaluate(u))
+
+    def derivative_spline(self, order=1):
+        """
+        The derivative of the curve with respect to its parameter, as a B-spline of lower degree. Derivatives beyond
+        the degree of the curve are zero.
+        """
+
+        if order < 0:
+            raise ValueError("the order of a derivative must not be negative")
+        if order not in self._derivatives:
+            spline = self.derivative_spline(order - 1)
+            p, knots, control_points = spline.degree, spline.knots, spline.control_points
+            if p == 0:
+                derivative = np.zeros_like(control_points)
+            else:
+                derivative = p * _safe_ratio(np.diff(control_points, axis=0),
+                                             (knots[p + 1:-1] - knots[1:-p - 1])[:, np.newaxis])
+                knots = knots[1:-1]
+            self._derivatives[order] = BSpline(self._with_units(derivative), knots, max(p - 1, 0))
+        return self._derivatives[order]
+
+    def derivative(self, u, order=1):
+        """The derivative of the given order of the curve with respect to its parameter, shaped as for evaluation"""
+
+        return self.derivative_spline(order)(u)
+
+    def _speed(self, u):
+        return np.sqrt(np.sum(self.derivative_spline(1)._evaluate(u) ** 2, axis=-1))
+
+    def _pieces(self):
+        """Piece boundaries in the parameter and the arc length at each, computed once per curve"""
+
+        if self._arc_length_table is None:
+            start, end = self.domain
+            breaks = np.unique(self.knots[(self.knots >= start) & (self.knots <= end)])
+            fractions = np.arange(_ARC_LENGTH_PIECES) / float(_ARC_LENGTH_PIECES)
+            breaks = np.append((breaks[:-1, np.newaxis] + fractions * np.diff(breaks)[:, np.newaxis]).ravel(), end)
+            lengths = self._integrate_speed(breaks[:-1], breaks[1:])
+            self._arc_length_table = breaks, np.concatenate([[0.0], np.cumsum(lengths)])
+        return self._arc_length_table
+
+    def _integrate_speed(self, a, b):
+        half = 0.5 * (b - a)[..., np.newaxis]
+        nodes = 0.5 * (a + b)[..., np.newaxis] + half * _GAUSS_NODES
+        return np.sum(half * _GAUSS_WEIGHTS * self._speed(nodes), axis=-1)
+
+    def _arc_length(self, u):
+        breaks, lengths = self._pieces()
+        piece = np.clip(np.searchsorted(breaks, u, side='right') - 1, 0, len(breaks) - 2)
+        return lengths[piece] + self._integrate_speed(breaks[piece], u)
+
+    def arc_length(self, u=None):
+        """
+        Arc length along the curve, by Gauss-Legendre quadrature of its speed
+        :param u: Parameter values to measure up to from the start of the curve, or None for the whole curve
+        :return: The lengths, shaped as u
+        """
+
+        if u is None:
+            return self._with_units(self._pieces()[1][-1])
+        return self._with_units(self._arc_length(np.asarray(u, dtype=float)))
+
+    def arc_length_parameters(self, s, tolerance=1e-12, max_iterations=20):
+        """
+        Inverts the arc length: the parameters at given distances along the curve, by Newton's method started from
+        the table of piece lengths
+        :param s: Arc lengths from 0 to the length of the curve, any shape, plain numbers or a Quantity
+        :return: Parameter values, shaped as s
+        """
+
+        if hasattr(s, 'units'):
+            s = s.to(self.units).magnitude
+        breaks, lengths = self._pieces()
+        s = np.clip(np.asarray(s, dtype=float), 0.0, lengths[-1])
+
+        piece = np.clip(np.searchsorted(lengths, s, side='right') - 1, 0, len(breaks) - 2)
+        low, high = breaks[piece], breaks[piece + 1]
+        piece_length = lengths[piece + 1] - lengths[piece]
+        u = low + (high - low) * _safe_ratio(s - lengths[piece], piece_length)
+
+        for _ in range(max_iterations):
+            error = self._arc_length(u) - s
+            if np.all(np.abs(error) <= tolerance * max(lengths[-1], 1.0)):
+                break
+            speed = self._speed(u)
+            u = np.clip(u - _safe_ratio(error, speed), low, high)
+        return u
+
+    def resample(self, n_points):
+        """
+        Points evenly spaced along the curve by arc length, including both ends
+        :return: (n_points, dimensions) array, in the units of the control points
+        """
+
+        return self(self.arc_length_parameters(np.linspace(0.0, self._pieces()[1][-1], n_points)))
+
+
+def interpolate_bspline(points, degree=3, centripetal=False):
+    """
+    The B-spline through every one of a sequence of points, as Part.BSplineCurve.interpolate makes, with knots
+    averaged over the point parameters
+    :param points: (n, dimensions) array of points, plain numbers or a Quantity
+    :param degree: Degree of the spline, lowered when there are too few points
+    :param centripetal: True for centripetal rather than chord length parameters
+    :return: The BSpline, in the units of points, passing through point k at chord_length_parameters(points)[k]
+    """
+
+    units = getattr(points, 'units', None)
+    if units is not None:
+        points = points.magnitude
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or len(points) < 2:
+        raise ValueError("interpolation needs an (n, dimensions) array of at least two points")
+
+    degree = min(int(degree), len(points) - 1)
+    parameters = chord_length_parameters(points, 0.5 if centripetal else 1.0)
+
+    # Each interior knot is the average of degree successive parameters (Piegl and Tiller eq. 9.8)
+    window = np.cumsum(np.concatenate([[0.0], parameters]))
+    interior = (window[degree + 1:-1] - window[1:-degree - 1]) / degree
+    knots = clamped_knots(interior, degree)
+
+    control_points = np.linalg.solve(basis_functions(knots, degree, parameters), points)
+    return BSpline(control_points if units is None else control_points * units, knots, degree)
@@ -0,0 +1,182 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Reduces dense contours, such as the generated nozzle and spike contours, to as few CAD entities as a geometric
+# tolerance allows: either a polyline through a subset of the points or a least-squares B-spline with the fewest
+# control points. Fewer segments and control points make revolves, booleans and exports much faster.
+
+import numpy as np
+
+from .bspline import BSpline, basis_functions, chord_length_parameters, clamped_knots
+
+
+def _contour_array(points, tolerance):
+    """The points as an (n, dimensions) float array and the tolerance as a number in their units, plus the units"""
+
+    units = getattr(points, 'units', None)
+    if units is not None:
+        points = points.magnitude
+        if hasattr(tolerance, 'units'):
+            tolerance = tolerance.to(units).magnitude
+
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or len(points) < 2:
+        raise ValueError("a contour must be an (n, dimensions) array of at least two points")
+    if tolerance < 0:
+        raise ValueError("the tolerance must not be negative")
+    return points, float(tolerance), units
+
+
+def _segment_distances(points, start, end):
+    """Distance from each point to the segment from the matching start point to the matching end point"""
+
+    along = end - start
+    length2 = np.sum(along ** 2, axis=-1)
+    t = np.clip(np.sum((points - start) * along, axis=-1) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+    return np.sqrt(np.sum((points - start - t[..., np.newaxis] * along) ** 2, axis=-1))
+
+
+def simplify_indices(points, tolerance):
+    """
+    Douglas-Peucker simplification, worked one level of splits at a time over every open segment at once
+    :return: Sorted indices of the points kept, always including the first and last
+    """
+
+    points, tolerance, _ = _contour_array(points, tolerance)
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    while True:
+        kept = np.nonzero(keep)[0]
+
+        # Each dropped point is checked against the segment between the kept points either side of it
+        segment = np.searchsorted(kept, np.arange(len(points)), side='right') - 1
+        segment = np.minimum(segment, len(kept) - 2)
+        distance = _segment_distances(points, points[kept[segment]], points[kept[segment + 1]])
+        distance[keep] = 0.0
+
+        # The farthest point of each segment, found by sorting on segment then decreasing distance
+        order = np.lexsort((-distance, segment))
+        first = order[np.concatenate([[True], np.diff(segment[order]) != 0])]
+        split = first[distance[first] > tolerance]
+        if not len(split):
+            return kept
+        keep[split] = True
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Drops the points of a polyline that are not needed to keep it within a tolerance of the original, by the
+    Douglas-Peucker algorithm. Every original point stays within the tolerance of the simplified polyline.
+    :param points: (n, dimensions) array of points, plain numbers or a Quantity
+    :param tolerance: Largest allowed distance from an original point to the simplified polyline
+    :return: The kept points, in order, in the units of points
+    """
+
+    kept = simplify_indices(points, tolerance)
+    return points[kept] if hasattr(points, 'units') else np.asarray(points, dtype=float)[kept]
+
+
+def _least_squares_knots(parameters, n_control, degree):
+    """Interior knots averaged over the parameters so that every knot span holds some (Piegl and Tiller eq. 9.69)"""
+
+    d = float(len(parameters)) / (n_control - degree)
+    j = np.arange(1, n_control - degree)
+    i = (j * d).astype(int)
+    alpha = j * d - i
+    return clamped_knots((1.0 - alpha) * parameters[i - 1] + alpha * parameters[i], degree)
+
+
+def _least_squares_spline(points, parameters, knots, degree):
+    """The spline with the end points fixed that fits the rest of the points best at their parameters"""
+
+    n_control = len(knots) - degree - 1
+    basis = basis_functions(knots, degree, parameters)
+
+    control_points = np.empty((n_control, points.shape[1]))
+    control_points[0], control_points[-1] = points[0], points[-1]
+    if n_control > 2:
+        residual = points - np.outer(basis[:, 0], points[0]) - np.outer(basis[:, -1], points[-1])
+        control_points[1:-1] = np.linalg.lstsq(basis[1:-1, 1:-1], residual[1:-1], rcond=None)[0]
+    return BSpline(control_points, knots, degree)
+
+
+def _fit(points, parameters, n_control, degree, corrections):
+    """Least-squares fit with n_control control points, and the largest distance of a point from the curve"""
+
+    knots = _least_squares_knots(parameters, n_control, degree)
+    spline = _least_squares_spline(points, parameters, knots, degree)
+
+    for _ in range(corrections):
+        # Move each parameter towards the foot of the perpendicular from its point to the curve, then refit
+        offset = spline(parameters) - points
+        tangent = spline.derivative(parameters)
+        step = np.sum(offset * tangent, axis=1) / np.maximum(np.sum(tangent ** 2, axis=1), 1e-300)
+        parameters = np.concatenate([[0.0], np.clip(parameters[1:-1] - step[1:-1], 0.0, 1.0), [1.0]])
+        parameters = np.maximum.accumulate(parameters)
+        spline = _least_squares_spline(points, parameters, knots, degree)
+
+    error = np.max(np.sqrt(np.sum((spline(parameters) - points) ** 2, axis=1)))
+    return spline, error
+
+
+def fit_bspline(points, tolerance, degree=3, corrections=2):
+    """
+    Fits a B-spline with the fewest control points that keeps every point within a tolerance of the curve. The curve
+    starts and ends on the first and last points, and each fit is a least-squares fit at chord length parameters
+    refined by a few parameter corrections. The control point count is found by doubling then bisecting, and at worst
+    the spline interpolates every point.
+    :param points: (n, dimensions) array of points, plain numbers or a Quantity
+    :param tolerance: Largest allowed distance from a point to the curve, measured at the point's parameter so it
+                      bounds the true distance from above
+    :param degree: Degree of the spline, lowered for contours with too few points
+    :param corrections: Parameter correction passes per fit
+    :return: The BSpline, in the units of points
+    """
+
+    points, tolerance, units = _contour_array(points, tolerance)
+    degree = min(int(degree), len(points) - 1)
+    if degree < 1:
+        raise ValueError("the degree must be at least 1")
+
+    parameters = chord_length_parameters(points)
+
+    def fit(n_control):
+        return _fit(points, parameters, n_control, degree, corrections)
+
+    # Every candidate count between the last failure and the first success is bisected; with as many control points
+    # as data points the spline interpolates them all
+    low, high = degree, None
+    best = None
+    n_control = degree + 1
+    while high is None:
+        n_control = min(n_control, len(points))
+        spline, error = fit(n_control)
+        if error <= tolerance or n_control == len(points):
+            high, best = n_control, spline
+        else:
+            low = n_control
+            n_control *= 2
+
+    while high - low > 1:
+        middle = (low + high) // 2
+        spline, error = fit(middle)
+        if error <= tolerance:
+            high, best = middle, spline
+        else:
+            low = middle
+
+    if units is not None:
+        best = BSpline(best.control_points * units, best.knots, best.degree)
+    return best
@@ -0,0 +1,191 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import struct
+
+import numpy as np
+
+# Binary STL facet record: normal, three vertices and an unused attribute word, little endian
+FACET_DTYPE = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+HEADER_SIZE = 80
+
+
+def _profile_array(profile, units):
+    """The profile as an (n, 2) float array, converted to units when it is a Quantity"""
+
+    if hasattr(profile, 'units'):
+        profile = profile.to(units).magnitude
+    elif len(profile) and hasattr(profile[0][0], 'units'):
+        profile = [[value.to(units).magnitude for value in point] for point in profile]
+
+    profile = np.asarray(profile, dtype=float)
+    if profile.ndim != 2 or profile.shape[1] != 2 or len(profile) < 2:
+        raise ValueError("a profile must be a sequence of at least two (x, y) points")
+    return profile
+
+
+class RevolvedSurface(object):
+    """
+    The triangulated surface made by revolving a 2D profile a full turn about an axis parallel to x, in the same way
+    as revolving a CadQuery polyline. Facets are generated a range of angular steps at a time, so fine meshes can be
+    streamed to disk without ever being held in memory whole.
+    """
+
+    def __init__(self, profile, segments=360, axis_y=0.0, closed=True, units='millimeter'):
+        """
+        :param profile: Sequence or (n, 2) array of (x, y) points, such as the points from chamber_profile, plain
+                        numbers or Quantities
+        :param segments: Number of angular steps around the axis
+        :param axis_y: y coordinate of the axis of revolution, in the same units as the profile
+        :param closed: True to join the last profile point back to the first, as for a solid's outline, False for an
+                       open curve such as a nozzle contour
+        :param units: Length units written out when the profile is given as Quantities
+        """
+
+        if segments < 3:
+            raise ValueError("a surface of revolution needs at least 3 segments")
+
+        points = _profile_array(profile, units)
+        if hasattr(axis_y, 'units'):
+            axis_y = axis_y.to(units).magnitude
+
+        self.segments = int(segments)
+        self.axis_y = float(axis_y)
+
+        start = points
+        end = np.roll(points, -1, axis=0)
+        if not closed:
+            start, end = start[:-1], end[:-1]
+
+        radius_start = start[:, 1] - self.axis_y
+        radius_end = end[:, 1] - self.axis_y
+
+        # Zero length edges contribute nothing, and an edge along the axis sweeps no area
+        on_axis_start = radius_start == 0
+        on_axis_end = radius_end == 0
+        keep = np.any(start != end, axis=1) & ~(on_axis_start & on_axis_end)
+
+        self._x = np.stack([start[keep, 0], end[keep, 0]], axis=1)
+        self._r = np.stack([radius_start[keep], radius_end[keep]], axis=1)
+
+        # Edges with one end on the axis sweep a cone of single triangles, the rest sweep quads of two triangles
+        self._quad = ~(on_axis_start[keep] | on_axis_end[keep])
+
+        # Keep facet normals pointing away from the enclosed volume whichever way round the outline was drawn, and
+        # whichever side of the axis it lies on
+        x, y = points[:, 0], np.abs(points[:, 1] - self.axis_y)
+        signed_area = 0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+        self._flip = closed and signed_area < 0
+
+    def __len__(self):
+        """The number of facets"""
+
+        return self.segments * int(np.sum(np.where(self._quad, 2, 1)))
+
+    def facets(self, chunk_segments=64):
+        """
+        Generates the facets a few angular steps at a time
+        :param chunk_segments: Angular steps per chunk, which bounds memory use to one chunk's facets
+        :return: Iterator of FACET_DTYPE record arrays
+        """
+
+        angles = np.linspace(0.0, 2.0 * np.pi, self.segments + 1)
+        angles[-1] = 0.0  # close the last step exactly onto the first
+
+        for first in range(0, self.segments, chunk_segments):
+            stop = min(first + chunk_segments, self.segments)
+            yield self._facets(angles[first:stop], angles[first + 1:stop + 1])
+
+    def _facets(self, angles_a, angles_b):
+        # Corners of each swept quad, shape (steps, edges, 3): edge start and end at the two angles of each step
+        def corner(end, angles):
+            r = self._r[np.newaxis, :, end]
+            return np.stack([np.broadcast_to(self._x[np.newaxis, :, end], (len(angles), len(self._x))),
+                             self.axis_y + r * np.cos(angles)[:, np.newaxis],
+                             r * np.sin(angles)[:, np.newaxis]], axis=-1)
+
+        start_a, end_a = corner(0, angles_a), corner(1, angles_a)
+        start_b, end_b = corner(0, angles_b), corner(1, angles_b)
+
+        # Every edge contributes (start_a, end_a, end_b), which degenerates when the edge ends on the axis, and
+        # (start_a, end_b, start_b), which degenerates when it starts there
+        first = np.stack([start_a, end_a, end_b], axis=-2)
+        second = np.stack([start_a, end_b, start_b], axis=-2)
+
+        ends_on_axis = self._r[:, 1] == 0
+        triangles = np.concatenate([first[:, ~ends_on_axis], second[:, self._quad | ends_on_axis]], axis=1)
+        triangles = triangles.reshape(-1, 3, 3)
+
+        if self._flip:
+            triangles = triangles[:, ::-1]
+
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        lengths = np.sqrt(np.sum(normals ** 2, axis=1))
+        normals /= np.where(lengths > 0, lengths, 1.0)[:, np.newaxis]
+
+        facets = np.zeros(len(triangles), dtype=FACET_DTYPE)
+        facets['normal'] = normals
+        facets['vertices'] = triangles
+        return facets
+
+    def write_stl(self, path_or_file, chunk_segments=64, header=b'Mach 30 surface of revolution'):
+        """
+        Streams the surface to a binary STL file
+        :param path_or_file: File name, or a file object opened for binary writing
+        :param chunk_segments: Angular steps generated and written at a time
+        :return: The number of facets written
+        """
+
+        if not hasattr(path_or_file, 'write'):
+            with open(path_or_file, 'wb') as f:
+                return self.write_stl(f, chunk_segments, header)
+
+        f = path_or_file
+        f.write(header[:HEADER_SIZE].ljust(HEADER_SIZE, b'\0'))
+        f.write(struct.pack('<I', len(self)))
+
+        count = 0
+        for facets in self.facets(chunk_segments):
+            f.write(facets.tobytes())
+            count += len(facets)
+        return count
+
+
+def write_revolved_stl(path_or_file, profile, segments=360, axis_y=0.0, closed=True, units='millimeter',
+                       chunk_segments=64):
+    """
+    Revolves a profile a full turn and streams the surface to a binary STL file, see RevolvedSurface
+    :return: The number of facets written
+    """
+
+    return RevolvedSurface(profile, segments, axis_y, closed, units).write_stl(path_or_file, chunk_segments)
+
+
+def read_stl(path_or_file):
+    """
+    Reads a binary STL file
+    :return: Array of FACET_DTYPE records
+    """
+
+    if not hasattr(path_or_file, 'read'):
+        with open(path_or_file, 'rb') as f:
+            return read_stl(f)
+
+    data = path_or_file.read()
+    count, = struct.unpack('<I', data[HEADER_SIZE:HEADER_SIZE + 4])
+    facets = np.frombuffer(data, dtype=FACET_DTYPE, offset=HEADER_SIZE + 4)
+    if len(facets) != count:
+        raise ValueError("STL header promises {0} facets but the file holds {1}".format(count, len(facets)))
+    return facets
@@ -0,0 +1,3 @@
+from .material_database import MaterialDatabase, load_materials
+
+__all__ = ["MaterialDatabase", "load_materials"]
@@ -0,0 +1,151 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import os
+
+import numpy as np
+
+from lib.pint_ext import PintExtUnitRegistry
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'materials.csv')
+
+_databases = {}
+
+
+def load_materials(path=None):
+    """
+    Gets the material database stored at path, parsing the file only the first time it is asked for
+    :param path: CSV file of material strengths, defaults to the bundled materials.csv
+    :return: A MaterialDatabase
+    """
+
+    path = os.path.abspath(path or DEFAULT_PATH)
+    if path not in _databases:
+        _databases[path] = MaterialDatabase(path)
+    return _databases[path]
+
+
+class MaterialDatabase(object):
+    """
+    Yield and ultimate strength of materials versus temperature. The whole table is held in a few contiguous arrays,
+    with each material's rows found through an index by name, so lookups never go back to the source file.
+    """
+
+    # Strength kinds that can be looked up, and the CSV column each comes from
+    KINDS = {'yield': 'yield_MPa', 'ultimate': 'ultimate_MPa'}
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.units = PintExtUnitRegistry()
+
+        names = []
+        columns = {'temperature_K': [], 'yield_MPa': [], 'ultimate_MPa': []}
+
+        with open(path) as f:
+            rows = csv.DictReader(line for line in f if not line.startswith('#'))
+            for row in rows:
+                names.append(row['material'].strip())
+                for column in columns:
+                    columns[column].append(float(row[column]))
+
+        self.temperature = np.array(columns['temperature_K'])
+        self.strength = dict((kind, np.array(columns[column])) for kind, column in self.KINDS.items())
+
+        # Rows of each material are contiguous in the file, index them as slices
+        self._index = {}
+        start = 0
+        for i in range(1, len(names) + 1):
+            if i == len(names) or names[i] != names[start]:
+                key = names[start].lower()
+                if key in self._index:
+                    raise ValueError("rows for {0} in {1} are not contiguous".format(names[start], path))
+                if np.any(np.diff(self.temperature[start:i]) <= 0):
+                    raise ValueError("temperatures for {0} in {1} must be increasing".format(names[start], path))
+                self._index[key] = (names[start], slice(start, i))
+                start = i
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return name.lower() in self._index
+
+    def names(self):
+        """The material names in the order they appear in the database"""
+
+        return [name for name, rows in sorted(self._index.values(), key=lambda entry: entry[1].start)]
+
+    def temperature_range(self, name):
+        """The lowest and highest tabulated temperatures for a material"""
+
+        rows = self._rows(name)
+        return (self.units.Quantity(self.temperature[rows][0], 'kelvin'),
+                self.units.Quantity(self.temperature[rows][-1], 'kelvin'))
+
+    def strength_at(self, name, temperature, kind='yield'):
+        """
+        Interpolates material strength linearly in temperature. Suitable for the material_strength argument of
+        PressureVessel, or of PressureVesselBatch when given arrays.
+        :param name: A material name, or an array of names the same shape as temperature
+        :param temperature: Wall temperature as a Quantity (any temperature units) or plain kelvin, scalar or array
+        :param kind: 'yield' or 'ultimate'
+        :return: The strength in megapascals, with the shape of the inputs
+        :raises: ValueError if a temperature is outside the tabulated range, strengths are not extrapolated
+        """
+
+        if kind not in self.KINDS:
+            raise ValueError("unknown strength kind '{0}', expected one of {1}".format(kind, sorted(self.KINDS)))
+
+        if hasattr(temperature, 'units'):
+            temperature = temperature.to(self.units.kelvin).magnitude
+        temperature = np.asarray(temperature, dtype=float)
+        strength = self.strength[kind]
+
+        if isinstance(name, str):
+            result = self._interpolate(name, temperature, strength)
+        else:
+            name, temperature = np.broadcast_arrays(np.asarray(name), temperature)
+            result = np.empty(temperature.shape)
+            for material in np.unique(name):
+                selected = name == material
+                result[selected] = self._interpolate(str(material), temperature[selected], strength)
+
+        return self.units.Quantity(result if result.ndim else float(result), 'megapascal')
+
+    def yield_strength(self, name, temperature):
+        """Interpolates the yield strength of a material at a temperature, see strength_at"""
+
+        return self.strength_at(name, temperature, 'yield')
+
+    def ultimate_strength(self, name, temperature):
+        """Interpolates the ultimate strength of a material at a temperature, see strength_at"""
+
+        return self.strength_at(name, temperature, 'ultimate')
+
+    def _rows(self, name):
+        try:
+            return self._index[name.lower()][1]
+        except KeyError:
+            raise KeyError("no material named '{0}' in {1}".format(name, self.path))
+
+    def _interpolate(self, name, temperature, strength):
+        rows = self._rows(name)
+        temperatures = self.temperature[rows]
+
+        if np.any(temperature < temperatures[0]) or np.any(temperature > temperatures[-1]):
+            raise ValueError("temperature outside the {0:g} K to {1:g} K tabulated for {2}".format(
+                temperatures[0], temperatures[-1], self._index[name.lower()][0]))
+
+        return np.interp(temperature, temperatures, strength[rows])
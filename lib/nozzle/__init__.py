@@ -0,0 +1,9 @@
+from .bell import bell_contour, bell_length, rao_angles
+from .isentropic import area_ratio, mach_angle, prandtl_meyer, inverse_prandtl_meyer, temperature_ratio, \
+    pressure_ratio, density_ratio, isentropic_table, mach_from_area_ratio, AreaMachTable
+from .moc import CharacteristicMesh, aerospike_contour, minimum_length_nozzle
+
+__all__ = ["bell_contour", "bell_length", "rao_angles", "area_ratio", "mach_angle", "prandtl_meyer",
+           "inverse_prandtl_meyer", "temperature_ratio", "pressure_ratio", "density_ratio", "isentropic_table",
+           "mach_from_area_ratio", "AreaMachTable", "CharacteristicMesh", "aerospike_contour",
+           "minimum_length_nozzle"]
@@ -0,0 +1,203 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Rao's thrust optimized parabolic (TOP) approximation of a bell nozzle: a circular arc of 1.5 throat radii into the
+# throat, a circular arc of 0.382 throat radii out of it, and a parabola from the end of that arc to the exit.
+
+import numpy as np
+
+# Bell length as a fraction of a 15 degree conical nozzle with the same expansion ratio is measured against this angle
+CONE_HALF_ANGLE = np.radians(15.0)
+
+ENTRANCE_ARC = 1.5   # radius of the converging throat arc, in throat radii
+EXIT_ARC = 0.382     # radius of the diverging throat arc, in throat radii
+
+# Parabola start (theta_n) and exit (theta_e) wall angles in degrees against expansion ratio, for bells of 60%, 80%
+# and 90% of the conical length. Approximate values read from Rao's optimum contour charts; pass theta_n and theta_e
+# to bell_contour to use figures from a different source.
+RAO_EXPANSION_RATIOS = np.array([4.0, 5.0, 10.0, 20.0, 30.0, 40.0, 50.0, 100.0])
+RAO_FRACTIONAL_LENGTHS = np.array([0.6, 0.8, 0.9])
+RAO_THETA_N = np.array([[26.5, 28.0, 32.0, 35.0, 36.5, 37.5, 38.0, 40.0],
+                        [21.5, 23.0, 26.5, 29.5, 31.0, 32.0, 33.0, 35.0],
+                        [19.0, 20.0, 23.0, 26.0, 27.5, 28.5, 29.0, 31.0]])
+RAO_THETA_E = np.array([[20.5, 20.0, 18.0, 16.0, 15.0, 14.5, 14.0, 13.0],
+                        [14.0, 13.0, 11.0, 9.0, 8.0, 7.5, 7.0, 6.0],
+                        [11.5, 10.5, 8.5, 6.5, 6.0, 5.5, 5.0, 4.5]])
+
+# Dense samples per section used to place the output points
+_DENSE_SAMPLES = 512
+
+
+def rao_angles(expansion_ratio, fractional_length=0.8):
+    """
+    Interpolates the parabola wall angles from Rao's charts, linearly in log expansion ratio and in fractional length
+    :param expansion_ratio: Exit to throat area ratio, scalar or array
+    :param fractional_length: Bell length as a fraction of a 15 degree cone, from 0.6 to 0.9, scalar or array
+    :return: (theta_n, theta_e) in radians, broadcast to the shape of the inputs
+    :raises: ValueError outside the range of the charts
+    """
+
+    expansion_ratio, fractional_length = np.broadcast_arrays(np.asarray(expansion_ratio, dtype=float),
+                                                             np.asarray(fractional_length, dtype=float))
+
+    if np.any(expansion_ratio < RAO_EXPANSION_RATIOS[0]) or np.any(expansion_ratio > RAO_EXPANSION_RATIOS[-1]):
+        raise ValueError("expansion ratios from {0:g} to {1:g} are covered by the charts".format(
+            RAO_EXPANSION_RATIOS[0], RAO_EXPANSION_RATIOS[-1]))
+    if np.any(fractional_length < RAO_FRACTIONAL_LENGTHS[0]) or \
+            np.any(fractional_length > RAO_FRACTIONAL_LENGTHS[-1]):
+        raise ValueError("fractional lengths from {0:g} to {1:g} are covered by the charts".format(
+            RAO_FRACTIONAL_LENGTHS[0], RAO_FRACTIONAL_LENGTHS[-1]))
+
+    log_ratios = np.log(RAO_EXPANSION_RATIOS)
+    log_ratio = np.log(expansion_ratio)
+
+    def interpolate(table):
+        # Along expansion ratio for every charted length, then between the two lengths either side
+        by_length = np.array([np.interp(log_ratio, log_ratios, row) for row in table])
+        upper = np.clip(np.searchsorted(RAO_FRACTIONAL_LENGTHS, fractional_length), 1, len(RAO_FRACTIONAL_LENGTHS) - 1)
+        lower = upper - 1
+        weight = (fractional_length - RAO_FRACTIONAL_LENGTHS[lower]) / \
+                 (RAO_FRACTIONAL_LENGTHS[upper] - RAO_FRACTIONAL_LENGTHS[lower])
+        low = np.take_along_axis(by_length, lower[np.newaxis], 0)[0]
+        high = np.take_along_axis(by_length, upper[np.newaxis], 0)[0]
+        return np.radians(low + weight * (high - low))
+
+    return interpolate(RAO_THETA_N), interpolate(RAO_THETA_E)
+
+
+def bell_length(throat_radius, expansion_ratio, fractional_length=0.8):
+    """The axial length from the throat to the exit of the bell"""
+
+    return fractional_length * (np.sqrt(expansion_ratio) - 1.0) * throat_radius / np.tan(CONE_HALF_ANGLE)
+
+
+class _BellSections(object):
+    """The three sections of each nozzle's contour, in throat radii, evaluated at a parameter u from 0 to 3"""
+
+    def __init__(self, expansion_ratio, fractional_length, theta_n, theta_e, entrance_angle):
+        self.entrance_start = -np.pi / 2.0 - entrance_angle
+        self.theta_n = theta_n
+
+        # Start and end of the parabola, and the control point where their tangent lines cross
+        nx = EXIT_ARC * np.cos(theta_n - np.pi / 2.0)
+        ny = EXIT_ARC * np.sin(theta_n - np.pi / 2.0) + EXIT_ARC + 1.0
+        ex = bell_length(1.0, expansion_ratio, fractional_length)
+        ey = np.sqrt(expansion_ratio)
+        m1, m2 = np.tan(theta_n), np.tan(theta_e)
+        c1, c2 = ny - m1 * nx, ey - m2 * ex
+
+        self.n = np.stack([nx, ny], axis=-1)
+        self.q = np.stack([(c2 - c1) / (m1 - m2), (m1 * c2 - m2 * c1) / (m1 - m2)], axis=-1)
+        self.e = np.stack([ex, ey], axis=-1)
+
+    def points(self, u):
+        """Contour points for parameters u of shape (nozzles, samples)"""
+
+        section = np.clip(np.floor(u), 0, 2)
+        s = (u - section)[..., np.newaxis]
+        section = section[..., np.newaxis]
+
+        # Converging arc, from the entrance angle down to the throat
+        angle = self.entrance_start[:, np.newaxis, np.newaxis] + s * (
+            -np.pi / 2.0 - self.entrance_start[:, np.newaxis, np.newaxis])
+        entrance = np.concatenate([ENTRANCE_ARC * np.cos(angle), ENTRANCE_ARC * np.sin(angle) + ENTRANCE_ARC + 1.0],
+                                  axis=-1)
+
+        # Diverging arc, from the throat round to theta_n
+        angle = -np.pi / 2.0 + s * self.theta_n[:, np.newaxis, np.newaxis]
+        throat = np.concatenate([EXIT_ARC * np.cos(angle), EXIT_ARC * np.sin(angle) + EXIT_ARC + 1.0], axis=-1)
+
+        # Quadratic Bezier from the end of the throat arc to the exit
+        n, q, e = [point[:, np.newaxis, :] for point in (self.n, self.q, self.e)]
+        bell = (1.0 - s) ** 2 * n + 2.0 * (1.0 - s) * s * q + s ** 2 * e
+
+        return np.where(section == 0, entrance, np.where(section == 1, throat, bell))
+
+
+def _radians(angle):
+    return angle.to('radian').magnitude if hasattr(angle, 'units') else angle
+
+
+def bell_contour(throat_radius, expansion_ratio, fractional_length=0.8, n_points=200, theta_n=None, theta_e=None,
+                 entrance_angle=np.radians(45.0), angle_fraction=0.5):
+    """
+    Generates Rao bell nozzle wall contours for one nozzle or a whole family at once. Points are spread along each
+    contour by a blend of arc length and turning angle, so they gather around the throat where the wall curves most.
+    :param throat_radius: Throat radius, a Quantity or plain number, scalar or array
+    :param expansion_ratio: Exit to throat area ratio, scalar or array
+    :param fractional_length: Bell length as a fraction of a 15 degree cone, scalar or array
+    :param n_points: Points per contour
+    :param theta_n: Wall angle at the start of the parabola in radians, looked up with rao_angles when None
+    :param theta_e: Wall angle at the exit in radians, looked up with rao_angles when None
+    :param entrance_angle: Half angle of the converging section where the entrance arc starts, in radians
+    :param angle_fraction: Share of the points spread by turning angle rather than by arc length, 0 for evenly spaced
+                           points
+    :return: Array of shape broadcast(inputs) + (n_points, 2) of (x, y) points, x along the axis from the throat and
+             y the wall radius, in the units of throat_radius
+    """
+
+    if n_points < 2:
+        raise ValueError("a contour needs at least 2 points")
+    if not 0.0 <= angle_fraction < 1.0:
+        raise ValueError("angle_fraction must be at least 0 and less than 1")
+
+    theta_n, theta_e, entrance_angle = [_radians(angle) for angle in (theta_n, theta_e, entrance_angle)]
+
+    units = getattr(throat_radius, 'units', None)
+    if units is not None:
+        throat_radius = throat_radius.magnitude
+
+    arrays = [np.asarray(value, dtype=float) for value in (throat_radius, expansion_ratio, fractional_length)]
+    if theta_n is None or theta_e is None:
+        chart_n, chart_e = rao_angles(arrays[1], arrays[2])
+        theta_n = chart_n if theta_n is None else theta_n
+        theta_e = chart_e if theta_e is None else theta_e
+    arrays += [np.asarray(value, dtype=float) for value in (theta_n, theta_e, entrance_angle)]
+
+    arrays = np.broadcast_arrays(*arrays)
+    shape = arrays[0].shape
+    throat_radius, expansion_ratio, fractional_length, theta_n, theta_e, entrance_angle = \
+        [array.ravel() for array in arrays]
+
+    if np.any(expansion_ratio <= 1.0):
+        raise ValueError("the expansion ratio must be greater than 1")
+    if np.any(theta_e >= theta_n):
+        raise ValueError("the exit angle must be smaller than the angle at the start of the parabola")
+
+    sections = _BellSections(expansion_ratio, fractional_length, theta_n, theta_e, entrance_angle)
+
+    # Measure each contour on a dense parameter grid, then place the points evenly in that measure
+    u = np.linspace(0.0, 3.0, 3 * _DENSE_SAMPLES + 1)
+    dense = sections.points(np.broadcast_to(u, (len(throat_radius), len(u))))
+    step = np.diff(dense, axis=1)
+    heading = np.arctan2(step[..., 1], step[..., 0])
+    turning = np.abs(np.diff(heading, axis=1, prepend=heading[:, :1]))
+
+    def normalized_cumsum(values):
+        total = np.concatenate([np.zeros((len(values), 1)), np.cumsum(values, axis=1)], axis=1)
+        return total / np.where(total[:, -1:] > 0, total[:, -1:], 1.0)
+
+    measure = (1.0 - angle_fraction) * normalized_cumsum(np.hypot(step[..., 0], step[..., 1])) + \
+        angle_fraction * normalized_cumsum(turning)
+
+    # Invert every contour's measure with a single interpolation, by spacing the rows apart so they never overlap
+    offsets = 2.0 * np.arange(len(throat_radius))[:, np.newaxis]
+    targets = np.linspace(0.0, 1.0, n_points)[np.newaxis, :] + offsets
+    u_out = np.interp(targets.ravel(), (measure + offsets).ravel(), np.tile(u, len(throat_radius)))
+    u_out = u_out.reshape(len(throat_radius), n_points)
+
+    points = sections.points(u_out) * throat_radius[:, np.newaxis, np.newaxis]
+    points = points.reshape(shape + (n_points, 2))
+
+    return points if units is None else points * units
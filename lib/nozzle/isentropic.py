@@ -0,0 +1,258 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Isentropic flow relations of a calorically perfect gas, element-wise over scalars or NumPy arrays. Angles are in
+# radians.
+
+import numpy as np
+
+
+def temperature_ratio(mach, gamma=1.4):
+    """Static over stagnation temperature, T/T0, at a Mach number"""
+
+    return 1.0 / (1.0 + 0.5 * (gamma - 1.0) * np.asarray(mach, dtype=float) ** 2)
+
+
+def pressure_ratio(mach, gamma=1.4):
+    """Static over stagnation pressure, p/p0, at a Mach number"""
+
+    return temperature_ratio(mach, gamma) ** (gamma / (gamma - 1.0))
+
+
+def density_ratio(mach, gamma=1.4):
+    """Static over stagnation density, rho/rho0, at a Mach number"""
+
+    return temperature_ratio(mach, gamma) ** (1.0 / (gamma - 1.0))
+
+
+def area_ratio(mach, gamma=1.4):
+    """The flow area over the sonic throat area, A/A*, at a Mach number"""
+
+    mach = np.asarray(mach, dtype=float)
+    exponent = (gamma + 1.0) / (2.0 * (gamma - 1.0))
+    return (2.0 / (gamma + 1.0) * (1.0 + 0.5 * (gamma - 1.0) * mach ** 2)) ** exponent / mach
+
+
+def isentropic_table(mach, gamma=1.4):
+    """
+    Tabulates the isentropic flow ratios
+    :param mach: Mach numbers, scalar or array
+    :param gamma: Ratio of specific heats, scalar or array broadcasting with mach
+    :return: Record array of the broadcast shape with fields mach, temperature_ratio, pressure_ratio, density_ratio
+             and area_ratio
+    """
+
+    mach, gamma = np.broadcast_arrays(np.asarray(mach, dtype=float), np.asarray(gamma, dtype=float))
+    table = np.recarray(mach.shape, dtype=[(name, float) for name in ('mach', 'temperature_ratio', 'pressure_ratio',
+                                                                      'density_ratio', 'area_ratio')])
+    table.mach = mach
+    table.temperature_ratio = temperature_ratio(mach, gamma)
+    table.pressure_ratio = pressure_ratio(mach, gamma)
+    table.density_ratio = density_ratio(mach, gamma)
+    table.area_ratio = area_ratio(mach, gamma)
+    return table
+
+
+def _log_area_ratio(mach, gamma):
+    """ln(A/A*), written so it keeps its precision close to Mach 1"""
+
+    exponent = (gamma + 1.0) / (2.0 * (gamma - 1.0))
+    return exponent * np.log1p((gamma - 1.0) * (mach ** 2 - 1.0) / (gamma + 1.0)) - np.log(mach)
+
+
+def _sonic_coordinate(mach, gamma):
+    """
+    h(M) = sign(M - 1) sqrt(ln(A/A*)) and dh/dM. A/A* has a double root at Mach 1, h is smooth and increasing through
+    it, which makes it the variable to run Newton's method in for both branches.
+    """
+
+    log_ratio = np.maximum(_log_area_ratio(mach, gamma), 0.0)
+    root = np.sqrt(log_ratio)
+    h = np.sign(mach - 1.0) * root
+    slope = (mach ** 2 - 1.0) / (mach * (1.0 + 0.5 * (gamma - 1.0) * mach ** 2))
+    sonic_slope = np.sqrt(2.0 / (gamma + 1.0))
+    near_sonic = np.abs(mach - 1.0) < 1e-6
+    dh = np.where(near_sonic, sonic_slope, np.abs(slope) / (2.0 * np.where(near_sonic, 1.0, root)))
+    return h, dh
+
+
+def mach_from_area_ratio(ratio, gamma=1.4, supersonic=True, tolerance=1e-12, max_iterations=50):
+    """
+    Finds the Mach number at an area ratio A/A*, element-wise over arrays of area ratio and gamma. Newton's method is
+    run on h = sign(M - 1) sqrt(ln(A/A*)), which has no double root at Mach 1, kept inside bounds on the root that
+    hold for any gamma and falling back to bisection whenever a step leaves them. It takes about 5 iterations.
+    :param ratio: Area ratios of at least 1
+    :param gamma: Ratio of specific heats, broadcasting with ratio
+    :param supersonic: True for the supersonic branch, False for the subsonic one, or a boolean array broadcasting
+                       with ratio
+    :param tolerance: Largest allowed relative error in the area ratio of the Mach numbers found
+    :return: The Mach numbers, the broadcast shape of the inputs
+    :raises: ValueError for area ratios below 1, or if the iteration does not converge
+    """
+
+    ratio, gamma, supersonic = np.broadcast_arrays(np.asarray(ratio, dtype=float), np.asarray(gamma, dtype=float),
+                                                   np.asarray(supersonic, dtype=bool))
+    if np.any(ratio < 1.0):
+        raise ValueError("area ratios must be at least 1")
+
+    exponent = (gamma + 1.0) / (2.0 * (gamma - 1.0))
+    log_ratio = np.log(ratio)
+    target = np.where(supersonic, 1.0, -1.0) * np.sqrt(log_ratio)
+
+    # Above Mach 1, A/A* > ((gamma - 1) / (gamma + 1))^e M^(2 / (gamma - 1)), and below it
+    # (2 / (gamma + 1))^e / M < A/A* < 1 / M, which bound the root on each branch
+    upper = (ratio * ((gamma + 1.0) / (gamma - 1.0)) ** exponent) ** (0.5 * (gamma - 1.0))
+    low = np.where(supersonic, 1.0, (2.0 / (gamma + 1.0)) ** exponent / ratio)
+    high = np.where(supersonic, np.maximum(upper, 1.0), np.minimum(1.0 / ratio, 1.0))
+
+    # Newton's method runs in x = ln(M), in which h is close to linear on both branches, starting from the expansion
+    # about Mach 1, h ~ sqrt(2 / (gamma + 1)) (M - 1), or from the supersonic bound far above Mach 1
+    low, high = np.log(low), np.log(high)
+    x = np.log1p(np.maximum(target * np.sqrt(0.5 * (gamma + 1.0)), -0.5))
+    x = np.clip(np.where(log_ratio > 1.0, high, x), low, high)
+
+    for _ in range(max_iterations):
+        mach = np.exp(x)
+        h, dh = _sonic_coordinate(mach, gamma)
+        residual = h - target
+        # The relative error in the area ratio is about |ln(A/A*(M)) - ln(ratio)| = |h^2 - target^2|
+        if np.all(np.abs(residual * (h + target)) <= tolerance):
+            break
+
+        above = residual > 0
+        high = np.where(above, x, high)
+        low = np.where(above, low, x)
+        step = x - residual / (mach * dh)
+        inside = (step > low) & (step < high)
+        x = np.where(residual == 0, x, np.where(inside, step, 0.5 * (low + high)))
+    else:
+        raise ValueError("the area ratio inversion did not converge in {0} iterations".format(max_iterations))
+
+    return mach
+
+
+class AreaMachTable(object):
+    """
+    A precomputed area ratio to Mach number lookup for one gas and branch, for loops that invert the same relation
+    many times. The table is spaced evenly in sqrt(ln(A/A*)), in which Mach number varies smoothly, and interpolated
+    by cubic Hermite polynomials using the exact slopes, so it is far more accurate than linear interpolation in area
+    ratio for the same size. The largest relative error in area ratio, measured halfway between table entries when it
+    is built, is kept in the tolerance attribute.
+    """
+
+    def __init__(self, gamma=1.4, supersonic=True, max_area_ratio=1000.0, size=2048):
+        """
+        :param gamma: Ratio of specific heats
+        :param supersonic: True for the supersonic branch, False for the subsonic one
+        :param max_area_ratio: Largest area ratio the table covers
+        :param size: Number of table entries
+        """
+
+        if max_area_ratio <= 1.0:
+            raise ValueError("the table must reach an area ratio above 1")
+        if size < 2:
+            raise ValueError("a table needs at least 2 entries")
+
+        self.gamma = float(gamma)
+        self.supersonic = bool(supersonic)
+        self.max_area_ratio = float(max_area_ratio)
+
+        self._sign = 1.0 if self.supersonic else -1.0
+        self._h = self._sign * np.linspace(0.0, np.sqrt(np.log(self.max_area_ratio)), size)
+        self._step = self._h[1] - self._h[0]
+        self._mach = mach_from_area_ratio(np.exp(self._h ** 2), self.gamma, self.supersonic)
+        self._slope = 1.0 / _sonic_coordinate(self._mach, self.gamma)[1]
+
+        midpoints = 0.5 * (self._h[1:] + self._h[:-1])
+        ratio = np.exp(midpoints ** 2)
+        self.tolerance = float(np.max(np.abs(area_ratio(self(ratio), self.gamma) / ratio - 1.0)))
+
+    def __call__(self, ratio):
+        """
+        Looks up the Mach numbers at area ratios
+        :param ratio: Area ratios from 1 up to max_area_ratio, any shape
+        :return: The Mach numbers, shaped as ratio
+        """
+
+        ratio = np.asarray(ratio, dtype=float)
+        if np.any(ratio < 1.0) or np.any(ratio > self.max_area_ratio):
+            raise ValueError("the table covers area ratios from 1 to {0:g}".format(self.max_area_ratio))
+
+        h = self._sign * np.sqrt(np.log(ratio))
+        position = np.clip((h - self._h[0]) / self._step, 0.0, len(self._h) - 1.0)
+        index = np.minimum(position.astype(int), len(self._h) - 2)
+        t = position - index
+
+        # Cubic Hermite basis on the interval from entry index to index + 1
+        t2, t3 = t * t, t * t * t
+        return (2.0 * t3 - 3.0 * t2 + 1.0) * self._mach[index] + \
+            (t3 - 2.0 * t2 + t) * self._step * self._slope[index] + \
+            (-2.0 * t3 + 3.0 * t2) * self._mach[index + 1] + (t3 - t2) * self._step * self._slope[index + 1]
+
+
+def mach_angle(mach):
+    """The Mach angle, asin(1 / M), of supersonic flow"""
+
+    return np.arcsin(1.0 / np.asarray(mach, dtype=float))
+
+
+def prandtl_meyer(mach, gamma=1.4):
+    """The Prandtl-Meyer angle nu(M), the angle supersonic flow turns through expanding from Mach 1 to M"""
+
+    beta = np.sqrt(np.asarray(mach, dtype=float) ** 2 - 1.0)
+    k = np.sqrt((gamma + 1.0) / (gamma - 1.0))
+    return k * np.arctan(beta / k) - np.arctan(beta)
+
+
+def max_prandtl_meyer(gamma=1.4):
+    """The Prandtl-Meyer angle as the Mach number goes to infinity"""
+
+    return 0.5 * np.pi * (np.sqrt((gamma + 1.0) / (gamma - 1.0)) - 1.0)
+
+
+def inverse_prandtl_meyer(nu, gamma=1.4, tolerance=1e-12, max_iterations=50):
+    """
+    Finds the Mach number with a given Prandtl-Meyer angle, element-wise over arrays. Newton's method is run on
+    beta = sqrt(M^2 - 1), where nu is smooth, starting from Hall's rational approximation.
+    :param nu: Prandtl-Meyer angles from 0 up to max_prandtl_meyer(gamma)
+    :return: The Mach numbers, the shape of nu
+    :raises: ValueError for angles outside that range, or if the iteration does not converge
+    """
+
+    nu = np.asarray(nu, dtype=float)
+    nu_max = max_prandtl_meyer(gamma)
+    if np.any(nu < 0) or np.any(nu >= nu_max):
+        raise ValueError("Prandtl-Meyer angles must be from 0 up to {0:g} radians for gamma {1:g}".format(
+            nu_max, gamma))
+
+    # Hall (1975), fitted for gamma 1.4 but a good start for any gamma once nu is scaled by its maximum
+    y = (nu / nu_max) ** (2.0 / 3.0)
+    mach = (1.0 + 1.3604 * y + 0.0962 * y ** 2 - 0.5127 * y ** 3) / (1.0 - 0.6722 * y - 0.3278 * y ** 2)
+    beta = np.sqrt(np.maximum(mach ** 2 - 1.0, 0.0))
+
+    k2 = (gamma + 1.0) / (gamma - 1.0)
+    k = np.sqrt(k2)
+    for _ in range(max_iterations):
+        residual = k * np.arctan(beta / k) - np.arctan(beta) - nu
+        if np.all(np.abs(residual) <= tolerance):
+            break
+        slope = (k2 - 1.0) * beta ** 2 / ((k2 + beta ** 2) * (1.0 + beta ** 2))
+        step = np.where(slope > 0, residual / np.where(slope > 0, slope, 1.0), 0.0)
+        # Never step past zero, nu only has a root at beta >= 0
+        beta = np.where(step < beta, beta - step, 0.5 * beta)
+        beta = np.where(nu == 0, 0.0, beta)
+    else:
+        raise ValueError("the Prandtl-Meyer inversion did not converge in {0} iterations".format(max_iterations))
+
+    return np.sqrt(1.0 + beta ** 2)
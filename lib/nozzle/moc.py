@@ -0,0 +1,236 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Method of characteristics nozzle contours: aerospike spikes from the expansion fan at the cowl lip, and planar
+# minimum length nozzles from a full characteristic mesh. Angles are in radians.
+
+import numpy as np
+
+from .isentropic import area_ratio, inverse_prandtl_meyer, mach_angle, prandtl_meyer
+
+
+def _spike_geometry(nu, nu_e, area_ratio_e, lip_radius, gamma):
+    """Axial position and radius where the characteristic of Prandtl-Meyer angle nu leaving the lip meets the spike"""
+
+    mach = inverse_prandtl_meyer(nu, gamma)
+    mu = mach_angle(mach)
+
+    # The characteristic leaves the lip at alpha to the axis, and the annular cone it sweeps out to the spike must
+    # pass the flow at this Mach number: pi (2 Re - l sin(alpha)) l sin(mu) = A*(M) = pi Re^2 A/A*(M) / A/A*(Me).
+    # The smaller root is written so it does not lose precision as the square root goes to zero at the tip.
+    alpha = nu_e - nu + mu
+    sin_alpha = np.sin(alpha)
+    fraction = area_ratio(mach, gamma) / (area_ratio_e * np.sin(mu))
+    length = lip_radius * fraction / (1.0 + np.sqrt(np.maximum(1.0 - fraction * sin_alpha, 0.0)))
+
+    return length * np.cos(alpha), lip_radius - length * sin_alpha
+
+
+def aerospike_contour(exit_mach, gamma=1.4, lip_radius=1.0, n_points=100, length_fraction=1.0):
+    """
+    Designs an axisymmetric aerospike for isentropic expansion to exit_mach with all the turning done by a centred
+    expansion fan at the cowl lip (Angelino's approximation). Each spike point is where one characteristic of the fan
+    meets the spike, so the points are evenly spaced in flow turning. Every input broadcasts, so whole families of
+    spikes are designed at once.
+    :param exit_mach: Design exit Mach number
+    :param gamma: Ratio of specific heats
+    :param lip_radius: Radius of the cowl lip, which is also the radius of the exit, a Quantity or plain number
+    :param n_points: Points per spike contour
+    :param length_fraction: Fraction of the full (pointed) spike length to keep, below 1 for a truncated spike
+    :return: Array of shape broadcast(inputs) + (n_points, 2) of (x, r) points, x along the axis measured from the
+             lip and r the spike radius, in the units of lip_radius. The first point is on the sonic line, which runs
+             from the lip at (0, lip_radius), and the last is the tip or the truncated base.
+    """
+
+    if n_points < 2:
+        raise ValueError("a contour needs at least 2 points")
+    units = getattr(lip_radius, 'units', None)
+    if units is not None:
+        lip_radius = lip_radius.magnitude
+
+    exit_mach, gamma, lip_radius, length_fraction = np.broadcast_arrays(
+        *[np.asarray(value, dtype=float) for value in (exit_mach, gamma, lip_radius, length_fraction)])
+    if np.any(exit_mach <= 1.0):
+        raise ValueError("the exit Mach number must be supersonic")
+    if np.any(length_fraction <= 0.0) or np.any(length_fraction > 1.0):
+        raise ValueError("length_fraction must be greater than 0 and at most 1")
+
+    shape = exit_mach.shape
+    exit_mach, gamma, lip_radius, length_fraction = [value.ravel()[:, np.newaxis] for value in
+                                                     (exit_mach, gamma, lip_radius, length_fraction)]
+    nu_e = prandtl_meyer(exit_mach, gamma)
+    area_ratio_e = area_ratio(exit_mach, gamma)
+
+    def geometry(nu):
+        return _spike_geometry(nu, nu_e, area_ratio_e, lip_radius, gamma)
+
+    # A truncated spike ends at the characteristic that meets it at the cut, found by bisection on nu since x grows
+    # monotonically along the spike
+    nu_end = nu_e
+    if np.any(length_fraction < 1.0):
+        x_throat, _ = geometry(np.zeros_like(nu_e))
+        x_tip, _ = geometry(nu_e)
+        x_cut = x_throat + length_fraction * (x_tip - x_throat)
+        low, high = np.zeros_like(nu_e), nu_e.copy()
+        for _ in range(60):
+            middle = 0.5 * (low + high)
+            beyond = geometry(middle)[0] > x_cut
+            high = np.where(beyond, middle, high)
+            low = np.where(beyond, low, middle)
+        nu_end = np.where(length_fraction < 1.0, high, nu_e)
+
+    x, r = geometry(np.linspace(0.0, 1.0, n_points)[np.newaxis, :] * nu_end)
+    points = np.stack([x, r], axis=-1).reshape(shape + (n_points, 2))
+
+    return points if units is None else points * units
+
+
+class CharacteristicMesh(object):
+    """
+    The characteristic net of a planar minimum length nozzle. The i-th C- characteristic leaves the sharp throat
+    corner at flow angle theta_i = (i + 1) theta_max / n, reflects off the centreline and returns to the wall as the
+    i-th C+ characteristic. Mesh point (i, j), j <= i, is where C- characteristic i crosses C+ characteristic j, with
+    j == i on the centreline.
+
+    Along each characteristic the Riemann invariants are constant, so in planar flow every point's flow angle and
+    Prandtl-Meyer angle follow directly from its indices: theta = theta_i - theta_j and nu = theta_i + theta_j. Only
+    the positions have to be marched, which is done one anti-diagonal (i + j) at a time, vectorized along it.
+    """
+
+    def __init__(self, exit_mach, gamma=1.4, throat_half_height=1.0, n_characteristics=100, keep_mesh=True):
+        """
+        :param exit_mach: Design exit Mach number
+        :param gamma: Ratio of specific heats
+        :param throat_half_height: Distance from the centreline to the throat corner
+        :param n_characteristics: Number of characteristics in the expansion fan at the corner
+        :param keep_mesh: False to keep only the wall, so memory grows with n rather than n^2
+        """
+
+        if exit_mach <= 1.0:
+            raise ValueError("the exit Mach number must be supersonic")
+        if n_characteristics < 1:
+            raise ValueError("at least one characteristic is needed")
+
+        n = self.n = int(n_characteristics)
+        self.exit_mach = float(exit_mach)
+        self.gamma = float(gamma)
+        self.throat_half_height = float(throat_half_height)
+
+        # Half the turning happens in the corner fan, the other half on the reflections
+        self.theta_max = 0.5 * prandtl_meyer(exit_mach, gamma)
+        self.theta_fan = self.theta_max * np.arange(1, n + 1) / n
+
+        # Every Prandtl-Meyer angle in the mesh is a multiple of theta_max / n, so invert them all at once
+        self._mach = np.concatenate([[1.0], inverse_prandtl_meyer(self.theta_max * np.arange(1, 2 * n + 1) / n,
+                                                                  gamma)])
+        self._mu = mach_angle(self._mach)
+
+        self.x = self.y = None
+        if keep_mesh:
+            self.x = np.full((n, n), np.nan)
+            self.y = np.full((n, n), np.nan)
+
+        self.wall = self._march(keep_mesh)
+
+    def mach(self, i, j):
+        """Mach number at mesh points (i, j)"""
+
+        return self._mach[np.asarray(i) + np.asarray(j) + 2]
+
+    def theta(self, i, j):
+        """Flow angle at mesh points (i, j)"""
+
+        return self.theta_fan[i] - self.theta_fan[j]
+
+    def _march(self, keep_mesh):
+        n = self.n
+        theta_fan = self.theta_fan
+        h = self.throat_half_height
+
+        # Corner point of each C- characteristic: the fan is centred on the throat corner with nu equal to theta
+        corner_mu = self._mu[np.arange(1, n + 1)]
+
+        previous_x = np.full(n, np.nan)
+        previous_y = np.full(n, np.nan)
+        last_row_x = np.empty(n)
+        last_row_y = np.empty(n)
+
+        for d in range(2 * n - 1):
+            i = np.arange((d + 1) // 2, min(n - 1, d) + 1)
+            j = d - i
+            theta = theta_fan[i] - theta_fan[j]
+            mu = self._mu[d + 2]
+
+            # Back along C- to (i, j - 1), or to the corner for j == 0
+            first = j == 0
+            x1 = np.where(first, 0.0, previous_x[i])
+            y1 = np.where(first, h, previous_y[i])
+            theta1 = np.where(first, theta_fan[i], theta_fan[i] - theta_fan[np.maximum(j - 1, 0)])
+            mu1 = np.where(first, corner_mu[i], self._mu[d + 1])
+            m1 = np.tan(0.5 * (theta1 - mu1 + theta - mu))
+
+            # Back along C+ to (i - 1, j), except on the centreline where the point is found from C- alone
+            centre = j == i
+            back = np.maximum(i - 1, 0)
+            x2, y2 = previous_x[back], previous_y[back]
+            theta2 = theta_fan[back] - theta_fan[j]
+            m2 = np.tan(0.5 * (theta2 + self._mu[d + 1] + theta + mu))
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                x = np.where(centre, x1 - y1 / m1, (y2 - y1 + m1 * x1 - m2 * x2) / (m1 - m2))
+            y = np.where(centre, 0.0, y1 + m1 * (x - x1))
+
+            previous_x = np.full(n, np.nan)
+            previous_y = np.full(n, np.nan)
+            previous_x[i] = x
+            previous_y[i] = y
+
+            if keep_mesh:
+                self.x[i, j] = x
+                self.y[i, j] = y
+
+            last = i == n - 1
+            last_row_x[j[last]] = x[last]
+            last_row_y[j[last]] = y[last]
+
+        # The wall turns the flow back along each C+ characteristic as it leaves the last C- characteristic, where
+        # the flow is uniform along it so the C+ line is straight
+        wall = np.empty((n + 1, 2))
+        wall[0] = (0.0, h)
+        wall_theta = self.theta_max
+        for j in range(n):
+            theta = theta_fan[n - 1] - theta_fan[j]
+            m_wall = np.tan(0.5 * (wall_theta + theta))
+            m_char = np.tan(theta + self._mu[n + 1 + j])
+            x0, y0 = wall[j]
+            x = (last_row_y[j] - y0 + m_wall * x0 - m_char * last_row_x[j]) / (m_wall - m_char)
+            wall[j + 1] = (x, y0 + m_wall * (x - x0))
+            wall_theta = theta
+
+        return wall
+
+
+def minimum_length_nozzle(exit_mach, gamma=1.4, throat_half_height=1.0, n_characteristics=100):
+    """
+    Designs the wall of a planar minimum length nozzle by the method of characteristics, see CharacteristicMesh
+    :return: Array of (x, y) wall points from the throat corner at (0, throat_half_height) to the exit, in the units
+             of throat_half_height
+    """
+
+    units = getattr(throat_half_height, 'units', None)
+    if units is not None:
+        throat_half_height = throat_half_height.magnitude
+
+    wall = CharacteristicMesh(exit_mach, gamma, throat_half_height, n_characteristics, keep_mesh=False).wall
+    return wall if units is None else wall * units
@@ -1,3 +1,7 @@
-from .unit_registry import PintExtUnitRegistry
+from .unit_registry import PintExtUnitRegistry, warm_up
+from .kernel import UnitKernel
+from .transport import pack, unpack, pack_many, unpack_many
+from .arrays import units_of, magnitude, with_units
 
-__all__ = ['PintExtUnitRegistry']
+__all__ = ['PintExtUnitRegistry', 'warm_up', 'UnitKernel', 'pack', 'unpack', 'pack_many', 'unpack_many', 'units_of',
+           'magnitude', 'with_units']
@@ -0,0 +1,44 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Helpers for vectorized code that accepts either plain numbers or array-valued Quantities: the units are picked off
+# the inputs once, the work is done on float arrays, and the units are put back on the results.
+
+
+def units_of(*values):
+    """Returns the units of the first pint Quantity among the values, or None if they are all plain numbers"""
+
+    for value in values:
+        if hasattr(value, 'units'):
+            return value.units
+    return None
+
+
+def magnitude(value, units):
+    """
+    Converts a scalar, array or array-valued Quantity to a float array in the given units. Plain numbers are taken to
+    already be in those units.
+    """
+
+    import numpy as np  # not at module level, lib.pint_ext is imported by every process and must stay light
+
+    if hasattr(value, 'units'):
+        value = value.to(units).magnitude
+    return np.asarray(value, dtype=float)
+
+
+def with_units(magnitude, units):
+    """Attaches units to a magnitude, leaving it a plain number or array when units is None"""
+
+    return magnitude if units is None else magnitude * units
@@ -0,0 +1,169 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+
+
+class UnitKernel(object):
+    """
+    Wraps a formula written against plain floats (or NumPy arrays) in base SI units so that it can be called with pint
+    Quantities. The formula's dimensions are checked once, on the first call with Quantities, by running it on sample
+    Quantities. After that each call only converts its inputs to base SI magnitudes with cached factors, runs the
+    plain kernel and re-attaches units to the result.
+
+    Calls made without any Quantities go straight to the kernel with the values as given.
+    """
+
+    def __init__(self, registry, func, result, args):
+        """
+        :param registry: The unit registry the Quantities belong to
+        :param func: The plain-float kernel
+        :param result: Units of the result, or '=name' for the units of the kernel argument called name. A tuple or
+                       list declares a kernel that returns that many values.
+        :param args: Units for each kernel argument, whose dimensions the inputs must match. None marks a
+                     dimensionless argument, which also accepts plain numbers.
+        """
+
+        code = func.__code__
+        self.arg_names = code.co_varnames[:code.co_argcount]
+        if len(args) != len(self.arg_names):
+            raise ValueError("{0} takes {1} arguments but {2} units were given".format(
+                func.__name__, len(self.arg_names), len(args)))
+
+        self.registry = registry
+        self.func = func
+        self.multiple_results = isinstance(result, (tuple, list))
+        self.result_specs = tuple(result) if self.multiple_results else (result,)
+        self.arg_specs = tuple('' if arg is None else arg for arg in args)
+
+        # Resolved on first use so that declaring a kernel does not have to load the registry
+        self._arg_dimensions = None
+        self._result_factors = None
+        self._factors = {}
+        self._checked = False
+
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *values):
+        if len(values) != len(self.arg_names):
+            raise TypeError("{0} takes {1} arguments ({2} given)".format(
+                self.func.__name__, len(self.arg_names), len(values)))
+
+        if not any(hasattr(value, '_units') for value in values):
+            return self.func(*values)
+
+        if not self._checked:
+            self.check()
+
+        magnitudes = []
+        arg_units = []
+        for i, value in enumerate(values):
+            units = getattr(value, '_units', None)
+            if units is None:
+                if self.arg_specs[i]:
+                    raise ValueError("argument '{0}' of {1} must be a Quantity".format(
+                        self.arg_names[i], self.func.__name__))
+                magnitudes.append(value)
+            else:
+                factor = self._factors.get((i, units))
+                if factor is None:
+                    factor = self._base_factor(i, units)
+                magnitudes.append(value._magnitude * factor)
+            arg_units.append(units)
+
+        results = self.func(*magnitudes)
+        if not self.multiple_results:
+            results = (results,)
+
+        quantities = []
+        for i, result in enumerate(results):
+            factor, units = self._result_factors[i]
+            if isinstance(units, int):
+                # The result takes the units of one of the arguments
+                index = units
+                units = arg_units[index]
+                factor = self._factors.get((index, units), 1.0) if units is not None else 1.0
+            quantities.append(self.registry.Quantity(result / factor, units) if units is not None else result)
+
+        return tuple(quantities) if self.multiple_results else quantities[0]
+
+    def check(self):
+        """
+        Checks the formula's dimensions by running it once on sample Quantities in base SI units
+        :return: None
+        :raises: DimensionalityError if a result does not have its declared dimensions
+        """
+
+        from pint import DimensionalityError
+
+        registry = self.registry
+
+        self._arg_dimensions = [registry.get_dimensionality(spec) for spec in self.arg_specs]
+
+        self._result_factors = []
+        result_dimensions = []
+        for spec in self.result_specs:
+            if spec is None:
+                self._result_factors.append((1.0, None))
+                result_dimensions.append(None)
+            elif spec.startswith('='):
+                index = self.arg_names.index(spec[1:])
+                self._result_factors.append((1.0, index))
+                result_dimensions.append(self._arg_dimensions[index])
+            else:
+                base = registry.Quantity(1.0, spec).to_base_units()
+                self._result_factors.append((base.magnitude, registry.parse_units(spec)._units))
+                result_dimensions.append(base.dimensionality)
+
+        # Distinct positive sample values keep differences such as ro**2 - ri**2 away from zero
+        samples = []
+        for i, spec in enumerate(self.arg_specs):
+            base_units = registry.Quantity(1.0, spec).to_base_units().units
+            samples.append(registry.Quantity(1.0 + 0.25 * i, base_units))
+
+        results = self.func(*samples)
+        if not self.multiple_results:
+            results = (results,)
+
+        for i, (result, dimensions) in enumerate(zip(results, result_dimensions)):
+            if dimensions is None:
+                continue
+            actual = getattr(result, 'dimensionality', registry.get_dimensionality(''))
+            if actual != dimensions:
+                raise DimensionalityError(getattr(result, 'units', 'dimensionless'), self.result_specs[i], actual,
+                                          dimensions, extra_msg=" in the result of {0}".format(self.func.__name__))
+
+        self._checked = True
+
+    def _base_factor(self, index, units):
+        """Finds and caches the factor that takes a magnitude in these units to base SI units"""
+
+        from pint import DimensionalityError
+
+        registry = self.registry
+
+        if registry.get_dimensionality(units) != self._arg_dimensions[index]:
+            raise DimensionalityError(registry.Unit(units), self.arg_specs[index] or 'dimensionless',
+                                      registry.get_dimensionality(units), self._arg_dimensions[index],
+                                      extra_msg=" for argument '{0}' of {1}".format(self.arg_names[index],
+                                                                                    self.func.__name__))
+
+        if registry.Quantity(0.0, units).to_base_units().magnitude != 0:
+            raise ValueError("units with an offset, such as {0}, cannot be used with kernels".format(
+                registry.Unit(units)))
+
+        factor = registry.Quantity(1.0, units).to_base_units().magnitude
+        self._factors[(index, units)] = factor
+
+        return factor
@@ -0,0 +1,89 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compact, registry independent forms of Quantities for sending them between processes. A packed Quantity is just
+# (magnitude, unit string), which pickles to a few bytes of plain data, and is rebuilt in the receiving process's
+# PintExtUnitRegistry rather than whatever registry pint's own unpickling would pick.
+
+from .unit_registry import PintExtUnitRegistry
+
+_unit_strings = {}  # UnitsContainer to canonical unit string
+_parsed_units = {}  # unit string to UnitsContainer in this process's registry
+
+
+def _unit_string(units):
+    string = _unit_strings.get(units)
+    if string is None:
+        string = _unit_strings[units] = str(units)
+    return string
+
+
+def pack(value):
+    """
+    Packs a Quantity as (magnitude, unit string). The magnitude may be a NumPy array. Anything that is not a Quantity
+    is packed as (value, None).
+    """
+
+    units = getattr(value, '_units', None)
+    if units is None:
+        return value, None
+    return value._magnitude, _unit_string(units)
+
+
+def unpack(packed):
+    """Rebuilds a value packed by pack, with any Quantity in the PintExtUnitRegistry"""
+
+    magnitude, unit_string = packed
+    if unit_string is None:
+        return magnitude
+
+    registry = PintExtUnitRegistry().registry
+    units = _parsed_units.get(unit_string)
+    if units is None:
+        units = _parsed_units[unit_string] = registry.parse_units(unit_string)._units
+    return registry.Quantity(magnitude, units)
+
+
+def pack_many(quantities):
+    """
+    Packs a sequence of scalar Quantities with the same dimensions as one array, in the units of the first
+    :return: (float array of magnitudes, unit string)
+    """
+
+    import numpy as np  # not at module level, lib.pint_ext is imported by every process and must stay light
+
+    if not quantities:
+        raise ValueError("nothing to pack")
+
+    first = quantities[0]
+    units = getattr(first, '_units', None)
+    if units is None:
+        return np.asarray(quantities, dtype=float), None
+
+    magnitudes = np.empty(len(quantities))
+    for i, quantity in enumerate(quantities):
+        magnitudes[i] = quantity._magnitude if quantity._units == units else quantity.to(first.units)._magnitude
+    return magnitudes, _unit_string(units)
+
+
+def unpack_many(packed):
+    """Rebuilds the values packed by pack_many as a list of scalar Quantities"""
+
+    magnitudes, unit_string = packed
+    if unit_string is None:
+        return [float(magnitude) for magnitude in magnitudes]
+
+    array = unpack(packed)
+    registry = array._REGISTRY
+    return [registry.Quantity(float(magnitude), array._units) for magnitude in magnitudes]
@@ -1,6 +1,111 @@
+import os
+import threading
+
 from lib.util import Singleton
 
-from pint import UnitRegistry
+from .kernel import UnitKernel
+
+_load_lock = threading.Lock()
+
+
+def _reset_load_lock():
+    global _load_lock
+    _load_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    # A thread in the parent may have been part way through loading the registry when a worker was forked
+    os.register_at_fork(after_in_child=_reset_load_lock)
+
+
+def _load_registry():
+    """Imports pint and builds the underlying UnitRegistry, reusing pint's parsed definition cache where supported"""
+
+    from pint import UnitRegistry
+
+    try:
+        return UnitRegistry(cache_folder=':auto:')
+    except TypeError:
+        # This pint predates the definition cache, and parses its definition files every time
+        return UnitRegistry()
+
+
+class PintExtUnitRegistry(Singleton):
+    """
+    The project wide pint unit registry. Importing pint and parsing its unit definitions is deferred until the first
+    unit is actually used, so that modules can create the registry at import without slowing down every short lived
+    process that imports them. Every attribute of pint's UnitRegistry is available on it.
+    """
+
+    def __init__(self):
+        self._registry = None
+
+    @property
+    def loaded(self):
+        """Whether the underlying pint registry has been built yet"""
+
+        return self._registry is not None
+
+    @property
+    def registry(self):
+        """The underlying pint UnitRegistry, built on first access"""
+
+        if self._registry is None:
+            with _load_lock:
+                if self._registry is None:
+                    self._registry = _load_registry()
+        return self._registry
+
+    def __getattr__(self, name):
+        # Only reached for attributes not defined here, such as units (units.inch) and the UnitRegistry API
+        if name.startswith('__') or name == '_registry':
+            raise AttributeError(name)
+        return getattr(self.registry, name)
+
+    def __getitem__(self, item):
+        # Parsed directly, indexing the pint registry is deprecated
+        return self.registry.parse_expression(item)
+
+    def __call__(self, *args, **kwargs):
+        return self.registry(*args, **kwargs)
+
+    def __contains__(self, item):
+        try:
+            self.registry.parse_units(item)
+        except Exception:
+            return False
+        return True
+
+    def __dir__(self):
+        return sorted(set(dir(type(self)) + list(self.__dict__) + dir(self.registry)))
+
+    def kernel(self, result, *args):
+        """
+        Decorator that turns a plain-float formula in base SI units into a unit-checked function of Quantities
+        :param result: Units of the result, or '=name' for the units of the formula argument called name
+        :param args: Units for each formula argument, None for dimensionless arguments
+        :return: A decorator producing a UnitKernel
+        """
+
+        def decorator(func):
+            return UnitKernel(self, func, result, args)
+
+        return decorator
+
+
+def warm_up(*kernels):
+    """
+    Builds the unit registry and checks the given kernels' dimensions now rather than on first use. Pass it as the
+    initializer of a process pool so that each spawned worker pays those costs once, before its first task. Forked
+    workers inherit whatever the parent had already built.
+    :param kernels: UnitKernels to check
+    :return: The PintExtUnitRegistry
+    """
+
+    units = PintExtUnitRegistry()
+    units.registry
+
+    for kernel in kernels:
+        kernel.check()
 
-class PintExtUnitRegistry(Singleton, UnitRegistry):
-    pass
+    return units
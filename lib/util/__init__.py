@@ -1,3 +1,7 @@
 from .singleton import Singleton
+from .root_finding import RootResult, brentq
+from .instrumentation import Instrumentation
+from .pipeline import Pipeline
+from .pool import ordered_results
 
-__all__ = ["Singleton"]
+__all__ = ["Singleton", "RootResult", "brentq", "Instrumentation", "Pipeline", "ordered_results"]
@@ -0,0 +1,164 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import csv
+import json
+import time
+
+
+class _NullPhase(object):
+    """A do nothing context manager, so that phase() costs next to nothing when instrumentation is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(instrumentation, name):
+    """
+    Times a block of code as a named phase when instrumentation is on
+    :param instrumentation: An Instrumentation, or None when instrumentation is off
+    :return: A context manager
+    """
+
+    if instrumentation is None:
+        return _NULL_PHASE
+    return instrumentation.phase(name)
+
+
+class Instrumentation(object):
+    """
+    Collects evaluation counts, wall time per solve and per phase, and optional convergence traces from instrumented
+    objects (see PressureVessel.instrument). Everything is held in plain lists and dicts so that collections from
+    process pool workers can be pickled back and merged into one report for a whole sweep.
+    """
+
+    def __init__(self, trace=False):
+        """
+        :param trace: Record every evaluation inside each solve as a convergence trace
+        """
+
+        self.tracing = trace
+        self.counts = {}   # name to number of evaluations
+        self.phases = {}   # phase name to [calls, total seconds]
+        self.solves = []   # one dict per solve
+        self._solve = None
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Times the enclosed block, adding it to the totals for the named phase"""
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.time() - start)
+
+    def add_time(self, name, seconds, calls=1):
+        """Adds time measured elsewhere, for example in a worker process, to the totals for the named phase"""
+
+        totals = self.phases.setdefault(name, [0, 0.0])
+        totals[0] += calls
+        totals[1] += seconds
+
+    @contextlib.contextmanager
+    def solve(self, label=None):
+        """
+        Times the enclosed solve and records it. The yielded dict can be filled in with details of the result, and
+        evaluation counts and trace points made inside the block are attributed to this solve.
+        """
+
+        record = {'label': label, 'evaluations': 0}
+        if self.tracing:
+            record['trace'] = []
+
+        outer, self._solve = self._solve, record
+        start = time.time()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.time() - start
+            self._solve = outer
+            self.solves.append(record)
+
+    def record(self, label, seconds, evaluations, **details):
+        """Records a solve that was timed elsewhere, such as a chunk of a sweep solved in a worker process"""
+
+        record = {'label': label, 'seconds': seconds, 'evaluations': evaluations}
+        record.update(details)
+        self.solves.append(record)
+        return record
+
+    def evaluation(self, *point):
+        """Counts an evaluation against the current solve, and adds it to the trace when tracing"""
+
+        record = self._solve
+        if record is not None:
+            record['evaluations'] += 1
+            if self.tracing:
+                record['trace'].append(point)
+
+    def merge(self, other):
+        """Adds another collection, for example one returned by a process pool worker, into this one"""
+
+        for name, n in other.counts.items():
+            self.count(name, n)
+        for name, (calls, seconds) in other.phases.items():
+            self.add_time(name, seconds, calls)
+        self.solves.extend(other.solves)
+        return self
+
+    def summary(self):
+        """Totals over every solve, along with the counts and phases"""
+
+        seconds = [record['seconds'] for record in self.solves]
+        return {
+            'solves': len(self.solves),
+            'solve_seconds': sum(seconds),
+            'max_solve_seconds': max(seconds) if seconds else 0.0,
+            'evaluations': sum(record['evaluations'] for record in self.solves),
+            'counts': dict(self.counts),
+            'phases': dict((name, {'calls': calls, 'seconds': total})
+                           for name, (calls, total) in self.phases.items()),
+        }
+
+    def to_dict(self):
+        return {'summary': self.summary(), 'solves': self.solves}
+
+    def to_json(self, path):
+        """Writes the summary and every solve record, including traces, as JSON"""
+
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True, default=str)
+
+    def to_csv(self, path):
+        """Writes one row per solve, leaving out the traces"""
+
+        columns = ['label', 'method', 'seconds', 'evaluations', 'iterations', 'converged']
+        extra = sorted(set(key for record in self.solves for key in record) - set(columns) - set(['trace']))
+
+        with open(path, 'w') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(columns + extra)
+            for record in self.solves:
+                writer.writerow([record.get(column, '') for column in columns + extra])
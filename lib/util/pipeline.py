@@ -0,0 +1,226 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import inspect
+
+from .instrumentation import phase
+
+# Result of a stage that has not run yet
+_MISSING = object()
+
+
+def _argument_names(function):
+    try:
+        return inspect.getfullargspec(function).args
+    except AttributeError:
+        return inspect.getargspec(function).args
+
+
+def _same(a, b):
+    """
+    True when two parameter values or stage results are known to be equal. Quantities must match in units as well as
+    magnitude, and anything that cannot be compared counts as different so that it is always recomputed.
+    """
+
+    if a is b:
+        return True
+    if hasattr(a, 'units') != hasattr(b, 'units'):
+        return False
+    try:
+        if hasattr(a, 'units'):
+            return a.units == b.units and _same(a.magnitude, b.magnitude)
+        shapes = getattr(a, 'shape', None), getattr(b, 'shape', None)
+        if None not in shapes and shapes[0] != shapes[1]:
+            return False
+        equal = a == b
+        # Arrays compare element-wise
+        return bool(equal.all()) if hasattr(equal, 'all') else bool(equal)
+    except Exception:
+        return False
+
+
+class _Stage(object):
+
+    def __init__(self, name, function, inputs):
+        self.name = name
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.result = _MISSING
+        self.version = 0            # bumped whenever the result changes
+        self.input_versions = None  # versions of the inputs the result was computed from
+        self.runs = 0
+
+
+class Pipeline(object):
+    """
+    A chain of memoized calculation stages. Each stage is a function whose arguments name its inputs, which are
+    either parameters set on the pipeline or the results of earlier stages, so the stages form a directed acyclic
+    graph. Results are only computed when asked for, and a stage only reruns when one of its inputs has changed since
+    its last run. A stage whose rerun gives the same result as before does not cause the stages after it to rerun.
+    """
+
+    instrumentation = None  # optional Instrumentation, times every stage run as a phase named after the stage
+
+    def __init__(self, **parameters):
+        self._stages = collections.OrderedDict()
+        self._parameters = {}
+        self._versions = {}
+        self.set(**parameters)
+
+    def add_stage(self, name, function, inputs=None):
+        """
+        Adds a stage. Its inputs must be parameters or stages that are already in the pipeline, which keeps the graph
+        acyclic.
+        :param name: Name of the stage's result
+        :param function: Called with the inputs as keyword arguments to calculate the result
+        :param inputs: Names of the inputs, by default the names of the function's arguments
+        """
+
+        if name in self._stages or name in self._parameters:
+            raise ValueError("the pipeline already has a stage or parameter named {0!r}".format(name))
+        if any(name in stage.inputs for stage in self._stages.values()):
+            raise ValueError("{0!r} is already an input parameter of another stage".format(name))
+
+        inputs = _argument_names(function) if inputs is None else inputs
+        self._stages[name] = _Stage(name, function, inputs)
+
+    def stage(self, name=None, inputs=None):
+        """Decorator form of add_stage, named after the function by default"""
+
+        def add(function):
+            self.add_stage(name or function.__name__, function, inputs)
+            return function
+
+        return add
+
+    def set(self, **parameters):
+        """
+        Sets parameters, marking the stages that depend on the ones that changed value as needing to rerun
+        :return: Names of the parameters whose values changed
+        """
+
+        changed = []
+        for name, value in parameters.items():
+            if name in self._stages:
+                raise ValueError("{0!r} is a stage, only parameters can be set".format(name))
+            if name in self._parameters and _same(self._parameters[name], value):
+                continue
+            self._parameters[name] = value
+            self._versions[name] = self._versions.get(name, 0) + 1
+            changed.append(name)
+        return changed
+
+    @property
+    def parameters(self):
+        """A copy of the parameter values"""
+
+        return dict(self._parameters)
+
+    @property
+    def stages(self):
+        """Stage names, in the order they were added"""
+
+        return list(self._stages)
+
+    @property
+    def runs(self):
+        """Number of times each stage has run"""
+
+        return dict((name, stage.runs) for name, stage in self._stages.items())
+
+    def __contains__(self, name):
+        return name in self._stages or name in self._parameters
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def get(self, name):
+        """
+        The value of a parameter, or the result of a stage, running it and whatever it depends on as needed
+        :raises: KeyError for names that are neither a stage nor a parameter that has been set
+        """
+
+        if name in self._stages:
+            stage = self._stages[name]
+            self._update(stage)
+            return stage.result
+        if name in self._parameters:
+            return self._parameters[name]
+        raise KeyError("pipeline parameter {0!r} has not been set".format(name))
+
+    def run(self, *names):
+        """
+        Brings stages up to date
+        :param names: Stages to update, along with everything they depend on, all of them by default
+        :return: OrderedDict of stage name to result
+        """
+
+        return collections.OrderedDict((name, self.get(name)) for name in (names or self._stages))
+
+    def _version(self, name):
+        if name in self._stages:
+            return self._stages[name].version
+        if name not in self._parameters:
+            raise KeyError("pipeline parameter {0!r} has not been set".format(name))
+        return self._versions[name]
+
+    def _update(self, stage):
+        for name in stage.inputs:
+            if name in self._stages:
+                self._update(self._stages[name])
+
+        versions = tuple(self._version(name) for name in stage.inputs)
+        if versions == stage.input_versions:
+            return
+
+        arguments = dict((name, self._stages[name].result if name in self._stages else self._parameters[name])
+                         for name in stage.inputs)
+        with phase(self.instrumentation, stage.name):
+            result = stage.function(**arguments)
+        stage.runs += 1
+
+        if stage.result is _MISSING or not _same(result, stage.result):
+            stage.version += 1
+        stage.result = result
+        stage.input_versions = versions
+
+    def downstream(self, name):
+        """Names of the stages that depend on a parameter or stage, directly or through other stages, in order"""
+
+        affected = set([name])
+        for stage in self._stages.values():
+            if affected.intersection(stage.inputs):
+                affected.add(stage.name)
+        return [stage for stage in self._stages if stage in affected and stage != name]
+
+    def stale(self):
+        """Names of the stages that would run if everything were brought up to date, assuming every rerun changes its
+        result"""
+
+        stale = set()
+        for stage in self._stages.values():
+            try:
+                versions = tuple(self._version(name) for name in stage.inputs)
+            except KeyError:
+                versions = None
+            if versions is None or versions != stage.input_versions or stale.intersection(stage.inputs):
+                stale.add(stage.name)
+        return [name for name in self._stages if name in stale]
+
+    def invalidate(self, *names):
+        """Forces stages to rerun the next time they are needed, all of them by default"""
+
+        for name in names or self._stages:
+            self._stages[name].input_versions = None
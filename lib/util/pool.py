@@ -0,0 +1,35 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+
+
+def ordered_results(pool, function, tasks, window):
+    """
+    Feeds tasks to a process pool keeping at most window of them in flight, and yields their results in submission
+    order, so that memory stays bounded however many tasks there are
+    :param pool: A multiprocessing.Pool
+    :param function: Module level function the pool calls on each task
+    :param tasks: Iterable of tasks, each passed to function as its one argument
+    :param window: Largest number of tasks submitted but not yet yielded
+    """
+
+    pending = collections.deque()
+    for task in tasks:
+        pending.append(pool.apply_async(function, (task,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+
+    while pending:
+        yield pending.popleft().get()
@@ -0,0 +1,122 @@
+# Copyright (C) 2015 Mach 30 - http://www.mach30.org
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+
+
+class RootResult(object):
+    """The outcome of a bracketed root solve"""
+
+    root = None        # best estimate of the root
+    f_root = None      # function value at the root estimate
+    bracket = None     # (x, f(x)) pairs that still straddle the root
+    iterations = 0     # number of function evaluations spent inside the bracket
+    converged = False  # True if the bracket shrank below the tolerance
+
+    def __init__(self, root, f_root, bracket, iterations, converged):
+        self.root = root
+        self.f_root = f_root
+        self.bracket = bracket
+        self.iterations = iterations
+        self.converged = converged
+
+
+def brentq(f, a, b, xtol, max_iterations=100, fa=None, fb=None):
+    """
+    Finds a root of f between a and b using Brent's method (inverse quadratic interpolation and secant steps,
+    safeguarded by bisection).
+    :param f: A scalar function of a single float
+    :param a: One end of the bracket
+    :param b: The other end of the bracket, f(a) and f(b) must have opposite signs
+    :param xtol: The absolute tolerance on the root
+    :param max_iterations: The maximum number of function evaluations to spend inside the bracket
+    :param fa: f(a), if it has already been evaluated
+    :param fb: f(b), if it has already been evaluated
+    :return: A RootResult
+    """
+
+    if xtol is None or xtol <= 0:
+        raise ValueError("tolerance must be positive")
+
+    if fa is None:
+        fa = f(a)
+    if fb is None:
+        fb = f(b)
+
+    if fa == 0:
+        return RootResult(a, fa, ((a, fa), (a, fa)), 0, True)
+    if fb == 0:
+        return RootResult(b, fb, ((b, fb), (b, fb)), 0, True)
+    if (fa > 0) == (fb > 0):
+        raise ValueError("f(a) and f(b) must have opposite signs to bracket a root")
+
+    c, fc = a, fa
+    d = e = b - a
+    iterations = 0
+
+    while True:
+        # Keep b as the best estimate and c on the opposite side of the root from b
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        tol = 2.0 * sys.float_info.epsilon * abs(b) + 0.5 * xtol
+        m = 0.5 * (c - b)
+
+        if abs(m) <= tol or fb == 0:
+            return RootResult(b, fb, ((b, fb), (c, fc)), iterations, True)
+
+        if iterations >= max_iterations:
+            return RootResult(b, fb, ((b, fb), (c, fc)), iterations, False)
+
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            # Attempt interpolation
+            s = fb / fa
+            if a == c:
+                # Secant step
+                p = 2.0 * m * s
+                q = 1.0 - s
+            else:
+                # Inverse quadratic interpolation
+                q = fa / fc
+                r = fb / fc
+                p = s * (2.0 * m * q * (q - r) - (b - a) * (r - 1.0))
+                q = (q - 1.0) * (r - 1.0) * (s - 1.0)
+
+            if p > 0:
+                q = -q
+            else:
+                p = -p
+
+            if 2.0 * p < min(3.0 * m * q - abs(tol * q), abs(e * q)):
+                e = d
+                d = p / q
+            else:
+                # Interpolation would not converge fast enough, bisect instead
+                d = m
+                e = m
+        else:
+            d = m
+            e = m
+
+        a, fa = b, fb
+        if abs(d) > tol:
+            b += d
+        else:
+            b += tol if m > 0 else -tol
+        fb = f(b)
+        iterations += 1
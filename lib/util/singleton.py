@@ -1,11 +1,35 @@
 # Derived from meta class example of singletons in 
 # http://stackoverflow.com/questions/6760685/creating-a-singleton-in-python
+#
+# First construction is serialized by a lock so that concurrent threads always share one instance. Process pool
+# workers get their own instances: forked workers inherit any already built in the parent (the lock is replaced after
+# the fork in case another thread held it), and spawned workers build theirs on first use, which a pool initializer
+# can do up front, see lib.pint_ext.warm_up.
+
+import os
+import threading
+
 
 class _Singleton(type):
     _instances = {}
+    _lock = threading.RLock()  # re-entrant so that a singleton's __init__ can create other singletons
+
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(_Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
+        instance = cls._instances.get(cls)
+        if instance is None:
+            with _Singleton._lock:
+                if cls not in cls._instances:
+                    cls._instances[cls] = super(_Singleton, cls).__call__(*args, **kwargs)
+                instance = cls._instances[cls]
+        return instance
+
+
+def _reset_lock():
+    _Singleton._lock = threading.RLock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_lock)
+
 
 class Singleton(_Singleton('SingletonMeta', (object,), {})): pass
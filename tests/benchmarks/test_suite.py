@@ -0,0 +1,30 @@
+import unittest
+from benchmarks import suite
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_registered(self):
+        names = [func.__name__ for func in suite.BENCHMARKS]
+        for name in ('pv_step_dataset', 'pv_max_stress', 'raw_max_stress', 'batch_closed_form_100k',
+                     'chamber_build'):
+            self.assertIn(name, names)
+
+    def test_run(self):
+        results = suite.run(['pv_closed_form_dataset', 'raw_max_stress'], repeat=1, min_time=0.001)
+
+        self.assertEqual(set(['pv_closed_form_dataset', 'raw_max_stress']), set(results['benchmarks']))
+        self.assertGreater(results['benchmarks']['raw_max_stress']['seconds'], 0)
+        self.assertIn('pint', results['meta'])
+
+    def test_compare(self):
+        baseline = {'benchmarks': {'a': {'seconds': 1.0}, 'b': {'seconds': 1.0}, 'c': {'seconds': 1.0},
+                                   'skipped': {'skipped': 'no CAD'}}}
+        results = {'benchmarks': {'a': {'seconds': 1.2}, 'b': {'seconds': 1.3}, 'new': {'seconds': 1.0},
+                                  'skipped': {'skipped': 'no CAD'}}}
+
+        comparison = suite.compare(results, baseline, tolerance=0.25)
+        self.assertEqual(set(['a', 'b']), set(comparison))
+        self.assertFalse(comparison['a'][3])
+        self.assertTrue(comparison['b'][3])
+        self.assertAlmostEqual(1.3, comparison['b'][2])
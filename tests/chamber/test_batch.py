@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVessel, PressureVesselBatch
+from . import PressureVesselTestCaseDataset
+
+
+class TestPressureVesselBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Each dataset item runs the step solver when it is fetched, so only fetch them once
+        cls.test_case_dataset = list(PressureVesselTestCaseDataset())
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+
+        self.ri = np.array([tc.ri.to(self.units.inch).magnitude for tc in self.test_case_dataset]) * self.units.inch
+        self.p_c = np.array([tc.p_c.to(self.units.psi).magnitude for tc in self.test_case_dataset]) * self.units.psi
+        self.strength = np.array([tc.material_strength.to(self.units.psi).magnitude
+                                  for tc in self.test_case_dataset]) * self.units.psi
+        self.t_expected = np.array([tc.t_expected.to(self.units.inch).magnitude for tc in self.test_case_dataset])
+
+    def test_dataset(self):
+        batch = PressureVesselBatch(self.ri, self.p_c, 0.001 * self.units.psi, self.strength, 1.5)
+        t = batch.calculate_wall_thickness()
+
+        self.assertEqual(9, len(batch))
+        self.assertTrue(np.all(batch.converged))
+        np.testing.assert_allclose(t.to(self.units.inch).magnitude, self.t_expected, atol=0.001001)
+        np.testing.assert_allclose(batch.max_stress().to(self.units.psi).magnitude, self.strength.magnitude)
+
+        # Radial stress at the inner wall is the chamber pressure pushing back
+        np.testing.assert_allclose(batch.sigma_rad().to(self.units.psi).magnitude, -self.p_c.magnitude)
+
+    def test_matches_scalar_solver(self):
+        batch = PressureVesselBatch(self.ri, self.p_c, 0.001 * self.units.psi, self.strength, 1.5)
+        t = batch.calculate_wall_thickness()
+
+        for i, tc_data in enumerate(self.test_case_dataset):
+            pv = PressureVessel(tc_data.ri, tc_data.t_guess, tc_data.p_c, tc_data.p_amb, tc_data.material_strength,
+                                tc_data.fs, tc_data.step_size)
+            self.assertAlmostEqual(pv.calculate_wall_thickness(method='closed_form').magnitude,
+                                   t[i].to(tc_data.ri.units).magnitude, delta=1e-12, msg=tc_data.name)
+
+    def test_plain_arrays_broadcast(self):
+        batch = PressureVesselBatch(np.array([5.2399, 9.5433])[:, np.newaxis], np.array([1333.29, 2583.42, 4125.37]),
+                                    0.001, 42e3, 1.5)
+        t = batch.calculate_wall_thickness()
+
+        self.assertEqual((2, 3), t.shape)
+        self.assertAlmostEqual(0.256, t[0, 0], delta=0.001001)
+        self.assertAlmostEqual(0.926, t[1, 1], delta=0.001001)
+        self.assertAlmostEqual(1.527, t[1, 2], delta=0.001001)
+
+        # Plain radii cannot be matched to a tolerance in units
+        with self.assertRaises(ValueError):
+            batch.calculate_wall_thickness(tolerance=1e-9 * self.units.inch)
+
+    def test_bisection_fallback(self):
+        r = self.ri + 0.01 * self.units.inch
+        batch = PressureVesselBatch(self.ri, self.p_c, 0.001 * self.units.psi, self.strength, 1.5, r=r)
+        t = batch.calculate_wall_thickness(tolerance=1e-9 * self.units.inch)
+
+        self.assertTrue(np.all(batch.converged))
+        self.assertGreater(batch.iterations, 0)
+        self.assertTrue(np.all(batch.max_stress().magnitude <= self.strength.magnitude))
+
+        for i, tc_data in enumerate(self.test_case_dataset):
+            pv = PressureVessel(tc_data.ri, tc_data.t_guess, tc_data.p_c, tc_data.p_amb, tc_data.material_strength,
+                                tc_data.fs, tc_data.step_size)
+            pv.r = r[i]
+            t_scalar = pv.calculate_wall_thickness(method='bracket', tolerance=1e-9 * self.units.inch)
+            self.assertAlmostEqual(t_scalar.magnitude, t[i].magnitude, delta=1e-8, msg=tc_data.name)
+
+    def test_unsolvable_points(self):
+        # Compression, and a chamber pressure no wall thickness can hold at this factor of safety
+        batch = PressureVesselBatch(5.0, np.array([10.0, 1000.0, 100.0]), np.array([100.0, 0.0, 0.0]),
+                                    np.array([42e3, 1000.0, 42e3]), 1.5)
+        t = batch.calculate_wall_thickness()
+
+        self.assertEqual([False, False, True], list(batch.converged))
+        self.assertTrue(np.isnan(t[0]))
+        self.assertTrue(np.isnan(t[1]))
+        self.assertTrue(np.isfinite(t[2]))
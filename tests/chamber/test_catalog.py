@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PartCatalog
+
+
+class _RingBuilder(object):
+    """Builds a stand-in 'shape' so the pipeline can be exercised without a CAD kernel"""
+
+    def build(self, ri, t):
+        if t.magnitude <= 0:
+            raise ValueError("wall thickness must be positive")
+        return {'ri': ri.to('inch').magnitude, 'ro': (ri + t).to('inch').magnitude, 'pid': os.getpid()}
+
+
+def _export_text(shape, path, export_type, tolerance):
+    with open(path, 'w') as f:
+        json.dump(dict(shape, export_type=export_type, tolerance=tolerance), f)
+
+
+class TestPartCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.directory = tempfile.mkdtemp()
+
+        self.catalog = PartCatalog()
+        for i in range(6):
+            self.catalog.add('ring-{0}'.format(i), _RingBuilder, ri=(1.0 + i) * self.units.inch,
+                             t=(0.1 if i != 3 else -0.1) * self.units.inch)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _check(self, manifest):
+        self.assertEqual(5, manifest['built'])
+        self.assertEqual(1, manifest['failed'])
+        self.assertEqual(['ring-{0}'.format(i) for i in range(6)], [part['name'] for part in manifest['parts']])
+
+        failed = manifest['parts'][3]
+        self.assertEqual('failed', failed['status'])
+        self.assertIn('wall thickness must be positive', failed['error'])
+        self.assertEqual({}, failed['outputs'])
+
+        part = manifest['parts'][2]
+        self.assertEqual('ok', part['status'])
+        self.assertEqual({'STEP': 'ring-2.step', 'STL': 'ring-2.stl'}, part['outputs'])
+        self.assertEqual(set(['build', 'STEP', 'STL']), set(part['seconds']))
+        with open(os.path.join(self.directory, 'ring-2.stl')) as f:
+            shape = json.load(f)
+        self.assertEqual('STL', shape['export_type'])
+        self.assertAlmostEqual(3.1, shape['ro'])
+
+        with open(os.path.join(self.directory, 'manifest.json')) as f:
+            self.assertEqual(manifest, json.load(f))
+
+    def test_in_process(self):
+        done = []
+        manifest = self.catalog.build(self.directory, processes=0, export=_export_text,
+                                      progress=lambda n, total, result: done.append((n, total)))
+        self._check(manifest)
+        self.assertEqual([(n, 6) for n in range(1, 7)], done)
+        self.assertEqual(set([os.getpid()]), set(part['worker'] for part in manifest['parts']))
+
+    def test_process_pool(self):
+        manifest = self.catalog.build(self.directory, processes=2, export=_export_text)
+        self._check(manifest)
+        self.assertNotIn(os.getpid(), [part['worker'] for part in manifest['parts']])
+
+    def test_unknown_builder(self):
+        catalog = PartCatalog().add('missing', 'tests.chamber.test_catalog:_NoSuchBuilder')
+        manifest = catalog.build(self.directory, processes=0, export=_export_text)
+        self.assertEqual('failed', manifest['parts'][0]['status'])
+        self.assertIn('AttributeError', manifest['parts'][0]['error'])
+
+    def test_bad_parts(self):
+        with self.assertRaises(ValueError):
+            self.catalog.add('ring-0', _RingBuilder)
+        with self.assertRaises(ValueError):
+            self.catalog.add('../ring', _RingBuilder)
+        with self.assertRaises(ValueError):
+            self.catalog.build(self.directory, export_types=('IGES',))
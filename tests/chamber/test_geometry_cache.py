@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import GeometryCache
+
+
+def _writer(data):
+    def write(path):
+        with open(path, 'w') as f:
+            f.write(data)
+    return write
+
+
+class TestGeometryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.directory = tempfile.mkdtemp()
+        self.cache = GeometryCache(os.path.join(self.directory, 'geometry'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _age(self, key, seconds):
+        """Makes an entry look like it was last used some seconds ago"""
+        manifest = os.path.join(self.cache.directory, key, 'manifest.json')
+        then = time.time() - seconds
+        os.utime(manifest, (then, then))
+
+    def test_key(self):
+        key = self.cache.key('Chamber', 'v1', ri=5.0 * self.units.inch, fs=1.5)
+
+        # The same inputs in other units are the same build
+        self.assertEqual(key, self.cache.key('Chamber', 'v1', fs=1.5, ri=127.0 * self.units.millimeter))
+
+        self.assertNotEqual(key, self.cache.key('Chamber', 'v2', ri=5.0 * self.units.inch, fs=1.5))
+        self.assertNotEqual(key, self.cache.key('Chamber', 'v1', ri=5.1 * self.units.inch, fs=1.5))
+        self.assertNotEqual(key, self.cache.key('Nozzle', 'v1', ri=5.0 * self.units.inch, fs=1.5))
+
+    def test_store_and_lookup(self):
+        key = self.cache.key('Chamber', 'v1', ri=5.0 * self.units.inch)
+        self.assertIsNone(self.cache.lookup(key))
+
+        stored = self.cache.store(key, {'chamber.step': _writer('solid'), 'chamber.stl': _writer('mesh')},
+                                  {'ri': 5.0 * self.units.inch})
+        files = self.cache.lookup(key)
+        self.assertEqual(stored, files)
+        with open(files['chamber.step']) as f:
+            self.assertEqual('solid', f.read())
+
+        self.assertEqual({'hits': 1, 'misses': 1, 'hit_rate': 0.5}, self.cache.stats())
+
+        # Entries persist across instances
+        self.assertIsNotNone(GeometryCache(self.cache.directory).lookup(key))
+
+    def test_failed_write_leaves_no_entry(self):
+        def fail(path):
+            raise RuntimeError("CAD kernel failure")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.store('abc', {'chamber.step': _writer('solid'), 'chamber.stl': fail})
+
+        self.assertIsNone(self.cache.lookup('abc'))
+        self.assertEqual([], os.listdir(self.cache.directory))
+
+    def test_bad_file_name(self):
+        with self.assertRaises(ValueError):
+            self.cache.store('abc', {'../chamber.step': _writer('solid')})
+
+    def test_evict_by_size(self):
+        cache = GeometryCache(self.cache.directory, max_bytes=2500)
+        for i, key in enumerate(['a', 'b', 'c']):
+            cache.store(key, {'chamber.step': _writer('x' * 1000)})
+            self._age(key, 100 - i)
+
+        # Storing 'c' put the store over its limit, so the least recently used entry went
+        self.assertEqual(['b', 'c'], [key for key, size, last_used in cache.entries()])
+
+        # Using 'b' makes 'c' the one to go next
+        cache.lookup('b')
+        cache.store('d', {'chamber.step': _writer('x' * 1000)})
+        self.assertEqual(['b', 'd'], sorted(key for key, size, last_used in cache.entries()))
+        self.assertLessEqual(cache.size(), 2500)
+
+    def test_evict_by_age(self):
+        cache = GeometryCache(self.cache.directory, max_age=60)
+        cache.store('old', {'chamber.step': _writer('solid')})
+        self._age('old', 120)
+        cache.store('new', {'chamber.step': _writer('solid')})
+
+        self.assertEqual(['new'], [key for key, size, last_used in cache.entries()])
+
+    def test_clear(self):
+        self.cache.store('abc', {'chamber.step': _writer('solid')})
+        self.cache.clear()
+        self.assertEqual([], self.cache.entries())
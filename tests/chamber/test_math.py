@@ -36,6 +36,78 @@ class TestPressureVesselCalcs(unittest.TestCase):
         except ValueError:
             pass
 
+    def test_unknown_solver_method(self):
+        tc_data = self.test_case_dataset[0]
+
+        with self.assertRaises(ValueError):
+            tc_data.calculate_wall_thickness(method='guess')
+
+    def test_bracket_solver(self):
+        for tc_data in self.test_case_dataset:
+            pv = PressureVessel(tc_data.ri, tc_data.t_guess, tc_data.p_c, tc_data.p_amb, tc_data.material_strength,
+                                tc_data.fs, tc_data.step_size)
+            t = pv.calculate_wall_thickness(method='bracket')
+
+            self.assertAlmostEqual(tc_data.t_expected.magnitude, t.magnitude, delta=0.001001, msg=tc_data.name)
+            self.assertTrue(pv.converged, msg=tc_data.name)
+            self.assertLess(pv.iterations, 20, msg=tc_data.name)
+
+            # The reported thickness is always on the safe side of the stress limit
+            self.assertLessEqual(pv.residual.magnitude, 0, msg=tc_data.name)
+            self.assertLess(abs(pv.residual.magnitude), 5, msg=tc_data.name)
+            self.assertEqual(pv.ro, pv.ri + t)
+
+    def test_bracket_solver_iteration_cap(self):
+        tc_data = self.test_case_dataset[8]
+        pv = PressureVessel(tc_data.ri, tc_data.t_guess, tc_data.p_c, tc_data.p_amb, tc_data.material_strength,
+                            tc_data.fs, tc_data.step_size)
+        units = PintExtUnitRegistry()
+
+        with self.assertRaises(ValueError):
+            pv.calculate_wall_thickness(method='bracket', max_iterations=3)
+
+        t = pv.calculate_wall_thickness(method='bracket', tolerance=1e-12 * units.inch, max_iterations=10)
+        self.assertFalse(pv.converged)
+        self.assertEqual(10, pv.iterations)
+        self.assertLessEqual(pv.max_stress(), pv.material_strength)
+        self.assertGreater(t.magnitude, tc_data.t_expected.magnitude - 0.001)
+
+    def test_closed_form_solver(self):
+        units = PintExtUnitRegistry()
+
+        for tc_data in self.test_case_dataset:
+            pv = PressureVessel(tc_data.ri, tc_data.t_guess, tc_data.p_c, tc_data.p_amb, tc_data.material_strength,
+                                tc_data.fs, tc_data.step_size)
+            t = pv.calculate_wall_thickness(method='closed_form')
+
+            self.assertEqual('closed_form', pv.method)
+            self.assertEqual(0, pv.iterations)
+            self.assertAlmostEqual(tc_data.t_expected.magnitude, t.magnitude, delta=0.001001, msg=tc_data.name)
+            self.assertAlmostEqual(0, pv.residual.magnitude, delta=1e-6, msg=tc_data.name)
+
+            pv = PressureVessel(tc_data.ri, tc_data.t_guess, tc_data.p_c, tc_data.p_amb, tc_data.material_strength,
+                                tc_data.fs, tc_data.step_size)
+            t_bracket = pv.calculate_wall_thickness(method='bracket', tolerance=1e-9 * units.inch)
+            self.assertAlmostEqual(t_bracket.magnitude, t.magnitude, delta=1e-8, msg=tc_data.name)
+
+    def test_closed_form_fallback(self):
+        tc_data = self.test_case_dataset[1]
+
+        # Evaluating the stress away from the inner wall is outside the inversion, so the bracket solver takes over
+        pv = PressureVessel(tc_data.ri, tc_data.t_guess, tc_data.p_c, tc_data.p_amb, tc_data.material_strength,
+                            tc_data.fs, tc_data.step_size)
+        pv.r = tc_data.ri + tc_data.t_expected / 2.0
+        t = pv.calculate_wall_thickness(method='closed_form')
+        self.assertEqual('bracket', pv.method)
+        self.assertLessEqual(pv.max_stress(), pv.material_strength)
+        self.assertLess(t.magnitude, tc_data.t_expected.magnitude)
+
+        # External pressure puts the wall in compression and no thickness reaches the stress limit
+        pv = PressureVessel(tc_data.ri, tc_data.t_guess, tc_data.p_amb, tc_data.p_c, tc_data.material_strength,
+                            tc_data.fs, tc_data.step_size)
+        with self.assertRaises(ValueError):
+            pv.calculate_wall_thickness(method='closed_form')
+
     def test_iterable(self):
         count = 0
         for item in self.test_case_dataset:
@@ -0,0 +1,123 @@
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVessel, lame, minimize_wall_mass
+
+
+class TestMinimizeWallMass(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        units = self.units
+        self.strength = {'aluminum': 40 * units.MPa, 'inconel': 1000 * units.MPa, 'steel': 250 * units.MPa}
+        self.density = {'aluminum': 2700 * units.kg / units.m ** 3, 'inconel': 8190 * units.kg / units.m ** 3,
+                        'steel': 7900 * units.kg / units.m ** 3}
+
+    def grid_search(self, p_c, strength, density, fs, t_min, volume):
+        """Brute force minimum over the inner radius for the fixed volume problem in plain inches and MPa"""
+
+        ri = np.linspace(0.5, 2.0, 20001)[:, np.newaxis]
+        k = np.sqrt((strength + fs * p_c) / (strength - fs * p_c))
+        t = np.maximum((k - 1.0) * ri, t_min)
+        mass = density * ((ri + t) ** 2 - ri ** 2) * volume / ri ** 2
+        return mass.min(axis=0)
+
+    def test_sigma_tan_gradient(self):
+        x = np.array([1.3, 1.7, 1.45, 2e6, 1e5])
+        gradient = lame.sigma_tan_gradient(*x)
+        for i in range(5):
+            step = np.zeros(5)
+            step[i] = 1e-6 * x[i]
+            difference = (lame.sigma_tan(*(x + step)) - lame.sigma_tan(*(x - step))) / (2 * step[i])
+            self.assertAlmostEqual(1.0, gradient[i] / difference, places=6)
+
+    def test_fixed_length(self):
+        units = self.units
+        result = minimize_wall_mass(20 * units.MPa, self.strength, self.density, 2.0,
+                                    (0.5 * units.inch, 2 * units.inch), length=7 * units.inch,
+                                    t_bounds=(0.03 * units.inch, 0.5 * units.inch), p_amb=0.1 * units.MPa)
+
+        self.assertEqual(['aluminum', 'inconel', 'steel'], result.materials)
+        np.testing.assert_array_equal([False, True, True], result.feasible)
+        self.assertEqual('inconel', result.best)
+        self.assertEqual([], result.active_constraints('aluminum'))
+        self.assertEqual(['min_thickness', 'min_radius'], result.active_constraints('inconel'))
+        self.assertEqual(['stress', 'min_radius'], result.active_constraints('steel'))
+        self.assertLessEqual(result.evaluations, 3)
+
+        # The stress limited wall is the one PressureVessel sizes, to within its step size
+        vessel = PressureVessel(0.5 * units.inch, 0.1 * units.inch, 20 * units.MPa, 0.1 * units.MPa, 250 * units.MPa,
+                                2.0, 0.001 * units.inch)
+        difference = (vessel.calculate_wall_thickness() - result.t[2]).to(units.inch).magnitude
+        self.assertTrue(0 <= difference <= 0.001)
+
+        ri, t = 0.5 * units.inch, result.t[2]
+        mass = (np.pi * ((ri + t) ** 2 - ri ** 2) * 7 * units.inch * self.density['steel']).to(units.kg)
+        self.assertAlmostEqual(mass.magnitude, result.mass[2].magnitude, places=12)
+        self.assertEqual(units.kg, result.mass.units)
+
+    def test_fixed_volume(self):
+        # At low pressure the minimum thickness holds the wall, so a wider, shorter chamber is lighter until the
+        # stress limit takes over
+        units = self.units
+        result = minimize_wall_mass(2 * units.MPa, self.strength, self.density, 2.0, (0.5 * units.inch, 2 * units.inch),
+                                    volume=10 * units.inch ** 3, t_bounds=(0.03 * units.inch, 0.5 * units.inch))
+
+        np.testing.assert_array_equal([True, True, True], result.converged)
+        self.assertEqual(['stress', 'min_radius'], result.active_constraints('aluminum'))
+        self.assertEqual(['min_thickness', 'max_radius'], result.active_constraints('inconel'))
+        self.assertEqual(['stress', 'min_thickness'], result.active_constraints('steel'))
+        self.assertLess(result.evaluations, 50)
+
+        # Where both are active the wall is stress limited at exactly the minimum thickness
+        k = np.sqrt((250.0 + 4.0) / (250.0 - 4.0))
+        self.assertAlmostEqual(0.03 / (k - 1.0), result.ri[2].to(units.inch).magnitude, places=7)
+        np.testing.assert_allclose(10.0 / (np.pi * result.ri.to(units.inch).magnitude ** 2),
+                                   result.length.to(units.inch).magnitude)
+
+        strength = np.array([40.0, 1000.0, 250.0])
+        density = np.array([2700.0, 8190.0, 7900.0]) * units.kg / units.m ** 3
+        expected = self.grid_search(2.0, strength, density.to(units.kg / units.inch ** 3).magnitude, 2.0, 0.03, 10.0)
+        np.testing.assert_allclose(expected, result.mass.to(units.kg).magnitude, rtol=1e-8)
+
+    def test_max_thickness(self):
+        # With a fixed thickness the radii beyond where the stress limit needs a thicker wall are infeasible, and the
+        # mass falls with the radius up to there
+        result = minimize_wall_mass(2.0, 250.0, 1.0, 2.0, (0.5, 2.0), volume=10.0, t_bounds=(0.03, 0.03))
+        k = np.sqrt((250.0 + 4.0) / (250.0 - 4.0))
+        self.assertAlmostEqual(0.03 / (k - 1.0), result.ri, places=7)
+        self.assertEqual(['stress', 'min_thickness', 'max_thickness'], result.active_constraints())
+
+        result = minimize_wall_mass(2.0, 250.0, 1.0, 2.0, (0.5, 2.0), length=1.0, t_bounds=(0.0, 0.001))
+        self.assertFalse(result.feasible)
+        self.assertTrue(np.isnan(result.mass))
+        self.assertIsNone(result.best)
+
+    def test_batch(self):
+        random = np.random.RandomState(2015)
+        p_c = random.uniform(1.0, 20.0, 50)
+        strength = random.uniform(100.0, 1000.0, 50)
+        result = minimize_wall_mass(p_c, strength, 1.0, 2.0, (0.5, 2.0), volume=10.0, t_bounds=(0.03, 0.5))
+
+        self.assertEqual((50,), result.ri.shape)
+        self.assertTrue(np.all(result.feasible & result.converged))
+        expected = self.grid_search(p_c, strength, 1.0, 2.0, 0.03, 10.0)
+        np.testing.assert_allclose(expected, result.mass, rtol=1e-8)
+
+        # Materials given by name run along a leading axis
+        result = minimize_wall_mass(p_c, {'a': 100.0, 'b': 1000.0}, {'a': 1.0, 'b': 2.0}, 2.0, (0.5, 2.0), length=1.0)
+        self.assertEqual((2, 50), result.mass.shape)
+
+    def test_bad_inputs(self):
+        with self.assertRaises(ValueError):
+            minimize_wall_mass(2.0, 250.0, 1.0, 2.0, (0.5, 2.0))
+        with self.assertRaises(ValueError):
+            minimize_wall_mass(2.0, 250.0, 1.0, 2.0, (0.5, 2.0), length=1.0, volume=1.0)
+        with self.assertRaises(ValueError):
+            minimize_wall_mass(2.0, 250.0, 1.0, 2.0, (2.0, 0.5), length=1.0)
+        with self.assertRaises(ValueError):
+            minimize_wall_mass(2.0, 250.0, {'a': 1.0}, 2.0, (0.5, 2.0), length=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import math
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVesselBatch, chamber_profile
+from lib.chamber.profiles import outline_points
+
+
+def _reference_points(t, theta, total_length, converg_fraction):
+    """The outline as HelloWorldChamber.build originally calculated it, one design at a time"""
+
+    converg_sect_length = total_length * converg_fraction
+    theta_start = total_length - converg_sect_length
+    theta_end_point = converg_sect_length * math.tan(theta)
+    dtheta = theta_start + converg_sect_length
+
+    pointX = dtheta - math.cos(theta) * math.tan(theta) * t
+    pointY = theta_end_point - math.sin(theta) * math.tan(theta) * t
+    pointY2 = (theta_end_point - t / math.cos(theta))
+    diffX = pointX - theta_start
+    diffY = pointY - 0
+
+    return [(theta_start, 0),
+            (dtheta, theta_end_point),
+            (dtheta, pointY2),
+            (dtheta - diffX, pointY2 - diffY),
+            (theta_start, -t),
+            (0, -t)]
+
+
+class TestChamberProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+
+    def test_matches_reference(self):
+        for t, theta, converg_fraction in ((0.1, math.pi / 4, 0.35), (0.5, 0.3, 0.2), (0.02, 1.0, 0.5)):
+            np.testing.assert_allclose(_reference_points(t, theta, 7.0, converg_fraction),
+                                       outline_points(t, theta, 7.0, converg_fraction), atol=1e-12)
+
+    def test_vectorized(self):
+        t = np.linspace(0.05, 0.5, 20)
+        theta = np.array([[0.5], [0.7], [0.9]])
+        points = outline_points(t, theta, 7.0, 0.35)
+
+        self.assertEqual((3, 20, 6, 2), points.shape)
+        for i in range(3):
+            for j in range(20):
+                np.testing.assert_allclose(_reference_points(t[j], theta[i, 0], 7.0, 0.35), points[i, j], atol=1e-12)
+
+    def test_units(self):
+        points = chamber_profile(2.54 * self.units.millimeter, 45 * self.units.degree, 7.0 * self.units.inch)
+
+        self.assertEqual(self.units.inch, points.units)
+        np.testing.assert_allclose(_reference_points(0.1, math.pi / 4, 7.0, 0.35), points.magnitude, atol=1e-12)
+
+    def test_plain_numbers(self):
+        points = chamber_profile(0.1, 45 * self.units.degree, 7.0)
+
+        self.assertFalse(hasattr(points, 'units'))
+        np.testing.assert_allclose(_reference_points(0.1, math.pi / 4, 7.0, 0.35), points, atol=1e-12)
+
+    def test_batch(self):
+        batch = PressureVesselBatch(np.linspace(1.0, 5.0, 100) * self.units.inch, 3000.0 * self.units.psi,
+                                    0.001 * self.units.psi, 156e3 * self.units.psi, 1.5)
+        t = batch.calculate_wall_thickness()
+        points = chamber_profile(t, 45 * self.units.degree, 7.0 * self.units.inch)
+
+        self.assertEqual((100, 6, 2), points.shape)
+        np.testing.assert_allclose(-t.to(self.units.inch).magnitude, points[:, -1, 1].magnitude)
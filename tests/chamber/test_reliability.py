@@ -0,0 +1,114 @@
+import math
+import unittest
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVessel, estimate_reliability, lame
+from lib.chamber.reliability import LogNormal, Normal
+
+
+def normal_tail(z):
+    """Probability that a standard normal exceeds z"""
+
+    return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+class TestReliability(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.stress = lame.sigma_tan(1.0, 1.1, 1.0, 20.0, 0.1)
+        self.variables = (LogNormal(250.0, 0.1), Normal(20.0, 1.0), Normal(1.0, 0.01), Normal(0.1, 0.005))
+
+    def test_normal_strength(self):
+        # With only the strength random the margin is normal, so the probability of failure and percentiles are known
+        result = estimate_reliability(Normal(250.0, 25.0), 20.0, 1.0, 0.1, 0.1, n_samples=10 ** 6, seed=2015)
+        expected = normal_tail((250.0 - self.stress) / 25.0)
+
+        self.assertEqual(10 ** 6, result.n_samples)
+        self.assertLess(abs(result.probability - expected), 4 * result.standard_error)
+        self.assertAlmostEqual(result.probability, result.failures / 1e6)
+        self.assertAlmostEqual(250.0 - self.stress, result.percentiles[50], delta=0.2)
+        self.assertAlmostEqual(250.0 - self.stress - 1.6449 * 25.0, result.percentiles[5], delta=0.3)
+
+        # The design point is where the strength falls to the stress
+        self.assertAlmostEqual(self.stress, result.design_point['material_strength'], places=6)
+        self.assertAlmostEqual((250.0 - self.stress) / 25.0, result.beta, places=6)
+
+    def test_importance_sampling(self):
+        for std in (10.0, 5.0):
+            expected = normal_tail((250.0 - self.stress) / std)
+            result = estimate_reliability(Normal(250.0, std), 20.0, 1.0, 0.1, 0.1, n_samples=10 ** 4, seed=2015,
+                                          importance_sampling=True)
+            self.assertLess(result.coefficient_of_variation, 0.05)
+            self.assertLess(abs(result.probability - expected), 4 * result.standard_error)
+
+        # Far in the tail plain sampling sees no failures at all
+        result = estimate_reliability(Normal(250.0, 5.0), 20.0, 1.0, 0.1, 0.1, n_samples=10 ** 4, seed=2015)
+        self.assertEqual(0, result.failures)
+        self.assertEqual(float('inf'), result.coefficient_of_variation)
+
+    def test_several_variables(self):
+        plain = estimate_reliability(*self.variables, p_amb=0.1, n_samples=10 ** 5, seed=2015)
+        weighted = estimate_reliability(*self.variables, p_amb=0.1, n_samples=10 ** 5, seed=2015,
+                                        importance_sampling=True)
+
+        error = math.sqrt(plain.standard_error ** 2 + weighted.standard_error ** 2)
+        self.assertLess(abs(plain.probability - weighted.probability), 4 * error)
+        self.assertLess(weighted.standard_error, plain.standard_error)
+
+        # At the design point the wall is exactly at the limit
+        point = weighted.design_point
+        stress = lame.sigma_tan(point['ri'], point['ri'] + point['t'], point['ri'], point['p_c'], 0.1)
+        self.assertAlmostEqual(point['material_strength'], stress, places=6)
+
+    def test_reproducible(self):
+        # The chunks are seeded by their index, so the process count does not change the result
+        options = dict(p_amb=0.1, n_samples=50000, chunk_size=8000, seed=7)
+        first = estimate_reliability(*self.variables, **options)
+        second = estimate_reliability(*self.variables, processes=2, **options)
+
+        self.assertEqual(first.probability, second.probability)
+        self.assertEqual(first.percentiles, second.percentiles)
+
+        # The entropy repeats a run that was seeded from the operating system
+        unseeded = estimate_reliability(*self.variables, p_amb=0.1, n_samples=1000)
+        repeat = estimate_reliability(*self.variables, p_amb=0.1, n_samples=1000, seed=unseeded.entropy)
+        self.assertEqual(unseeded.probability, repeat.probability)
+
+    def test_units(self):
+        units = self.units
+        result = estimate_reliability(Normal(250.0 * units.MPa, 25.0 * units.MPa), (20.0 * units.MPa).to(units.psi),
+                                      1.0 * units.inch, Normal(2.54 * units.mm, 0.1 * units.mm), 0.1 * units.MPa,
+                                      n_samples=10 ** 5, seed=2015)
+
+        self.assertEqual(units.MPa, result.percentiles[50].units)
+        self.assertEqual(units.inch, result.design_point['ri'].units)
+        self.assertGreater(result.probability, 0)
+
+    def test_pressure_vessel(self):
+        units = self.units
+        vessel = PressureVessel(0.5 * units.inch, 0.1 * units.inch, 20 * units.MPa, 0.1 * units.MPa, 250 * units.MPa,
+                                2.0, 0.001 * units.inch)
+        t = vessel.calculate_wall_thickness('closed_form')
+
+        # The thickness for a factor of safety of 2 puts the stress at half the strength
+        result = vessel.reliability(material_strength=Normal(250 * units.MPa, 25 * units.MPa), n_samples=10 ** 4,
+                                    seed=2015, importance_sampling=True)
+        self.assertAlmostEqual(125.0, result.design_point['material_strength'].to(units.MPa).magnitude, places=3)
+        self.assertAlmostEqual(t.to(units.inch).magnitude, result.design_point['t'].to(units.inch).magnitude)
+        self.assertLess(abs(result.probability - normal_tail(5.0)), 4 * result.standard_error)
+
+    def test_bad_inputs(self):
+        with self.assertRaises(ValueError):
+            Normal(1.0, -1.0)
+        with self.assertRaises(ValueError):
+            LogNormal(0.0, 0.1)
+        with self.assertRaises(ValueError):
+            estimate_reliability(250.0, 20.0, 1.0, 0.1, n_samples=0)
+
+        # Nothing is random, so there is nowhere to sample around
+        with self.assertRaises(ValueError):
+            estimate_reliability(250.0, 20.0, 1.0, 0.1, n_samples=10, importance_sampling=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
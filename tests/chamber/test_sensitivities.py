@@ -0,0 +1,168 @@
+import pickle
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVessel, PressureVesselBatch
+
+INPUTS = ('ri', 'p_c', 'p_amb', 'material_strength', 'fs')
+
+
+class TestWallThicknessSensitivities(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        random = np.random.RandomState(2015)
+        self.design = {
+            'ri': random.uniform(0.5, 3.0, 20),
+            'p_c': random.uniform(1.0, 20.0, 20),
+            'p_amb': random.uniform(0.0, 0.2, 20),
+            'material_strength': random.uniform(100.0, 1000.0, 20),
+            'fs': random.uniform(1.2, 3.0, 20),
+        }
+
+    def finite_differences(self, r=None):
+        """Central differences of the thickness solved by PressureVesselBatch"""
+
+        differences = {}
+        for name in INPUTS:
+            step = 1e-6 * self.design[name]
+            thicknesses = []
+            for sign in (1, -1):
+                design = dict(self.design)
+                design[name] = design[name] + sign * step
+                batch = PressureVesselBatch(design['ri'], design['p_c'], design['p_amb'], design['material_strength'],
+                                            design['fs'], r=r)
+                thicknesses.append(batch.calculate_wall_thickness(tolerance=1e-14))
+            differences[name] = (thicknesses[0] - thicknesses[1]) / (2 * step)
+        return differences
+
+    def test_scalar(self):
+        units = self.units
+        vessel = PressureVessel(0.5 * units.inch, 0.1 * units.inch, 20 * units.MPa, 0.1 * units.MPa,
+                                250 * units.MPa, 2.0, 0.001 * units.inch)
+        t, derivatives = vessel.wall_thickness_sensitivities()
+
+        self.assertEqual('closed_form', vessel.method)
+        self.assertEqual(set(INPUTS), set(derivatives))
+        self.assertEqual(units.dimensionless, derivatives['ri'].units)
+        self.assertEqual(units.inch / units.MPa, derivatives['p_c'].units)
+        self.assertEqual(units.inch, derivatives['fs'].units)
+
+        # The closed form thickness, ri (sqrt((S + fs p_c) / (S - fs p_c + 2 fs p_amb)) - 1), differentiated
+        k = np.sqrt(290.0 / 210.4)
+        dk = 0.5 / k * np.array([1.0 / 210.4 - 290.0 / 210.4 ** 2,
+                                 20.0 / 210.4 - 290.0 / 210.4 ** 2 * (-20.0 + 0.2)])
+        self.assertAlmostEqual(k - 1.0, derivatives['ri'].magnitude, places=12)
+        self.assertAlmostEqual(0.5 * dk[0], derivatives['material_strength'].magnitude, places=12)
+        self.assertAlmostEqual(0.5 * dk[1], derivatives['fs'].magnitude, places=12)
+
+        # With p_c and p_amb in other units the derivatives follow the units of the strength
+        vessel = PressureVessel(0.5 * units.inch, 0.1 * units.inch, (20 * units.MPa).to(units.psi), 0.1 * units.MPa,
+                                250 * units.MPa, 2.0, 0.001 * units.inch)
+        _, converted = vessel.wall_thickness_sensitivities()
+        self.assertAlmostEqual(derivatives['p_c'].magnitude, converted['p_c'].to(units.inch / units.MPa).magnitude,
+                               places=12)
+
+    def test_mixed_length_units(self):
+        # dt/dri is a plain ratio whatever the units of ri and the thickness
+        units = self.units
+        vessel = PressureVessel(25.4 * units.mm, 0.1 * units.inch, 20 * units.MPa, 0.1 * units.MPa,
+                                250 * units.MPa, 2.0, 0.001 * units.inch)
+        t, derivatives = vessel.wall_thickness_sensitivities()
+
+        step = 1e-3 * units.mm
+        thicknesses = [PressureVessel(25.4 * units.mm + sign * step, 0.1 * units.inch, 20 * units.MPa, 0.1 * units.MPa,
+                                      250 * units.MPa, 2.0, 0.001 * units.inch).calculate_wall_thickness('closed_form')
+                       for sign in (1, -1)]
+        difference = ((thicknesses[0] - thicknesses[1]) / (2 * step)).to('dimensionless').magnitude
+        self.assertAlmostEqual(difference, derivatives['ri'].to('dimensionless').magnitude, places=6)
+        self.assertAlmostEqual(0.17402171879, derivatives['ri'].to('dimensionless').magnitude, places=9)
+
+    def test_pickled(self):
+        # A vessel rebuilt from a pickle still takes its stresses at a moving inner wall
+        units = self.units
+        vessel = PressureVessel(0.5 * units.inch, 0.1 * units.inch, 300 * units.psi, 14.7 * units.psi,
+                                40 * units.kpsi, 3.0, 0.001 * units.inch)
+        _, derivatives = vessel.wall_thickness_sensitivities()
+        _, unpickled = pickle.loads(pickle.dumps(vessel)).wall_thickness_sensitivities()
+
+        self.assertAlmostEqual(0.0216073200476, derivatives['ri'].magnitude, places=12)
+        for name in INPUTS:
+            self.assertAlmostEqual(derivatives[name].magnitude, unpickled[name].magnitude, places=12)
+
+        # A radius of interest set to an equal value is the inner wall too
+        vessel.r = 0.5 * units.inch
+        _, equal = vessel.wall_thickness_sensitivities()
+        self.assertAlmostEqual(derivatives['ri'].magnitude, equal['ri'].magnitude, places=12)
+
+    def test_step_method(self):
+        # The step solver lands within step_size of the exact thickness, and the derivatives are taken there
+        units = self.units
+        vessel = PressureVessel(0.5 * units.inch, 0.1 * units.inch, 20 * units.MPa, 0.1 * units.MPa,
+                                250 * units.MPa, 2.0, 0.001 * units.inch)
+        t, derivatives = vessel.wall_thickness_sensitivities('step')
+        _, exact = PressureVessel(0.5 * units.inch, 0.1 * units.inch, 20 * units.MPa, 0.1 * units.MPa,
+                                  250 * units.MPa, 2.0, 0.001 * units.inch).wall_thickness_sensitivities()
+
+        self.assertEqual('step', vessel.method)
+        for name in INPUTS:
+            self.assertAlmostEqual(1.0, (derivatives[name] / exact[name]).to('dimensionless').magnitude, places=1)
+
+    def test_batch(self):
+        design = self.design
+        batch = PressureVesselBatch(design['ri'], design['p_c'], design['p_amb'], design['material_strength'],
+                                    design['fs'])
+        t, derivatives = batch.wall_thickness_sensitivities()
+        expected = self.finite_differences()
+
+        self.assertEqual((20,), t.shape)
+        for name in INPUTS:
+            np.testing.assert_allclose(expected[name], derivatives[name], rtol=1e-5)
+
+    def test_batch_fixed_radius(self):
+        # Stresses evaluated at a fixed radius are bisected rather than solved in closed form, and r stays put as ri
+        # moves
+        design = self.design
+        r = 1.1 * design['ri']
+        batch = PressureVesselBatch(design['ri'], design['p_c'], design['p_amb'], design['material_strength'],
+                                    design['fs'], r=r)
+        t, derivatives = batch.wall_thickness_sensitivities(tolerance=1e-14)
+        expected = self.finite_differences(r)
+
+        for name in INPUTS:
+            np.testing.assert_allclose(expected[name], derivatives[name], rtol=1e-4)
+
+        # An r given equal to ri is still held fixed as ri moves, unlike the default
+        ri = design['ri']
+        batch = PressureVesselBatch(ri, design['p_c'], design['p_amb'], design['material_strength'], design['fs'],
+                                    r=ri)
+        _, fixed = batch.wall_thickness_sensitivities(tolerance=1e-14)
+        expected = self.finite_differences(ri.copy())
+        np.testing.assert_allclose(expected['ri'], fixed['ri'], rtol=1e-4)
+
+        batch = PressureVesselBatch(ri, design['p_c'], design['p_amb'], design['material_strength'], design['fs'])
+        _, moving = batch.wall_thickness_sensitivities()
+        self.assertTrue(np.all(np.abs(fixed['ri'] - moving['ri']) > 1e-3 * np.abs(moving['ri'])))
+
+    def test_batch_units(self):
+        units = self.units
+        batch = PressureVesselBatch(np.array([0.5, 1.0]) * units.inch, 20 * units.MPa, 0.1 * units.MPa,
+                                    np.array([250.0, 30.0]) * units.MPa, 2.0)
+        t, derivatives = batch.wall_thickness_sensitivities()
+
+        self.assertEqual(units.inch / units.MPa, derivatives['material_strength'].units)
+        self.assertEqual(units.inch, derivatives['fs'].units)
+
+        # No wall meets the limit for the second point
+        self.assertTrue(np.isnan(derivatives['p_c'][1].magnitude))
+
+        vessel = PressureVessel(0.5 * units.inch, 0.1 * units.inch, 20 * units.MPa, 0.1 * units.MPa,
+                                250 * units.MPa, 2.0, 0.001 * units.inch)
+        _, expected = vessel.wall_thickness_sensitivities()
+        for name in INPUTS:
+            self.assertAlmostEqual(expected[name].magnitude, getattr(derivatives[name][0], 'magnitude',
+                                                                     derivatives[name][0]), places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
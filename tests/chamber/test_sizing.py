@@ -0,0 +1,102 @@
+import math
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVessel, chamber_profile, thruster_pipeline
+from lib.chamber.sizing import _revolved_volume, thrust_coefficient
+from lib.chamber.profiles import outline_points
+from lib.nozzle import area_ratio
+from . import PressureVesselTestCaseDataset
+
+
+class TestThrusterPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.tc = PressureVesselTestCaseDataset()[0]
+        self.pipeline = thruster_pipeline(thrust=500 * self.units.lbf, p_c=self.tc.p_c, p_amb=self.tc.p_amb,
+                                          expansion_ratio=10.0, ri=self.tc.ri,
+                                          material_strength=self.tc.material_strength, fs=self.tc.fs,
+                                          density=8190 * self.units.kg / self.units.m ** 3)
+        self.sized = [name for name in self.pipeline.stages if name != 'chamber_geometry']
+
+    def test_results(self):
+        results = self.pipeline.run(*self.sized)
+
+        self.assertAlmostEqual(10.0, area_ratio(results['exit_mach'], 1.2))
+        self.assertAlmostEqual(500.0, (results['thrust_coefficient'] * self.tc.p_c * results['throat_area'])
+                               .to(self.units.lbf).magnitude)
+        self.assertAlmostEqual(results['throat_radius'].magnitude, results['nozzle_contour'][:, 1].min().magnitude,
+                               places=3)
+
+        tc = self.tc
+        t = PressureVessel(tc.ri, tc.t_guess, tc.p_c, tc.p_amb, tc.material_strength, tc.fs, tc.step_size)\
+            .calculate_wall_thickness()
+        self.assertEqual(t, results['wall_thickness'])
+        np.testing.assert_allclose(chamber_profile(t, 45 * self.units.degree, 7.0 * self.units.inch).magnitude,
+                                   results['chamber_outline'].magnitude)
+        self.assertEqual(self.units.kilogram, results['chamber_mass'].units)
+
+    def test_chamber_mass(self):
+        # A thin cylindrical wall of the same thickness bounds the mass from below, the taper adds the rest
+        pipeline = self.pipeline
+        t = pipeline['wall_thickness'].to(self.units.m).magnitude
+        ri = self.tc.ri.to(self.units.m).magnitude
+        length = (0.65 * 7.0 * self.units.inch).to(self.units.m).magnitude
+        cylinder = math.pi * ((ri + t) ** 2 - ri ** 2) * length * 8190
+        self.assertGreater(pipeline['chamber_mass'].magnitude, cylinder)
+        self.assertLess(pipeline['chamber_mass'].magnitude, 1.5 * cylinder)
+
+        mass = pipeline['chamber_mass']
+        pipeline.set(density=2 * 8190 * self.units.kg / self.units.m ** 3)
+        self.assertAlmostEqual(2.0, (pipeline['chamber_mass'] / mass).magnitude)
+
+    def test_revolved_volume(self):
+        # A rectangle off the axis sweeps a tube, and one across it a solid cylinder as wide as its far side
+        square = np.array([[0.0, 1.0], [2.0, 1.0], [2.0, 3.0], [0.0, 3.0]])
+        self.assertAlmostEqual(16 * math.pi, _revolved_volume(square, 0.0))
+        self.assertAlmostEqual(16 * math.pi, _revolved_volume(square[::-1], 0.0))
+        self.assertAlmostEqual(4.5 * math.pi, _revolved_volume(square - [0.0, 1.5], 0.0))
+
+        # The taper of a narrow chamber runs across the axis, compare with summing rings over a grid
+        points = outline_points(0.05, math.pi / 4, 7.0, 0.35)
+        x0, y0 = points[:, 0], points[:, 1] - 0.5
+        x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+        x, r = np.meshgrid((np.arange(1400) + 0.5) * 0.005, (np.arange(1250) + 0.5) * 0.002, sparse=True)
+        inside = np.zeros(np.broadcast(x, r).shape, dtype=bool)
+        for y in (r, -r):
+            crossings = np.zeros(inside.shape, dtype=int)
+            for i in range(len(points)):
+                if y0[i] != y1[i]:
+                    crossings += ((y0[i] > y) != (y1[i] > y)) & (x < x0[i] + (y - y0[i]) * (x1[i] - x0[i]) /
+                                                                 (y1[i] - y0[i]))
+            inside |= crossings % 2 == 1
+        grid = np.sum(2 * math.pi * r * inside) * 0.005 * 0.002
+        self.assertAlmostEqual(1.0, _revolved_volume(points, 0.5) / grid, places=2)
+
+    def test_incremental_updates(self):
+        self.pipeline.run(*self.sized)
+        runs = self.pipeline.runs
+
+        # Thrust only reaches the nozzle stages
+        self.pipeline.set(thrust=600 * self.units.lbf)
+        self.pipeline.run(*self.sized)
+        changed = set(name for name in self.sized if self.pipeline.runs[name] != runs[name])
+        self.assertEqual(set(['throat_area', 'throat_radius', 'nozzle_contour']), changed)
+
+        # The factor of safety only reaches the chamber stages
+        runs = self.pipeline.runs
+        self.pipeline.set(fs=2.0)
+        self.assertEqual(['wall_thickness', 'chamber_outline', 'chamber_mass', 'chamber_geometry'],
+                         self.pipeline.stale())
+        self.pipeline.run(*self.sized)
+        changed = set(name for name in self.sized if self.pipeline.runs[name] != runs[name])
+        self.assertEqual(set(['wall_thickness', 'chamber_outline', 'chamber_mass']), changed)
+        self.assertEqual(0, self.pipeline.runs['chamber_geometry'])
+
+    def test_thrust_coefficient(self):
+        # Optimum expansion in a vacuum tends to the limiting coefficient as the exit pressure goes to zero
+        gamma = 1.2
+        limit = math.sqrt(2 * gamma ** 2 / (gamma - 1) * (2 / (gamma + 1)) ** ((gamma + 1) / (gamma - 1)))
+        self.assertAlmostEqual(limit, thrust_coefficient(1e9, gamma, 0.0, 0.0))
+        self.assertGreater(thrust_coefficient(10.0, gamma, 0.01, 0.0), thrust_coefficient(10.0, gamma, 0.01, 0.01))
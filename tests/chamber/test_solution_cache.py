@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVessel, SolutionCache
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'solutions.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _vessel(self, p_c=4236.04):
+        return PressureVessel(5.2399 * self.units.inch,
+                              0.1 * self.units.inch,
+                              p_c * self.units.psi,
+                              0.001 * self.units.psi,
+                              156e3 * self.units.psi,
+                              1.5,
+                              0.001 * self.units.inch)
+
+    def test_memory_tier(self):
+        cache = SolutionCache()
+
+        pv = self._vessel()
+        t = pv.calculate_wall_thickness(cache=cache)
+        self.assertEqual(1, cache.misses)
+
+        reference = self._vessel()
+        reference.calculate_wall_thickness()
+
+        # The cached solve leaves the vessel exactly as a real solve would
+        pv = self._vessel()
+        t_cached = pv.calculate_wall_thickness(cache=cache)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(t.units, t_cached.units)
+        self.assertAlmostEqual(reference.t_calc.magnitude, t_cached.magnitude, places=12)
+        self.assertAlmostEqual(reference.ro.magnitude, pv.ro.magnitude, places=12)
+        self.assertAlmostEqual(reference.residual.magnitude, pv.residual.magnitude, places=6)
+        self.assertEqual(reference.iterations, pv.iterations)
+        self.assertEqual('step', pv.method)
+
+        # Different solver settings are a different solution
+        self._vessel().calculate_wall_thickness(method='bracket', cache=cache)
+        self.assertEqual(2, cache.misses)
+
+        # Equal inputs in other units normalize to the same key
+        pv = self._vessel()
+        pv.p_c = pv.p_c.to(self.units.pascal)
+        pv.calculate_wall_thickness(cache=cache)
+        self.assertEqual(2, cache.hits)
+
+        self.assertEqual({'hits': 2, 'disk_hits': 0, 'misses': 2, 'hit_rate': 0.5}, cache.stats())
+
+    def test_lru_eviction(self):
+        cache = SolutionCache(max_entries=2)
+
+        for p_c in (1000.0, 2000.0, 3000.0, 1000.0):
+            self._vessel(p_c).calculate_wall_thickness(method='closed_form', cache=cache)
+        self.assertEqual(4, cache.misses)
+
+        self._vessel(3000.0).calculate_wall_thickness(method='closed_form', cache=cache)
+        self.assertEqual(1, cache.hits)
+
+    def test_disk_tier(self):
+        cache = SolutionCache(path=self.path)
+        t = self._vessel().calculate_wall_thickness(method='bracket', cache=cache)
+        cache.close()
+
+        cache = SolutionCache(path=self.path)
+        pv = self._vessel()
+        self.assertAlmostEqual(t.magnitude, pv.calculate_wall_thickness(method='bracket', cache=cache).magnitude,
+                               places=12)
+        self.assertEqual('bracket', pv.method)
+        self.assertEqual(1, cache.disk_hits)
+        self.assertEqual(0, cache.misses)
+        cache.close()
+
+        # A new solver version invalidates everything on disk
+        cache = SolutionCache(path=self.path, version='other')
+        self._vessel().calculate_wall_thickness(method='bracket', cache=cache)
+        self.assertEqual(1, cache.misses)
+        cache.close()
+
+    def test_disk_eviction(self):
+        cache = SolutionCache(max_entries=1, path=self.path, max_disk_bytes=48 * 1024)
+
+        for p_c in range(1000, 1300):
+            self._vessel(float(p_c)).calculate_wall_thickness(method='closed_form', cache=cache)
+        self.assertLessEqual(os.path.getsize(self.path), 48 * 1024)
+
+        # The oldest solutions were evicted from both tiers, the latest are still on disk
+        self._vessel(1000.0).calculate_wall_thickness(method='closed_form', cache=cache)
+        self.assertEqual(301, cache.misses)
+        self._vessel(1298.0).calculate_wall_thickness(method='closed_form', cache=cache)
+        self.assertEqual(1, cache.disk_hits)
+        cache.close()
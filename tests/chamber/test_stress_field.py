@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVessel, PressureVesselBatch, StressField, lame
+from lib.chamber.stress_field import von_mises, tresca
+from . import PressureVesselTestCaseDataset
+
+
+class TestStressField(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        random = np.random.RandomState(2015)
+        self.ri = random.uniform(0.5, 5.0, 200)
+        self.ro = self.ri * random.uniform(1.01, 2.0, 200)
+        self.p_c = random.uniform(1e6, 2e7, 200)
+        self.p_amb = random.uniform(0.0, 2e5, 200)
+
+    def test_lame(self):
+        field = StressField(self.ri, self.ro, self.p_c, self.p_amb, n_radii=7)
+        self.assertEqual((5, 200, 7), field.stresses.shape)
+        np.testing.assert_allclose(self.ri, field.r[:, 0])
+        np.testing.assert_allclose(self.ro, field.r[:, -1])
+
+        args = [value[:, np.newaxis] for value in (self.ri, self.ro)] + [field.r] + \
+            [value[:, np.newaxis] for value in (self.p_c, self.p_amb)]
+        np.testing.assert_allclose(lame.sigma_tan(*args), field.sigma_tan())
+        np.testing.assert_allclose(lame.sigma_rad(*args), field.sigma_rad())
+        np.testing.assert_allclose(lame.sigma_axial(self.ri, self.ro, self.p_c, self.p_amb),
+                                   field.sigma_axial()[:, 3])
+
+        # The radial stress matches the pressures at the walls
+        np.testing.assert_allclose(-self.p_c, field.sigma_rad()[:, 0])
+        np.testing.assert_allclose(-self.p_amb, field.sigma_rad()[:, -1], atol=1e-6 * self.p_c.max())
+
+    def test_equivalent_stresses(self):
+        for closed_ends in (True, False):
+            field = StressField(self.ri, self.ro, self.p_c, self.p_amb, n_radii=5, closed_ends=closed_ends)
+            principal = field.stresses[:3]
+            np.testing.assert_allclose(von_mises(*principal), field.von_mises(), rtol=1e-12)
+            np.testing.assert_allclose(tresca(*principal), field.tresca(), rtol=1e-12)
+            np.testing.assert_array_equal(np.max(principal, axis=0), field.component('max_principal'))
+            if not closed_ends:
+                np.testing.assert_array_equal(np.zeros((200, 5)), field.sigma_axial())
+
+        self.assertAlmostEqual(np.sqrt(3.0), von_mises(1.0, -1.0, 0.0))
+        self.assertAlmostEqual(2.0, tresca(1.0, -1.0, 0.0))
+
+    def test_radii(self):
+        field = StressField(self.ri, self.ro, self.p_c, self.p_amb, radii=self.ri[:, np.newaxis] * [1.0, 1.005])
+        self.assertEqual((200, 2), field.shape)
+        np.testing.assert_allclose(self.ri * 1.005, field.r[:, 1])
+
+        field = StressField(2.0, 3.0, self.p_c, 0.0, radii=np.linspace(2.0, 3.0, 4))
+        self.assertEqual((200, 4), field.shape)
+
+        with self.assertRaises(ValueError):
+            StressField(2.0, 3.0, 1e6, 0.0, n_radii=0)
+
+    def test_peak_and_safety_factor(self):
+        field = StressField(self.ri, self.ro, self.p_c, self.p_amb)
+
+        # Internal pressure loads the inner wall the most under every criterion
+        for criterion in ('max_principal', 'von_mises', 'tresca'):
+            stress, r = field.peak(criterion)
+            np.testing.assert_allclose(self.ri, r)
+            np.testing.assert_allclose(field.component(criterion)[:, 0], stress)
+            np.testing.assert_allclose(1e6 / stress, field.safety_factor(1e6, criterion))
+
+        self.assertTrue(np.all(field.safety_factor(1.0, 'tresca') <= field.safety_factor(1.0, 'von_mises')))
+        with self.assertRaises(ValueError):
+            field.peak('rankine')
+        with self.assertRaises(ValueError):
+            field.component('hoop')
+
+    def test_vessels(self):
+        tc = PressureVesselTestCaseDataset()[0]
+        pv = PressureVessel(tc.ri, tc.t_guess, tc.p_c, tc.p_amb, tc.material_strength, tc.fs, tc.step_size)
+        pv.calculate_wall_thickness(method='closed_form')
+
+        field = pv.stress_field(n_radii=3)
+        self.assertEqual(self.units.inch, field.length_units)
+        self.assertAlmostEqual(pv.sigma_tan().to(self.units.psi).magnitude,
+                               field.sigma_tan()[0].to(self.units.psi).magnitude)
+
+        # The solved wall meets the strength with exactly the factor of safety at the inner wall
+        self.assertAlmostEqual(tc.fs, field.safety_factor(tc.material_strength, 'max_principal'))
+
+        batch = PressureVesselBatch(np.array([4.0, 5.0]) * self.units.inch, tc.p_c, tc.p_amb, tc.material_strength,
+                                    tc.fs)
+        with self.assertRaises(ValueError):
+            batch.stress_field()
+        batch.calculate_wall_thickness()
+        field = batch.stress_field(n_radii=4)
+        self.assertEqual((2, 4), field.shape)
+        np.testing.assert_allclose(tc.fs, field.safety_factor(tc.material_strength, 'max_principal'))
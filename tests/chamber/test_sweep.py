@@ -0,0 +1,111 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import DesignSweep, PressureVesselBatch
+
+
+class _Interrupt(Exception):
+    pass
+
+
+class TestDesignSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'sweep.csv')
+
+        self.sweep = DesignSweep.grid(np.linspace(5.0, 10.0, 7) * self.units.inch,
+                                      np.linspace(1000.0, 4500.0, 11) * self.units.psi,
+                                      {'INCONEL 718': 156e3 * self.units.psi, 'Alloy 188': 42e3 * self.units.psi},
+                                      [1.25, 1.5],
+                                      0.001 * self.units.psi)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _read(self, path=None):
+        with open(path or self.path) as f:
+            return list(csv.DictReader(f))
+
+    def test_grid(self):
+        self.assertEqual(7 * 11 * 2 * 2, len(self.sweep))
+
+        self.assertEqual(len(self.sweep), self.sweep.run(self.path, chunk_size=50, processes=0))
+        rows = self._read()
+
+        self.assertEqual(list(range(len(self.sweep))), [int(row['index']) for row in rows])
+
+        # The last axis varies fastest, and materials are ordered by name
+        self.assertEqual(['1.25', '1.5'], [row['fs'] for row in rows[:2]])
+        self.assertEqual('Alloy 188', rows[0]['material'])
+        self.assertEqual('INCONEL 718', rows[2]['material'])
+
+        batch = PressureVesselBatch(np.array([float(row['ri']) for row in rows]),
+                                    np.array([float(row['p_c']) for row in rows]),
+                                    np.array([float(row['p_amb']) for row in rows]),
+                                    np.array([float(row['material_strength']) for row in rows]),
+                                    np.array([float(row['fs']) for row in rows]))
+        np.testing.assert_allclose(batch.calculate_wall_thickness(), [float(row['t']) for row in rows])
+
+    def test_samples(self):
+        sweep = DesignSweep.samples([5.2399, 9.5433] * self.units.inch, [1333.29, 2583.42] * self.units.psi,
+                                    42e3 * self.units.psi, 1.5, 0.001 * self.units.psi, material='Alloy 188')
+        self.assertEqual(2, len(sweep))
+
+        sweep.run(self.path, processes=0)
+        t = [(float(row['t']) * self.units.meter).to(self.units.inch).magnitude for row in self._read()]
+        self.assertAlmostEqual(0.256, t[0], delta=0.001001)
+        self.assertAlmostEqual(0.926, t[1], delta=0.001001)
+
+        with self.assertRaises(ValueError):
+            DesignSweep.samples([1.0, 2.0], [1.0, 2.0, 3.0], 42e3, 1.5)
+
+    def test_process_pool_matches_serial(self):
+        serial_path = os.path.join(self.directory, 'serial.csv')
+        self.sweep.run(serial_path, chunk_size=25, processes=0)
+
+        progress = []
+        self.sweep.run(self.path, chunk_size=25, processes=2, progress=lambda done, total: progress.append(done))
+
+        with open(serial_path) as serial, open(self.path) as parallel:
+            self.assertEqual(serial.read(), parallel.read())
+        self.assertEqual(len(self.sweep), progress[-1])
+        self.assertEqual(sorted(progress), progress)
+
+    def test_resume(self):
+        complete_path = os.path.join(self.directory, 'complete.csv')
+        self.sweep.run(complete_path, chunk_size=40, processes=0)
+
+        def interrupt(done, total):
+            if done >= 120:
+                raise _Interrupt()
+
+        with self.assertRaises(_Interrupt):
+            self.sweep.run(self.path, chunk_size=40, processes=0, progress=interrupt)
+
+        # Simulate a partial write of the next chunk after the checkpoint
+        with open(self.path, 'a') as f:
+            f.write('999,partial')
+
+        self.assertEqual(len(self.sweep) - 120, self.sweep.run(self.path, chunk_size=40, processes=0))
+        with open(complete_path) as complete, open(self.path) as resumed:
+            self.assertEqual(complete.read(), resumed.read())
+
+        # A finished sweep has nothing left to do
+        self.assertEqual(0, self.sweep.run(self.path, chunk_size=40, processes=0))
+
+        # Without the results the checkpoint is discarded and the sweep starts over
+        os.remove(self.path)
+        self.assertEqual(len(self.sweep), self.sweep.run(self.path, chunk_size=40, processes=0))
+        with open(complete_path) as complete, open(self.path) as restarted:
+            self.assertEqual(complete.read(), restarted.read())
+
+        # A checkpoint from a different chunking is not reused
+        with self.assertRaises(ValueError):
+            self.sweep.run(self.path, chunk_size=30, processes=0)
+        self.assertEqual(len(self.sweep), self.sweep.run(self.path, chunk_size=30, processes=0, resume=False))
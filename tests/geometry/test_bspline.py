@@ -0,0 +1,122 @@
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.geometry import BSpline, basis_functions, interpolate_bspline
+from lib.geometry.bspline import _CHUNK, chord_length_parameters, clamped_knots
+
+
+class TestBSpline(unittest.TestCase):
+
+    def setUp(self):
+        self.knots = clamped_knots([0.2, 0.5, 0.5, 0.8], 3)
+        self.u = np.linspace(0.0, 1.0, 101)
+
+    def test_partition_of_unity(self):
+        basis = basis_functions(self.knots, 3, self.u)
+        self.assertEqual((101, 8), basis.shape)
+        self.assertTrue(np.all(basis >= 0))
+        np.testing.assert_allclose(np.ones(101), basis.sum(axis=1))
+        np.testing.assert_allclose(np.zeros(101), basis_functions(self.knots, 3, self.u, derivative=1).sum(axis=1),
+                                   atol=1e-12)
+
+    def test_bezier(self):
+        # With no interior knots a B-spline is a Bezier curve
+        control_points = np.array([[0.0, 0.0], [1.0, 2.0], [3.0, 2.0], [4.0, 0.0]])
+        spline = BSpline(control_points, clamped_knots([], 3), 3)
+        u = self.u[:, np.newaxis]
+        bezier = (1 - u) ** 3 * control_points[0] + 3 * (1 - u) ** 2 * u * control_points[1] + \
+            3 * (1 - u) * u ** 2 * control_points[2] + u ** 3 * control_points[3]
+        np.testing.assert_allclose(bezier, spline(self.u))
+        np.testing.assert_allclose(control_points[[0, -1]], spline(np.array([0.0, 1.0])))
+
+    def test_derivative(self):
+        spline = BSpline(np.random.RandomState(0).rand(8, 3), self.knots, 3)
+        u = np.array([0.05, 0.3, 0.45, 0.55, 0.9])
+        h = 1e-6
+        np.testing.assert_allclose((spline(u + h) - spline(u - h)) / (2 * h), spline.derivative(u), rtol=1e-6)
+
+    def test_de_boor(self):
+        # De Boor's algorithm against the basis functions, including at the repeated knot and the ends
+        spline = BSpline(np.random.RandomState(2).rand(8, 2), self.knots, 3)
+        u = np.concatenate([self.u, [0.5, 1.0]])
+        np.testing.assert_allclose(basis_functions(self.knots, 3, u).dot(spline.control_points), spline(u))
+
+        u = np.random.RandomState(3).rand(2, _CHUNK + 10)
+        self.assertEqual((2, _CHUNK + 10, 2), spline(u).shape)
+        np.testing.assert_allclose(basis_functions(self.knots, 3, u[1, -50:]).dot(spline.control_points),
+                                   spline(u)[1, -50:])
+
+    def test_higher_derivatives(self):
+        spline = BSpline(np.random.RandomState(4).rand(8, 2), self.knots, 3)
+        u = np.array([0.1, 0.35, 0.7])
+        h = 1e-5
+        np.testing.assert_allclose((spline.derivative(u + h) - spline.derivative(u - h)) / (2 * h),
+                                   spline.derivative(u, 2), rtol=1e-5)
+        self.assertEqual(1, spline.derivative_spline(2).degree)
+        np.testing.assert_array_equal(np.zeros((3, 2)), spline.derivative(u, 4))
+        with self.assertRaises(ValueError):
+            spline.derivative(u, -1)
+
+    def test_units(self):
+        units = PintExtUnitRegistry()
+        spline = BSpline(np.random.RandomState(1).rand(8, 2) * units.mm, self.knots, 3)
+        self.assertEqual(units.mm, spline(0.5).units)
+        self.assertEqual(units.mm, spline.arc_length().units)
+        self.assertEqual((0.0, 1.0), spline.domain)
+        length = spline.arc_length().magnitude
+        self.assertAlmostEqual(0.5 * length,
+                               spline.arc_length(spline.arc_length_parameters(0.05 * length * units.cm)).magnitude)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            BSpline(np.zeros((4, 2)), clamped_knots([0.5], 3), 3)
+        with self.assertRaises(ValueError):
+            BSpline(np.zeros((5, 2)), [0, 0, 0, 0, 0.6, 0.4, 1, 1, 1], 3)
+
+
+class TestInterpolateBSpline(unittest.TestCase):
+
+    def setUp(self):
+        angles = np.linspace(0.0, np.pi / 2.0, 40)
+        self.arc = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+    def test_passes_through_points(self):
+        for centripetal in (False, True):
+            spline = interpolate_bspline(self.arc, centripetal=centripetal)
+            parameters = chord_length_parameters(self.arc, 0.5 if centripetal else 1.0)
+            np.testing.assert_allclose(self.arc, spline(parameters), atol=1e-12)
+
+        spline = interpolate_bspline(self.arc[:3])
+        self.assertEqual(2, spline.degree)
+        np.testing.assert_allclose(self.arc[:3], spline(chord_length_parameters(self.arc[:3])), atol=1e-12)
+
+    def test_arc_length(self):
+        spline = interpolate_bspline(self.arc)
+        self.assertAlmostEqual(np.pi / 2.0, spline.arc_length(), places=6)
+
+        line = interpolate_bspline(np.array([[0.0, 0.0, 0.0], [1.0, 2.0, 2.0], [2.0, 4.0, 4.0], [4.0, 8.0, 8.0]]))
+        self.assertAlmostEqual(12.0, line.arc_length())
+        np.testing.assert_allclose([3.0, 6.0], line.arc_length(np.array([0.25, 0.5])))
+
+    def test_arc_length_parameters(self):
+        spline = interpolate_bspline(self.arc)
+        s = np.linspace(0.0, spline.arc_length(), 1001)
+        np.testing.assert_allclose(s, spline.arc_length(spline.arc_length_parameters(s)), atol=1e-12)
+
+        # Points evenly spaced by arc length along a circle are evenly spaced in angle
+        points = spline.resample(11)
+        np.testing.assert_allclose(self.arc[[0, -1]], points[[0, -1]], atol=1e-12)
+        np.testing.assert_allclose(np.full(10, np.pi / 20.0), np.diff(np.arctan2(points[:, 1], points[:, 0])),
+                                   atol=1e-6)
+
+    def test_units(self):
+        units = PintExtUnitRegistry()
+        spline = interpolate_bspline(self.arc * units.inch)
+        self.assertEqual(units.inch, spline.resample(5).units)
+        self.assertAlmostEqual(np.pi / 2.0, spline.arc_length().magnitude, places=6)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            interpolate_bspline(self.arc[:1])
+        with self.assertRaises(ValueError):
+            interpolate_bspline(np.zeros((4, 2)))
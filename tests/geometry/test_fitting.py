@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.geometry import simplify_polyline, fit_bspline
+from lib.geometry.fitting import _fit, _segment_distances, chord_length_parameters, simplify_indices
+from lib.nozzle import bell_contour
+
+
+def _distance_to_polyline(points, polyline):
+    """Distance from each point to the nearest segment of a polyline"""
+
+    return np.min(_segment_distances(points[:, np.newaxis], polyline[np.newaxis, :-1], polyline[np.newaxis, 1:]),
+                  axis=1)
+
+
+class TestSimplifyPolyline(unittest.TestCase):
+
+    def setUp(self):
+        self.contour = bell_contour(1.5, 30.0, n_points=1000)
+
+    def test_straight_line(self):
+        line = np.stack([np.linspace(0.0, 5.0, 50), np.linspace(1.0, 2.0, 50)], axis=1)
+        np.testing.assert_allclose(line[[0, -1]], simplify_polyline(line, 1e-9))
+
+    def test_within_tolerance(self):
+        for tolerance in (1e-2, 1e-3, 1e-4):
+            simplified = simplify_polyline(self.contour, tolerance)
+            self.assertLess(len(simplified), len(self.contour))
+            self.assertLessEqual(np.max(_distance_to_polyline(self.contour, simplified)), tolerance)
+
+        self.assertEqual(list(range(1000)), list(simplify_indices(self.contour, 0.0)))
+
+    def test_units(self):
+        units = PintExtUnitRegistry()
+        contour = self.contour * units.mm
+        simplified = simplify_polyline(contour, 0.01 * units.mm)
+        self.assertEqual(units.mm, simplified.units)
+        self.assertEqual(len(simplify_polyline(self.contour, 0.01)), len(simplified))
+        self.assertEqual(len(simplified), len(simplify_polyline(contour, 1e-5 * units.m)))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            simplify_polyline(self.contour[:1], 0.1)
+        with self.assertRaises(ValueError):
+            simplify_polyline(self.contour, -0.1)
+
+
+class TestFitBSpline(unittest.TestCase):
+
+    def setUp(self):
+        self.contour = bell_contour(1.5, 30.0, n_points=300)
+        self.parameters = np.linspace(0.0, 1.0, 20001)
+
+    def _error(self, spline, points):
+        # Distance from each point to a dense polyline through the curve
+        return np.max(_distance_to_polyline(points, spline(self.parameters)))
+
+    def test_within_tolerance(self):
+        for tolerance in (1e-2, 1e-3):
+            spline = fit_bspline(self.contour, tolerance)
+            self.assertLess(len(spline.control_points), len(simplify_polyline(self.contour, tolerance)))
+            self.assertLessEqual(self._error(spline, self.contour), tolerance)
+            np.testing.assert_allclose(self.contour[[0, -1]], spline(np.array(spline.domain)))
+
+    def test_fewest_control_points(self):
+        spline = fit_bspline(self.contour, 1e-3)
+        n_control = len(spline.control_points)
+        _, error = _fit(self.contour, chord_length_parameters(self.contour), n_control - 1, 3, 2)
+        self.assertGreater(error, 1e-3)
+        self.assertGreater(len(spline.control_points), len(fit_bspline(self.contour, 1e-2).control_points))
+
+    def test_interpolates_at_zero_tolerance(self):
+        points = self.contour[::30]
+        spline = fit_bspline(points, 0.0)
+        self.assertEqual(len(points), len(spline.control_points))
+        np.testing.assert_allclose(points, spline(chord_length_parameters(points)), atol=1e-9)
+
+    def test_low_degree(self):
+        spline = fit_bspline(np.array([[0.0, 0.0], [1.0, 1.0]]), 1e-6)
+        self.assertEqual(1, spline.degree)
+        np.testing.assert_allclose([[0.5, 0.5]], spline(np.array([0.5])))
+
+    def test_units(self):
+        units = PintExtUnitRegistry()
+        spline = fit_bspline(self.contour * units.mm, 0.001 * units.cm)
+        self.assertEqual(units.mm, spline.units)
+        self.assertEqual(len(fit_bspline(self.contour, 0.01).control_points), len(spline.control_points))
@@ -0,0 +1,111 @@
+import collections
+import io
+import math
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import chamber_profile
+from lib.geometry import RevolvedSurface, write_revolved_stl, read_stl
+
+
+def _volume(facets):
+    """The enclosed volume by the divergence theorem, positive when the normals point outward"""
+
+    v = facets['vertices'].astype(float)
+    return np.sum(np.einsum('ij,ij->i', v[:, 0], np.cross(v[:, 1], v[:, 2]))) / 6.0
+
+
+def _edge_counts(facets):
+    """How many facets share each edge, with edges keyed by their rounded vertices"""
+
+    counts = collections.Counter()
+    for triangle in np.round(facets['vertices'].astype(float), 5):
+        points = [tuple(point) for point in triangle]
+        for i in range(3):
+            counts[frozenset((points[i], points[(i + 1) % 3]))] += 1
+    return counts
+
+
+class TestRevolvedSurface(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'part.stl')
+
+        # A tube 3 long with inner radius 1 and outer radius 2
+        self.tube = [(0.0, 1.0), (3.0, 1.0), (3.0, 2.0), (0.0, 2.0)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _tube_volume(self, segments):
+        return 3.0 * 0.5 * segments * math.sin(2.0 * math.pi / segments) * (2.0 ** 2 - 1.0 ** 2)
+
+    def test_tube(self):
+        count = write_revolved_stl(self.path, self.tube, segments=40, chunk_segments=7)
+        facets = read_stl(self.path)
+
+        self.assertEqual(4 * 2 * 40, count)
+        self.assertEqual(count, len(facets))
+        self.assertEqual(84 + 50 * count, os.path.getsize(self.path))
+        self.assertAlmostEqual(self._tube_volume(40), _volume(facets), places=4)
+
+        # Watertight: every edge is shared by exactly two facets
+        self.assertEqual(set([2]), set(_edge_counts(facets).values()))
+
+        # Normals are unit length and agree with the vertex winding
+        v = facets['vertices'].astype(float)
+        winding = np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 0])
+        np.testing.assert_allclose(1.0, np.linalg.norm(facets['normal'], axis=1), rtol=1e-6)
+        self.assertTrue(np.all(np.einsum('ij,ij->i', winding, facets['normal']) > 0))
+
+    def test_winding_direction(self):
+        forward = read_stl(io.BytesIO(self._write(self.tube)))
+        backward = read_stl(io.BytesIO(self._write(self.tube[::-1])))
+        self.assertAlmostEqual(_volume(forward), _volume(backward), places=4)
+        self.assertGreater(_volume(backward), 0)
+
+    def _write(self, profile, **kwargs):
+        f = io.BytesIO()
+        write_revolved_stl(f, profile, **kwargs)
+        return f.getvalue()
+
+    def test_on_axis(self):
+        # A cone with its tip and base centre on the axis
+        facets = read_stl(io.BytesIO(self._write([(0.0, 0.0), (2.0, 0.0), (0.0, 1.0)], segments=100)))
+
+        self.assertEqual(2 * 100, len(facets))  # the edge along the axis adds nothing, the others one per step
+        self.assertAlmostEqual(math.pi / 3.0 * 2.0, _volume(facets), places=2)
+        self.assertEqual(set([2]), set(_edge_counts(facets).values()))
+
+    def test_axis_offset(self):
+        shifted = [(x, y + 5.0) for x, y in self.tube]
+        facets = read_stl(io.BytesIO(self._write(shifted, segments=40, axis_y=5.0)))
+        self.assertAlmostEqual(self._tube_volume(40), _volume(facets), places=3)
+        self.assertAlmostEqual(5.0, np.mean(facets['vertices'][:, :, 1]), places=4)
+
+    def test_open_profile(self):
+        surface = RevolvedSurface(self.tube, segments=10, closed=False)
+        self.assertEqual(3 * 2 * 10, len(surface))
+        self.assertEqual(len(surface), sum(len(chunk) for chunk in surface.facets(3)))
+
+    def test_units(self):
+        profile = np.array(self.tube) * self.units.inch
+        facets = read_stl(io.BytesIO(self._write(profile, segments=12)))
+        self.assertAlmostEqual(2.0 * 25.4, np.max(facets['vertices'][:, :, 1]), places=3)
+
+    def test_chamber(self):
+        points = chamber_profile(0.1 * self.units.inch, 45 * self.units.degree, 7.0 * self.units.inch)
+        surface = RevolvedSurface(points, segments=360, axis_y=5.2399 * self.units.inch)
+        self.assertEqual(len(surface), surface.write_stl(self.path, chunk_segments=50))
+        self.assertGreater(_volume(read_stl(self.path)), 0)
+
+    def test_bad_profiles(self):
+        with self.assertRaises(ValueError):
+            RevolvedSurface([(0.0, 1.0)])
+        with self.assertRaises(ValueError):
+            RevolvedSurface(self.tube, segments=2)
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import PressureVessel, PressureVesselBatch
+from lib.materials import MaterialDatabase, load_materials
+
+
+class TestMaterialDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.materials = load_materials()
+
+    def test_loaded_once(self):
+        self.assertIs(self.materials, load_materials())
+        self.assertEqual(['INCONEL 718', 'Alloy 188', 'Ox-Free Copper'], self.materials.names())
+        self.assertEqual(3, len(self.materials))
+        self.assertTrue('inconel 718' in self.materials)
+
+    def test_tabulated_points(self):
+        self.assertAlmostEqual(1185.0, self.materials.yield_strength('INCONEL 718', 294.0).magnitude)
+        self.assertAlmostEqual(950.0, self.materials.ultimate_strength('INCONEL 718', 1033.0).magnitude)
+        self.assertEqual(self.units.megapascal, self.materials.yield_strength('Alloy 188', 294.0).units)
+
+    def test_interpolation(self):
+        s = self.materials.yield_strength('Ox-Free Copper', self.units.Quantity(150.0, 'degC'))
+        self.assertAlmostEqual(62.0 + (66.0 - 62.0) * (473.0 - 423.15) / 100.0, s.magnitude, places=6)
+
+        temperatures = np.linspace(294.0, 1033.0, 50) * self.units.kelvin
+        s = self.materials.strength_at('INCONEL 718', temperatures, 'ultimate')
+        self.assertEqual((50,), s.shape)
+        self.assertTrue(np.all(np.diff(s.magnitude) <= 0))
+
+    def test_array_of_names(self):
+        names = np.array(['INCONEL 718', 'Alloy 188', 'INCONEL 718'])
+        s = self.materials.yield_strength(names, np.array([294.0, 294.0, 1033.0]))
+        np.testing.assert_allclose([1185.0, 464.0, 870.0], s.magnitude)
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            self.materials.yield_strength('Ox-Free Copper', 1000.0)
+        with self.assertRaises(KeyError):
+            self.materials.yield_strength('Unobtainium', 300.0)
+        with self.assertRaises(ValueError):
+            self.materials.strength_at('Alloy 188', 300.0, 'fatigue')
+
+    def test_pressure_vessel(self):
+        strength = self.materials.yield_strength('INCONEL 718', 700.0 * self.units.kelvin)
+        pv = PressureVessel(5.2399 * self.units.inch, 0.1 * self.units.inch, 4236.04 * self.units.psi,
+                            0.001 * self.units.psi, strength, 1.5, 0.001 * self.units.inch)
+        pv.calculate_wall_thickness(method='closed_form')
+        self.assertAlmostEqual(1065.0, pv.max_stress().to(self.units.megapascal).magnitude, places=6)
+
+        temperatures = np.array([300.0, 500.0, 700.0]) * self.units.kelvin
+        batch = PressureVesselBatch(5.2399 * self.units.inch, 4236.04 * self.units.psi, 0.001 * self.units.psi,
+                                    self.materials.yield_strength('INCONEL 718', temperatures), 1.5)
+        t = batch.calculate_wall_thickness()
+        self.assertTrue(np.all(np.diff(t.magnitude) > 0))
+
+    def test_invalid_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'materials.csv')
+            with open(path, 'w') as f:
+                f.write('material,temperature_K,yield_MPa,ultimate_MPa\n'
+                        'A,300,10,20\nB,300,10,20\nA,400,5,10\n')
+            with self.assertRaises(ValueError):
+                MaterialDatabase(path)
+        finally:
+            shutil.rmtree(directory)
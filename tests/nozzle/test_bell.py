@@ -0,0 +1,74 @@
+import math
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.nozzle import bell_contour, bell_length, rao_angles
+
+
+class TestBellContour(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+
+    def test_rao_angles(self):
+        theta_n, theta_e = rao_angles(10.0, 0.8)
+        self.assertAlmostEqual(26.5, math.degrees(theta_n))
+        self.assertAlmostEqual(11.0, math.degrees(theta_e))
+
+        # Halfway between the charted lengths and expansion ratios
+        theta_n, theta_e = rao_angles([10.0, math.sqrt(10.0 * 20.0)], [0.85, 0.8])
+        np.testing.assert_allclose([24.75, 28.0], np.degrees(theta_n))
+        np.testing.assert_allclose([9.75, 10.0], np.degrees(theta_e))
+
+        with self.assertRaises(ValueError):
+            rao_angles(2.0)
+        with self.assertRaises(ValueError):
+            rao_angles(10.0, 0.5)
+
+    def test_contour(self):
+        rt, ratio = 1.5, 30.0
+        points = bell_contour(rt, ratio, 0.8, n_points=400)
+        x, y = points[:, 0], points[:, 1]
+        theta_n, theta_e = rao_angles(ratio, 0.8)
+
+        # Entrance arc starts at 45 degrees, the throat is the narrowest point, and the bell ends at the exit
+        self.assertAlmostEqual(-1.5 * rt * math.cos(math.radians(45.0)), x[0])
+        self.assertAlmostEqual(rt, np.min(y), places=4)
+        self.assertAlmostEqual(bell_length(rt, ratio, 0.8), x[-1])
+        self.assertAlmostEqual(rt * math.sqrt(ratio), y[-1])
+        self.assertTrue(np.all(np.diff(x) > 0))
+
+        # The wall angle runs smoothly from the entrance angle through zero at the throat, up to theta_n and back
+        # down to theta_e at the exit
+        slope = np.degrees(np.arctan2(np.diff(y), np.diff(x)))
+        self.assertAlmostEqual(math.degrees(theta_n), np.max(slope), delta=0.5)
+        self.assertAlmostEqual(math.degrees(theta_e), slope[-1], delta=0.5)
+        self.assertLess(np.max(np.abs(np.diff(slope))), 2.0)
+
+    def test_adaptive_density(self):
+        points = bell_contour(1.0, 30.0, n_points=200)
+        spacing = np.hypot(*np.diff(points, axis=0).T)
+        throat = np.abs(points[:-1, 0]) < 0.3
+        self.assertLess(np.mean(spacing[throat]) * 3.0, np.mean(spacing[~throat]))
+
+        even = bell_contour(1.0, 30.0, n_points=200, angle_fraction=0.0)
+        spacing = np.hypot(*np.diff(even, axis=0).T)
+        self.assertLess(np.max(spacing) / np.min(spacing), 1.05)
+
+    def test_family(self):
+        ratios = np.array([5.0, 10.0, 25.0, 60.0])
+        family = bell_contour(2.0, ratios[:, np.newaxis], np.array([0.6, 0.8, 0.9]), n_points=50)
+        self.assertEqual((4, 3, 50, 2), family.shape)
+
+        for i, ratio in enumerate(ratios):
+            for j, fraction in enumerate([0.6, 0.8, 0.9]):
+                np.testing.assert_allclose(bell_contour(2.0, ratio, fraction, n_points=50), family[i, j])
+
+    def test_units_and_angles(self):
+        points = bell_contour(10.0 * self.units.millimeter, 20.0, theta_n=30 * self.units.degree,
+                              theta_e=8 * self.units.degree, n_points=100)
+        self.assertEqual(self.units.millimeter, points.units)
+        self.assertAlmostEqual(10.0 * math.sqrt(20.0), points.magnitude[-1, 1])
+
+        with self.assertRaises(ValueError):
+            bell_contour(1.0, 20.0, theta_n=0.1, theta_e=0.2)
@@ -0,0 +1,100 @@
+import math
+import unittest
+import numpy as np
+from lib.nozzle import area_ratio, mach_angle, prandtl_meyer, inverse_prandtl_meyer, pressure_ratio, \
+    isentropic_table, mach_from_area_ratio, AreaMachTable
+
+
+class TestIsentropic(unittest.TestCase):
+
+    def test_reference_values(self):
+        # Tabulated values for gamma 1.4
+        self.assertAlmostEqual(1.0, area_ratio(1.0))
+        self.assertAlmostEqual(1.6875, area_ratio(2.0), places=4)
+        self.assertAlmostEqual(4.2346, area_ratio(3.0), places=4)
+        self.assertAlmostEqual(26.380, math.degrees(prandtl_meyer(2.0)), places=3)
+        self.assertAlmostEqual(49.757, math.degrees(prandtl_meyer(3.0)), places=3)
+        self.assertAlmostEqual(30.0, math.degrees(mach_angle(2.0)))
+
+    def test_inverse_prandtl_meyer(self):
+        for gamma in (1.1, 1.2, 1.4, 1.67):
+            mach = np.concatenate([[1.0, 1.0 + 1e-9, 1.001], np.linspace(1.01, 25.0, 5000)])
+            np.testing.assert_allclose(mach, inverse_prandtl_meyer(prandtl_meyer(mach, gamma), gamma), rtol=1e-10)
+
+        self.assertEqual((2, 3), inverse_prandtl_meyer(np.full((2, 3), 0.5)).shape)
+
+        with self.assertRaises(ValueError):
+            inverse_prandtl_meyer(-0.1)
+        with self.assertRaises(ValueError):
+            inverse_prandtl_meyer(3.0)
+
+    def test_flow_ratios(self):
+        # Tabulated values for gamma 1.4 at Mach 2
+        table = isentropic_table(2.0)
+        self.assertAlmostEqual(0.5556, table.temperature_ratio, places=4)
+        self.assertAlmostEqual(0.1278, table.pressure_ratio, places=4)
+        self.assertAlmostEqual(0.2300, table.density_ratio, places=4)
+        self.assertAlmostEqual(1.6875, table.area_ratio, places=4)
+
+        table = isentropic_table(np.linspace(0.5, 3.0, 6), np.array([[1.2], [1.4]]))
+        self.assertEqual((2, 6), table.shape)
+        np.testing.assert_allclose(pressure_ratio(table.mach, 1.2)[0], table.pressure_ratio[0])
+        np.testing.assert_allclose(table.pressure_ratio, table.density_ratio * table.temperature_ratio)
+
+
+class TestMachFromAreaRatio(unittest.TestCase):
+
+    def setUp(self):
+        self.subsonic = np.concatenate([[1e-3, 0.01], np.linspace(0.05, 0.999, 2000), [1.0 - 1e-6]])
+        self.supersonic = np.concatenate([[1.0, 1.0 + 1e-6], np.linspace(1.001, 25.0, 2000)])
+
+    def test_both_branches(self):
+        for gamma in (1.1, 1.2, 1.4, 1.67):
+            for mach, supersonic in ((self.subsonic, False), (self.supersonic, True)):
+                ratio = area_ratio(mach, gamma)
+                found = mach_from_area_ratio(ratio, gamma, supersonic)
+                np.testing.assert_allclose(ratio, area_ratio(found, gamma), rtol=1e-11)
+                np.testing.assert_allclose(mach, found, rtol=1e-6)
+                np.testing.assert_allclose(mach[mach > 1.001], found[mach > 1.001], rtol=1e-10)
+
+        self.assertAlmostEqual(2.0, mach_from_area_ratio(1.6875, 1.4), places=4)
+        self.assertAlmostEqual(0.3059, mach_from_area_ratio(2.0, 1.4, supersonic=False), places=4)
+
+    def test_arrays_of_gamma_and_branch(self):
+        gamma = np.array([[1.2], [1.4]])
+        mach = np.array([0.5, 2.0, 3.0])
+        ratio = area_ratio(mach, gamma)
+        found = mach_from_area_ratio(ratio, gamma, mach > 1.0)
+        self.assertEqual((2, 3), found.shape)
+        np.testing.assert_allclose(np.broadcast_to(mach, (2, 3)), found)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            mach_from_area_ratio(0.9)
+        with self.assertRaises(ValueError):
+            mach_from_area_ratio(2.0, max_iterations=1)
+
+
+class TestAreaMachTable(unittest.TestCase):
+
+    def test_matches_newton(self):
+        for gamma in (1.2, 1.4):
+            for supersonic in (True, False):
+                table = AreaMachTable(gamma, supersonic, max_area_ratio=500.0)
+                self.assertLess(table.tolerance, 1e-10)
+
+                ratio = np.concatenate([[1.0, 500.0], np.random.RandomState(0).uniform(1.0, 500.0, 10000)])
+                found = table(ratio)
+                self.assertLessEqual(np.max(np.abs(area_ratio(found, gamma) / ratio - 1.0)),
+                                     2.0 * table.tolerance + 1e-13)
+                np.testing.assert_allclose(mach_from_area_ratio(ratio, gamma, supersonic)[2:], found[2:], rtol=1e-9)
+
+    def test_invalid(self):
+        table = AreaMachTable(1.2, max_area_ratio=100.0, size=64)
+        self.assertLess(table.tolerance, 1e-5)
+        with self.assertRaises(ValueError):
+            table(101.0)
+        with self.assertRaises(ValueError):
+            table(0.5)
+        with self.assertRaises(ValueError):
+            AreaMachTable(max_area_ratio=1.0)
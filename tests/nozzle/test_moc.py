@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.nozzle import CharacteristicMesh, aerospike_contour, area_ratio, mach_angle, minimum_length_nozzle
+
+
+class TestAerospike(unittest.TestCase):
+
+    def test_full_spike(self):
+        for gamma, mach in ((1.4, 3.0), (1.2, 2.5), (1.3, 4.0)):
+            points = aerospike_contour(mach, gamma, lip_radius=2.0, n_points=200)
+            x, r = points[:, 0], points[:, 1]
+
+            # Pointed tip on the axis, a Mach line away from the lip. The tip is a double root of the flow area
+            # quadratic, so it is only found to about the square root of machine precision.
+            self.assertAlmostEqual(0.0, r[-1], places=6)
+            self.assertAlmostEqual(2.0 / np.tan(mach_angle(mach)), x[-1], places=6)
+
+            # The annular sonic throat between the lip and the first point passes the design mass flow
+            gap = np.hypot(x[0], 2.0 - r[0])
+            throat_area = np.pi * (2.0 + r[0]) * gap
+            self.assertAlmostEqual(np.pi * 2.0 ** 2 / area_ratio(mach, gamma), throat_area)
+
+            self.assertTrue(np.all(np.diff(x) > 0))
+            self.assertTrue(np.all(np.diff(r) < 0))
+
+    def test_truncated_and_family(self):
+        full = aerospike_contour(3.0, n_points=50)
+        family = aerospike_contour(np.array([2.0, 3.0]), 1.4, 1.0, n_points=50, length_fraction=np.array([[1.0],
+                                                                                                      [0.25]]))
+        self.assertEqual((2, 2, 50, 2), family.shape)
+        np.testing.assert_allclose(full, family[0, 1])
+
+        truncated = family[1, 1]
+        self.assertAlmostEqual(full[0, 0] + 0.25 * (full[-1, 0] - full[0, 0]), truncated[-1, 0])
+        self.assertGreater(truncated[-1, 1], 0.0)
+        np.testing.assert_allclose(full[0], truncated[0])
+
+    def test_units(self):
+        units = PintExtUnitRegistry()
+        points = aerospike_contour(3.0, lip_radius=10.0 * units.millimeter, n_points=10)
+        self.assertEqual(units.millimeter, points.units)
+
+
+class TestMinimumLengthNozzle(unittest.TestCase):
+
+    def test_exit_area(self):
+        # A planar nozzle's exit to throat height ratio converges on the isentropic area ratio
+        for mach, gamma in ((2.4, 1.4), (3.0, 1.2)):
+            errors = [abs(minimum_length_nozzle(mach, gamma, 1.0, n)[-1, 1] / area_ratio(mach, gamma) - 1.0)
+                      for n in (10, 100, 1000)]
+            self.assertLess(errors[-1], 1e-4)
+            self.assertTrue(errors[0] > errors[1] > errors[2])
+
+    def test_mesh(self):
+        mesh = CharacteristicMesh(2.4, n_characteristics=20)
+
+        i, j = np.tril_indices(20)
+        self.assertFalse(np.any(np.isnan(mesh.x[i, j])))
+        np.testing.assert_allclose(0.0, mesh.y[np.arange(20), np.arange(20)])
+        self.assertTrue(np.all(np.isnan(mesh.x[np.triu_indices(20, 1)])))
+
+        # The last point on the centreline is at the design Mach number and flows straight down the axis
+        self.assertAlmostEqual(2.4, mesh.mach(19, 19))
+        self.assertAlmostEqual(0.0, mesh.theta(19, 19))
+
+        # Every interior point lies inside the nozzle, and the wall only ever widens
+        self.assertTrue(np.all(mesh.y[i, j] < np.interp(mesh.x[i, j], mesh.wall[:, 0], mesh.wall[:, 1])))
+        self.assertTrue(np.all(np.diff(mesh.wall, axis=0) > 0))
+
+        np.testing.assert_allclose(mesh.wall, CharacteristicMesh(2.4, n_characteristics=20, keep_mesh=False).wall)
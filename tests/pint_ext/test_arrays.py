@@ -0,0 +1,31 @@
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry, magnitude, units_of, with_units
+
+
+class TestArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+
+    def test_units_of(self):
+        self.assertIsNone(units_of(1.0, np.ones(3)))
+        self.assertEqual(self.units.inch, units_of(2.0, np.ones(3) * self.units.inch, 1.0 * self.units.mm))
+
+    def test_magnitude(self):
+        values = magnitude(np.array([1.0, 2.0]) * self.units.inch, self.units.mm)
+        np.testing.assert_allclose([25.4, 50.8], values)
+
+        # Plain numbers are already in the units asked for
+        values = magnitude([1, 2], self.units.mm)
+        self.assertEqual(float, values.dtype)
+        np.testing.assert_array_equal([1.0, 2.0], values)
+
+    def test_with_units(self):
+        values = np.array([1.0, 2.0])
+        self.assertIs(values, with_units(values, None))
+        self.assertEqual(self.units.psi, with_units(values, self.units.psi).units)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from pint import DimensionalityError
+from lib.pint_ext import PintExtUnitRegistry
+
+
+class TestUnitKernel(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+
+        @self.units.kernel('newton', 'pascal', 'meter')
+        def force(p, r):
+            return p * r**2
+
+        @self.units.kernel('=p', 'pascal', None)
+        def scaled(p, fs):
+            return p * fs
+
+        self.force = force
+        self.scaled = scaled
+
+    def test_converts_to_base_units(self):
+        f = self.force(1.0 * self.units.psi, 1.0 * self.units.inch)
+        expected = (1.0 * self.units.psi * (1.0 * self.units.inch)**2).to(self.units.newton)
+
+        self.assertEqual(self.units.newton, f.units)
+        self.assertAlmostEqual(expected.magnitude, f.magnitude, places=12)
+
+    def test_result_in_argument_units(self):
+        self.assertEqual(self.units.psi, self.scaled(10.0 * self.units.psi, 1.5).units)
+        self.assertAlmostEqual(15.0, self.scaled(10.0 * self.units.psi, 1.5).magnitude, places=12)
+        self.assertEqual(self.units.bar, self.scaled(10.0 * self.units.bar, 1.5).units)
+        self.assertAlmostEqual(15.0, self.scaled(10.0 * self.units.bar, 1.5).magnitude, places=12)
+
+    def test_plain_numbers_pass_through(self):
+        self.assertEqual(12.0, self.force(3.0, 2.0))
+
+    def test_input_dimensions(self):
+        with self.assertRaises(DimensionalityError):
+            self.force(1.0 * self.units.inch, 1.0 * self.units.inch)
+
+        with self.assertRaises(ValueError):
+            self.force(1.0 * self.units.psi, 1.0)
+
+    def test_formula_dimensions(self):
+        @self.units.kernel('newton', 'pascal', 'meter')
+        def not_a_force(p, r):
+            return p * r
+
+        with self.assertRaises(DimensionalityError):
+            not_a_force(1.0 * self.units.psi, 1.0 * self.units.inch)
+
+    def test_offset_units(self):
+        @self.units.kernel('kelvin', 'kelvin')
+        def temperature(temp):
+            return temp
+
+        with self.assertRaises(ValueError):
+            temperature(self.units.Quantity(20.0, 'degC'))
+
+    def test_multiple_results(self):
+        @self.units.kernel(('=r', 'meter ** 2'), 'meter')
+        def diameter_and_area(r):
+            return 2.0 * r, 3.0 * r**2
+
+        d, a = diameter_and_area(2.0 * self.units.inch)
+        self.assertEqual(self.units.inch, d.units)
+        self.assertAlmostEqual(4.0, d.magnitude, places=12)
+        self.assertAlmostEqual((12.0 * self.units.inch**2).to(self.units.meter**2).magnitude, a.magnitude, places=12)
+
+    def test_argument_count(self):
+        with self.assertRaises(ValueError):
+            self.units.kernel('meter', 'meter')(lambda a, b: a + b)
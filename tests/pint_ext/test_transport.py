@@ -0,0 +1,68 @@
+import multiprocessing
+import pickle
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry, pack, unpack, pack_many, unpack_many, warm_up
+from lib.chamber import PressureVessel
+
+
+def _solve(packed_vessel):
+    """Pool worker, solves a vessel and sends the thickness back packed"""
+
+    pv = pickle.loads(packed_vessel)
+    return pack(pv.calculate_wall_thickness(method='closed_form'))
+
+
+class TestTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+
+    def test_round_trip(self):
+        q = 4236.04 * self.units.psi
+        packed = pack(q)
+
+        self.assertEqual((4236.04, 'pound_force_per_square_inch'), packed)
+        self.assertEqual(q, unpack(pickle.loads(pickle.dumps(packed))))
+        self.assertIs(self.units.registry, unpack(packed)._REGISTRY)
+
+        self.assertEqual((1.5, None), pack(1.5))
+        self.assertEqual(1.5, unpack(pack(1.5)))
+
+    def test_arrays(self):
+        q = np.array([1.0, 2.0]) * self.units.inch
+        np.testing.assert_array_equal(q.magnitude, unpack(pack(q)).magnitude)
+
+        magnitudes, unit_string = pack_many([1.0 * self.units.inch, 2.54 * self.units.centimeter])
+        self.assertEqual('inch', unit_string)
+        np.testing.assert_allclose([1.0, 1.0], magnitudes)
+
+        quantities = unpack_many((magnitudes, unit_string))
+        self.assertEqual(2, len(quantities))
+        self.assertEqual(self.units.inch, quantities[1].units)
+        self.assertEqual([1.0, 2.0], unpack_many(pack_many([1.0, 2.0])))
+
+    def test_pressure_vessel_pickle(self):
+        pv = PressureVessel(5.2399 * self.units.inch, 0.1 * self.units.inch, 1333.29 * self.units.psi,
+                            0.001 * self.units.psi, 156e3 * self.units.psi, 1.5, 0.001 * self.units.inch)
+        copy = pickle.loads(pickle.dumps(pv))
+
+        self.assertIs(self.units.registry, copy.ri._REGISTRY)
+        self.assertEqual(pv.ri, copy.ri)
+        self.assertEqual(pv.calculate_wall_thickness(), copy.calculate_wall_thickness())
+
+    def test_process_pool(self):
+        vessels = [pickle.dumps(PressureVessel(ri * self.units.inch, 0.1 * self.units.inch, 1333.29 * self.units.psi,
+                                               0.001 * self.units.psi, 156e3 * self.units.psi, 1.5,
+                                               0.001 * self.units.inch))
+                   for ri in (5.0, 6.0, 7.0)]
+
+        pool = multiprocessing.Pool(2, initializer=warm_up)
+        try:
+            results = [unpack(packed) for packed in pool.map(_solve, vessels)]
+        finally:
+            pool.close()
+            pool.join()
+
+        for result, vessel in zip(results, vessels):
+            self.assertEqual(pickle.loads(vessel).calculate_wall_thickness(method='closed_form'), result)
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import unittest
+import warnings
+from lib.pint_ext import PintExtUnitRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestPintExtUnitRegistry(unittest.TestCase):
+
+    def test_singleton(self):
+        self.assertIs(PintExtUnitRegistry(), PintExtUnitRegistry())
+
+    def test_registry_api(self):
+        units = PintExtUnitRegistry()
+
+        self.assertAlmostEqual(6894.757, (1.0 * units.psi).to(units.pascal).magnitude, places=3)
+        self.assertAlmostEqual(0.0762, units('3 inch').to(units.meter).magnitude, places=12)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            self.assertEqual(units.inch, units['inch'].units)
+        self.assertTrue('psi' in units)
+        self.assertFalse('furlongs_per_fortnight_squared' in units)
+        self.assertTrue(units.loaded)
+        self.assertIs(units.registry, units.Quantity(1.0, 'inch')._REGISTRY)
+
+    def test_import_does_not_load_pint(self):
+        # Run in a fresh interpreter, this one has long since loaded pint
+        code = ("import sys, lib.chamber, lib.chamber.pressure_vessel_calcs as pv; "
+                "print('pint' in sys.modules, pv.units.loaded)")
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+        self.assertEqual('False False', output.decode('utf-8').strip())
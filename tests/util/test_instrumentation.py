@@ -0,0 +1,126 @@
+import csv
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.chamber import DesignSweep, PressureVessel, SolutionCache
+from lib.util import Instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _vessel(self):
+        return PressureVessel(5.2399 * self.units.inch,
+                              0.1 * self.units.inch,
+                              4236.04 * self.units.psi,
+                              0.001 * self.units.psi,
+                              156e3 * self.units.psi,
+                              1.5,
+                              0.001 * self.units.inch)
+
+    def test_disabled_by_default(self):
+        pv = self._vessel()
+        self.assertIsNone(pv.instrumentation)
+        self.assertNotIn('max_stress', pv.__dict__)
+        self.assertEqual(PressureVessel.max_stress, type(pv).max_stress)
+
+    def test_counts_and_solves(self):
+        instrumentation = Instrumentation(trace=True)
+        pv = self._vessel().instrument(instrumentation, 'pv')
+
+        t = pv.calculate_wall_thickness(method='bracket')
+        reference = self._vessel()
+        self.assertEqual(reference.calculate_wall_thickness(method='bracket'), t)
+
+        self.assertEqual(1, len(instrumentation.solves))
+        record = instrumentation.solves[0]
+        self.assertEqual('pv', record['label'])
+        self.assertEqual('bracket', record['method'])
+        self.assertTrue(record['converged'])
+        self.assertEqual(pv.iterations, record['evaluations'])
+        self.assertEqual(record['evaluations'], len(record['trace']))
+        self.assertAlmostEqual(t.to(self.units.meter).magnitude, record['t'])
+
+        counts = instrumentation.counts
+        self.assertEqual(record['evaluations'], counts['max_stress'])
+        self.assertEqual(counts['max_stress'], counts['sigma_tan'])
+        self.assertEqual(counts['max_stress'], counts['sigma_rad'])
+
+        self.assertEqual(1, instrumentation.phases['bracket'][0])
+        self.assertEqual(1, instrumentation.phases['refine'][0])
+
+        # The trace approaches the stress limit
+        limit = pv.material_strength.to(self.units.pascal).magnitude
+        self.assertLess(abs(record['trace'][-1][1] - limit), abs(record['trace'][0][1] - limit))
+
+    def test_turn_off(self):
+        instrumentation = Instrumentation()
+        pv = self._vessel().instrument(instrumentation)
+        pv.instrument(None)
+
+        pv.calculate_wall_thickness(method='closed_form')
+        self.assertEqual([], instrumentation.solves)
+        self.assertEqual({}, instrumentation.counts)
+        self.assertIsNone(pv.instrumentation)
+
+    def test_cache_miss_is_one_solve(self):
+        instrumentation = Instrumentation()
+        cache = SolutionCache()
+        for _ in range(2):
+            self._vessel().instrument(instrumentation).calculate_wall_thickness(method='closed_form', cache=cache)
+
+        self.assertEqual(2, len(instrumentation.solves))
+        self.assertEqual(1, instrumentation.solves[0]['evaluations'])
+        self.assertEqual(0, instrumentation.solves[1]['evaluations'])
+
+    def test_pickle_leaves_instrumentation_behind(self):
+        pv = pickle.loads(pickle.dumps(self._vessel().instrument(Instrumentation())))
+        self.assertIsNone(pv.instrumentation)
+        self.assertNotIn('max_stress', pv.__dict__)
+
+    def test_merge_and_export(self):
+        first, second = Instrumentation(), Instrumentation()
+        self._vessel().instrument(first, 'a').calculate_wall_thickness(method='bracket')
+        self._vessel().instrument(second, 'b').calculate_wall_thickness(method='step')
+
+        merged = pickle.loads(pickle.dumps(first)).merge(second)
+        summary = merged.summary()
+        self.assertEqual(2, summary['solves'])
+        self.assertEqual(first.counts['max_stress'] + second.counts['max_stress'], summary['counts']['max_stress'])
+        self.assertEqual(1, summary['phases']['step']['calls'])
+
+        json_path = os.path.join(self.directory, 'report.json')
+        merged.to_json(json_path)
+        with open(json_path) as f:
+            self.assertEqual(2, json.load(f)['summary']['solves'])
+
+        csv_path = os.path.join(self.directory, 'report.csv')
+        merged.to_csv(csv_path)
+        with open(csv_path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(['a', 'b'], [row['label'] for row in rows])
+        self.assertEqual(['bracket', 'step'], [row['method'] for row in rows])
+
+    def test_sweep(self):
+        sweep = DesignSweep.samples(np.linspace(5.0, 10.0, 25) * self.units.inch, 3000.0 * self.units.psi,
+                                    156e3 * self.units.psi, 1.5)
+        instrumentation = Instrumentation()
+        sweep.run(os.path.join(self.directory, 'sweep.csv'), chunk_size=10, processes=0,
+                  instrumentation=instrumentation)
+
+        self.assertEqual(['chunk 0', 'chunk 1', 'chunk 2'], [record['label'] for record in instrumentation.solves])
+        self.assertEqual(25, instrumentation.summary()['evaluations'])
+        self.assertEqual(25, sum(record['converged_points'] for record in instrumentation.solves))
+        self.assertEqual(3, instrumentation.phases['evaluate'][0])
+        self.assertEqual(3, instrumentation.phases['write'][0])
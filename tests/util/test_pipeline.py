@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+from lib.pint_ext import PintExtUnitRegistry
+from lib.util import Instrumentation, Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.units = PintExtUnitRegistry()
+        self.pipeline = Pipeline(a=1, b=2, c=3)
+
+        @self.pipeline.stage()
+        def total(a, b):
+            return a + b
+
+        @self.pipeline.stage()
+        def parity(total):
+            return total % 2
+
+        self.pipeline.add_stage('scaled', lambda parity, c: parity * c, inputs=('parity', 'c'))
+
+    def test_lazy_and_memoized(self):
+        self.assertEqual(dict(total=0, parity=0, scaled=0), self.pipeline.runs)
+        self.assertEqual(3, self.pipeline['scaled'])
+        self.assertEqual(3, self.pipeline['scaled'])
+        self.assertEqual(dict(total=1, parity=1, scaled=1), self.pipeline.runs)
+        self.assertEqual([], self.pipeline.stale())
+
+    def test_only_downstream_reruns(self):
+        self.pipeline.run()
+        self.assertEqual(['c'], self.pipeline.set(c=4, a=1))
+        self.assertEqual(['scaled'], self.pipeline.stale())
+        self.assertEqual(4, self.pipeline['scaled'])
+        self.assertEqual(dict(total=1, parity=1, scaled=2), self.pipeline.runs)
+
+    def test_unchanged_result_stops_reruns(self):
+        self.pipeline.run()
+
+        # The total changes but its parity does not, so scaled is not rerun
+        self.pipeline.set(a=3)
+        self.assertEqual(['total', 'parity', 'scaled'], self.pipeline.stale())
+        self.assertEqual(3, self.pipeline['scaled'])
+        self.assertEqual(dict(total=2, parity=2, scaled=1), self.pipeline.runs)
+
+        self.pipeline.invalidate('scaled')
+        self.pipeline.run()
+        self.assertEqual(dict(total=2, parity=2, scaled=2), self.pipeline.runs)
+
+    def test_downstream(self):
+        self.assertEqual(['total', 'parity', 'scaled'], self.pipeline.downstream('a'))
+        self.assertEqual(['scaled'], self.pipeline.downstream('c'))
+        self.assertEqual(['parity', 'scaled'], self.pipeline.downstream('total'))
+
+    def test_quantities_and_arrays(self):
+        pipeline = Pipeline(length=1.0 * self.units.inch, values=np.arange(3.0))
+        pipeline.add_stage('doubled', lambda length: 2 * length)
+        pipeline.add_stage('summed', lambda values: np.sum(values))
+        pipeline.run()
+
+        self.assertEqual([], pipeline.set(length=1.0 * self.units.inch, values=np.arange(3.0)))
+        self.assertEqual(['length'], pipeline.set(length=25.4 * self.units.mm))
+        self.assertEqual(['values'], pipeline.set(values=np.arange(4.0)))
+        self.assertEqual(['doubled', 'summed'], pipeline.stale())
+        self.assertEqual(50.8 * self.units.mm, pipeline['doubled'])
+
+    def test_instrumentation(self):
+        self.pipeline.instrumentation = Instrumentation()
+        self.pipeline.run()
+        self.pipeline.run()
+        self.assertEqual(1, self.pipeline.instrumentation.phases['total'][0])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.pipeline.add_stage('total', lambda a: a)
+        with self.assertRaises(ValueError):
+            self.pipeline.add_stage('a', lambda b: b)
+        with self.assertRaises(ValueError):
+            self.pipeline.set(total=1)
+
+        self.pipeline.add_stage('missing', lambda d: d)
+        self.assertIn('missing', self.pipeline.stale())
+        with self.assertRaises(KeyError):
+            self.pipeline['missing']
+        with self.assertRaises(ValueError):
+            self.pipeline.add_stage('d', lambda a: a)
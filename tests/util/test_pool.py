@@ -0,0 +1,28 @@
+import multiprocessing
+import unittest
+from lib.util import ordered_results
+
+
+def square(x):
+    return x * x
+
+
+class TestOrderedResults(unittest.TestCase):
+
+    def test_order(self):
+        pool = multiprocessing.Pool(2)
+        try:
+            tasks = iter(range(20))
+            results = ordered_results(pool, square, tasks, 3)
+            self.assertEqual([0, 1, 4], [next(results) for _ in range(3)])
+
+            # Only the window of tasks has been taken from the iterable so far
+            self.assertEqual(5, next(tasks))
+            self.assertEqual([9, 16] + [x * x for x in range(6, 20)], list(results))
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import threading
+import time
+import unittest
+from lib.util import Singleton
+
+
+class _Slow(Singleton):
+    constructed = 0
+
+    def __init__(self):
+        # Widen the window in which racing threads could each construct an instance
+        time.sleep(0.05)
+        _Slow.constructed += 1
+
+
+class _Outer(Singleton):
+    def __init__(self):
+        self.inner = _Inner()
+
+
+class _Inner(Singleton):
+    pass
+
+
+class TestSingleton(unittest.TestCase):
+
+    def test_concurrent_construction(self):
+        instances = []
+        threads = [threading.Thread(target=lambda: instances.append(_Slow())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, _Slow.constructed)
+        self.assertEqual(8, len(instances))
+        self.assertTrue(all(instance is instances[0] for instance in instances))
+
+    def test_nested_construction(self):
+        self.assertIs(_Inner(), _Outer().inner)